@@ -7,20 +7,72 @@ let resistanceLevels = ['通常', '通常', '通常'];
 let dropdownStates = [false, false, false]; // ドロップダウンの開閉状態
 let autocompleteStates = [{}, {}, {}]; // 各入力フィールドのオートコンプリート状態
 
+// 耐性の強さを表す整数コード（monster_dataset.py と同じ値。大きいほど攻撃が効きにくい）
+const RES_WEAK = -1;    // 弱点
+const RES_NORMAL = 0;   // 通常
+const RES_REDUCE = 1;   // 軽減
+const RES_HALF = 2;     // 半減
+const RES_NULL = 3;     // 無効
+const RES_ABSORB = 4;   // 吸収
+const RES_REFLECT = 5;  // 反射
+
+// 耐性レベル（耐性表の各要素の並び順）
+const RESISTANCE_LEVELS = ['通常', '強', '最強'];
+
+// スキル一覧を分離した形式のバージョン（monster_dataset.py の DATASET_VERSION と合わせる）
+const DATASET_VERSION = 2;
+
+// build_static.py が作成する分割済みの静的データ（なければ dqmj2_monsters.json を丸ごと読み込む）
+const STATIC_DATA_DIR = 'data';
+const STATIC_DATA_VERSION = 2;  // build_static.py の STATIC_DATA_VERSION と合わせる
+let monsterShards = null;       // モンスター名 → 詳細データのファイル番号（分割データを使わない場合は null）
+let skillCatalogPromise = null; // 共有のスキル一覧の読み込み
+const shardPromises = {};       // ファイル番号 → 詳細データの読み込み
+
+// モンスター名の検索索引（monster_search.py が作成する data/search.json と同じ形式）
+const SEARCH_INDEX_VERSION = 1;  // monster_search.py の SEARCH_INDEX_VERSION と合わせる
+let searchIndex = null;
+
 // 初期化
 document.addEventListener('DOMContentLoaded', function() {
     loadMonsterData();
     setupEventListeners();
 });
 
+// JSONファイルの取得
+async function fetchJson(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
 // モンスターデータの読み込み
+// 名前と系統の一覧だけを先に読み込み、詳細はモンスターの選択時に loadMonsterDetails で読み込む
 async function loadMonsterData() {
     try {
-        const response = await fetch('dqmj2_monsters.json');
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
+        try {
+            const index = await fetchJson(`${STATIC_DATA_DIR}/index.json`);
+            if (index.version !== STATIC_DATA_VERSION) {
+                throw new Error(`unsupported static data version: ${index.version}`);
+            }
+            monstersData = {};
+            monsterShards = {};
+            index.monsters.forEach(([name, shard]) => {
+                monstersData[name] = { 系統: index.systems[shard] };
+                monsterShards[name] = shard;
+            });
+            searchIndex = await fetchJson(`${STATIC_DATA_DIR}/search.json`).catch(() => null);
+        } catch (error) {
+            // 分割データがなければ（ローカル環境など）従来どおり全データを読み込む
+            console.warn('分割データを読み込めないため全データを読み込みます:', error);
+            monstersData = rehydrateMonsterData(await fetchJson('dqmj2_monsters.json'));
+            monsterShards = null;
+        }
+        if (!searchIndex || searchIndex.version !== SEARCH_INDEX_VERSION) {
+            searchIndex = buildSearchIndex(monstersData);
         }
-        monstersData = await response.json();
         
         console.log('モンスターデータ読み込み完了:', Object.keys(monstersData).length, '体');
         
@@ -33,6 +85,55 @@ async function loadMonsterData() {
     }
 }
 
+// スキル一覧を分離した形式のデータを、各モンスターがスキルの内容を持つ旧形式に戻す（monster_dataset.py と同じ）
+function rehydrateMonsterData(data) {
+    if (data.version !== DATASET_VERSION || !data.skills || !data.monsters) {
+        return data;  // 旧形式
+    }
+    Object.values(data.monsters).forEach(monster => {
+        monster.スキル = (monster.スキル || []).map(id => data.skills[id]);
+    });
+    return data.monsters;
+}
+
+// 詳細データが読み込み済みか
+function isMonsterLoaded(name) {
+    return Boolean(monstersData[name]) && monstersData[name].スキル !== undefined;
+}
+
+// 詳細データ（系統ごとのファイル）の読み込み
+function loadShard(shard) {
+    if (!skillCatalogPromise) {
+        skillCatalogPromise = fetchJson(`${STATIC_DATA_DIR}/skills.json`);
+    }
+    if (!shardPromises[shard]) {
+        shardPromises[shard] = Promise.all([skillCatalogPromise, fetchJson(`${STATIC_DATA_DIR}/monsters/${shard}.json`)])
+            .then(([skills, monsters]) => {
+                Object.entries(monsters).forEach(([name, monster]) => {
+                    // スキルはスキル一覧の番号で参照している
+                    monster.スキル = monster.スキル.map(id => skills[id]);
+                    monstersData[name] = monster;
+                });
+            })
+            .catch(error => {
+                // 失敗した場合は次に選択されたときに再取得する
+                delete shardPromises[shard];
+                skillCatalogPromise = null;
+                throw error;
+            });
+    }
+    return shardPromises[shard];
+}
+
+// 指定したモンスターの詳細データを読み込む
+async function loadMonsterDetails(names) {
+    if (!monsterShards) {
+        return;
+    }
+    const shards = new Set(names.filter(name => !isMonsterLoaded(name)).map(name => monsterShards[name]));
+    await Promise.all([...shards].map(loadShard));
+}
+
 // イベントリスナーの設定
 function setupEventListeners() {
     for (let i = 1; i <= 3; i++) {
@@ -151,48 +252,8 @@ function handleAutocomplete(index, query) {
         return;
     }
     
-    // モンスター名を検索（部分一致、ひらがな/カタカナ対応）
-    const normalizedQuery = normalizeString(query.toLowerCase());
-    const matches = Object.keys(monstersData).filter(name => {
-        const normalizedName = normalizeString(name.toLowerCase());
-        const system = monstersData[name].系統 || '';
-        
-        // 名前の部分一致、系統の部分一致、読み方の部分一致
-        return normalizedName.includes(normalizedQuery) ||
-               name.toLowerCase().includes(query.toLowerCase()) ||
-               system.includes(query) ||
-               // 前方一致も重視
-               normalizedName.startsWith(normalizedQuery) ||
-               name.toLowerCase().startsWith(query.toLowerCase());
-    });
-    
-    // 関連度でソート（前方一致を優先）
-    matches.sort((a, b) => {
-        const normalizedA = normalizeString(a.toLowerCase());
-        const normalizedB = normalizeString(b.toLowerCase());
-        const queryLower = query.toLowerCase();
-        const normalizedQueryLower = normalizeString(queryLower);
-        
-        // 完全一致
-        if (normalizedA === normalizedQueryLower) return -1;
-        if (normalizedB === normalizedQueryLower) return 1;
-        if (a.toLowerCase() === queryLower) return -1;
-        if (b.toLowerCase() === queryLower) return 1;
-        
-        // 前方一致
-        const aStartsNormalized = normalizedA.startsWith(normalizedQueryLower);
-        const bStartsNormalized = normalizedB.startsWith(normalizedQueryLower);
-        const aStartsOriginal = a.toLowerCase().startsWith(queryLower);
-        const bStartsOriginal = b.toLowerCase().startsWith(queryLower);
-        
-        if (aStartsNormalized && !bStartsNormalized) return -1;
-        if (!aStartsNormalized && bStartsNormalized) return 1;
-        if (aStartsOriginal && !bStartsOriginal) return -1;
-        if (!aStartsOriginal && bStartsOriginal) return 1;
-        
-        // 文字列長で並び替え（短い方を優先）
-        return a.length - b.length;
-    }).slice(0, 8); // 最大8件
+    // モンスター名を検索（部分一致、ひらがな/カタカナ対応。完全一致 → 前方一致 → 部分一致 → 系統名の順）
+    const matches = searchMonsters(query, 8); // 最大8件
     
     if (matches.length === 0) {
         hideAutocomplete(index);
@@ -229,6 +290,85 @@ function handleAutocomplete(index, query) {
     autocompleteStates[index-1] = { matches, selectedIndex: 0 };
 }
 
+// 検索索引の作成（monster_search.py の MonsterSearchIndex と同じ。data/search.json がない場合に使う）
+function buildSearchIndex(monsters) {
+    const order = Object.keys(monsters);
+    const position = {};
+    order.forEach((name, i) => { position[name] = i; });
+    const names = order.slice().sort((a, b) => a.length - b.length || position[a] - position[b]);
+    const keys = names.map(normalizeSearchKey);
+    const systems = [];
+    const nameSystems = names.map(name => {
+        const system = monsters[name].系統 || '未知';
+        if (!systems.includes(system)) {
+            systems.push(system);
+        }
+        return systems.indexOf(system);
+    });
+    
+    const grams = {};
+    keys.forEach((key, i) => {
+        const keyGrams = new Set(key);
+        for (let j = 0; j < key.length - 1; j++) {
+            keyGrams.add(key.slice(j, j + 2));
+        }
+        keyGrams.forEach(gram => {
+            (grams[gram] = grams[gram] || []).push(i);
+        });
+    });
+    const systemKeys = systems.map(normalizeSearchKey);
+    return { version: SEARCH_INDEX_VERSION, names, keys, systems, systemKeys, nameSystems, grams };
+}
+
+// 名前または系統名に query を含むモンスター名を順位順に返す（モンスター名の正規化は索引の作成時に済ませてある）
+function searchMonsters(query, limit) {
+    const normalizedQuery = normalizeSearchKey(query.trim());
+    if (!normalizedQuery || !searchIndex) {
+        return [];
+    }
+    const { names, keys, systemKeys, nameSystems, grams } = searchIndex;
+    
+    // 1文字・2文字ごとの転置リストの積集合から候補を絞り込む
+    let candidates;
+    if (normalizedQuery.length === 1) {
+        candidates = grams[normalizedQuery] || [];
+    } else {
+        const postings = [];
+        for (let i = 0; i < normalizedQuery.length - 1; i++) {
+            postings.push(grams[normalizedQuery.slice(i, i + 2)] || []);
+        }
+        postings.sort((a, b) => a.length - b.length);
+        const others = postings.slice(1).map(list => new Set(list));
+        candidates = postings[0].filter(i => others.every(set => set.has(i)) && keys[i].includes(normalizedQuery));
+    }
+    
+    // 番号は名前の短い順に振ってあるため、区分ごとに番号順で並べればよい
+    const exact = [], prefix = [], partial = [];
+    candidates.forEach(i => {
+        if (keys[i] === normalizedQuery) exact.push(i);
+        else if (keys[i].startsWith(normalizedQuery)) prefix.push(i);
+        else partial.push(i);
+    });
+    const ranked = exact.concat(prefix, partial);
+    
+    const matchedSystems = new Set();
+    systemKeys.forEach((key, s) => {
+        if (key.includes(normalizedQuery)) matchedSystems.add(s);
+    });
+    if (matchedSystems.size > 0) {
+        const found = new Set(ranked);
+        nameSystems.forEach((s, i) => {
+            if (matchedSystems.has(s) && !found.has(i)) ranked.push(i);
+        });
+    }
+    return ranked.slice(0, limit).map(i => names[i]);
+}
+
+// 検索用の正規化（小文字化・ひらがな → カタカナ・全角英数字 → 半角。monster_search.py の normalize_kana と同じ）
+function normalizeSearchKey(str) {
+    return normalizeString(str.toLowerCase());
+}
+
 // 文字列正規化（ひらがな⇔カタカナ変換）
 function normalizeString(str) {
     return str
@@ -306,7 +446,7 @@ function updateSelectedItem(index) {
 }
 
 // モンスター選択
-function selectMonster(index, name) {
+async function selectMonster(index, name) {
     const input = document.getElementById(`monster${index}-input`);
     
     input.value = name;
@@ -314,6 +454,14 @@ function selectMonster(index, name) {
     
     hideAutocomplete(index);
     toggleResistanceLevel(index, true);
+    
+    try {
+        await loadMonsterDetails([name]);
+    } catch (error) {
+        console.error('データ読み込みエラー:', error);
+        showError();
+        return;
+    }
     updateDisplay();
 }
 
@@ -354,7 +502,8 @@ function updateStats() {
 
 // 表示の更新
 function updateDisplay() {
-    const validMonsters = selectedMonsters.filter(m => m !== '');
+    // 詳細データの読み込み中のモンスターは、読み込み完了後に表示する
+    const validMonsters = selectedMonsters.filter(m => m !== '' && isMonsterLoaded(m));
     const count = validMonsters.length;
     
     // メッセージの制御
@@ -389,14 +538,13 @@ function updateSingleAnalysis(monsterName, resistanceLevel) {
     document.getElementById('single-analysis-title').textContent = 
         `🎯 耐性分析 (${monsterName} - 耐性レベル: ${resistanceLevel})`;
     
-    if (!monster.耐性 || !monster.耐性.説明) {
+    if (!monster.耐性 || !monster.耐性.表) {
         document.getElementById('single-effective').innerHTML = '<div class="info">耐性情報がありません</div>';
         document.getElementById('single-ineffective').innerHTML = '';
         return;
     }
     
-    const resistanceInfo = parseResistanceInfo(monster.耐性.説明);
-    const analysis = analyzeSingleMonster(resistanceInfo, resistanceLevel);
+    const analysis = analyzeSingleMonster(monster.耐性.表, resistanceLevel);
     
     // 効果的な攻撃
     const effectiveContainer = document.getElementById('single-effective');
@@ -594,11 +742,11 @@ function createTraitsSection(traits) {
 
 // 耐性セクション作成
 function createResistanceSection(resistance) {
-    if (!resistance || !resistance.説明) {
+    if (!resistance || !resistance.表) {
         return '';
     }
     
-    const resistanceInfo = parseResistanceInfo(resistance.説明);
+    const resistanceInfo = resistanceTags(resistance.表);
     
     return `
         <div class="monster-section">
@@ -629,13 +777,8 @@ function createResistanceTags(items, className) {
         return '<span style="color: #6c757d; font-style: italic;">なし</span>';
     }
     
-    return items.map(item => {
-        let displayText = item;
-        if (item.startsWith('◆◆')) {
-            displayText = `${item.substring(2)} ★★`;
-        } else if (item.startsWith('◆')) {
-            displayText = `${item.substring(1)} ★`;
-        }
+    return items.map(([attr, level]) => {
+        const displayText = level > 0 ? `${attr} ${'★'.repeat(level)}` : attr;
         return `<span class="resistance-tag ${className}">${displayText}</span>`;
     }).join(' ');
 }
@@ -669,64 +812,41 @@ function createSkillsSection(skills) {
     `;
 }
 
-// 耐性情報の解析
-function parseResistanceInfo(resistanceText) {
-    const resistances = {
-        '弱点': [],
-        '半減': [],
-        '無効': []
-    };
-    
-    const lines = resistanceText.split('\n');
+// 耐性コードを 弱点 / 通常 / 半減 / 無効 の区分に変換（軽減は半減、吸収・反射は無効扱い）
+function resistanceCategory(code) {
+    if (code < RES_NORMAL) return '弱点';
+    if (code === RES_NORMAL) return '通常';
+    if (code < RES_NULL) return '半減';
+    return '無効';
+}
+
+// 耐性表から、指定した耐性レベルでの属性の区分を引く
+function resistanceCategoryAt(table, attr, resistanceLevel) {
+    const levels = table[attr];
+    if (!levels) return '通常';
+    return resistanceCategory(levels[RESISTANCE_LEVELS.indexOf(resistanceLevel)]);
+}
+
+// 耐性表を表示用に 区分 → [[属性, その区分になるレベルの番号], ...] にまとめる
+function resistanceTags(table) {
+    const tags = { '弱点': [], '半減': [], '無効': [] };
     
-    lines.forEach(line => {
-        line = line.trim();
-        if (!line) return;
-        
-        if (line.includes('弱い')) {
-            const weakPart = line.includes('に弱い') ? line.split('に弱い')[0] : line.split('が弱い')[0];
-            const weakAttrs = weakPart.replace(/・/g, '・').split('・').map(s => s.trim()).filter(s => s);
-            resistances['弱点'].push(...weakAttrs);
-        }
-        
-        if (line.includes('半減')) {
-            let halfPart = line.includes('を半減') ? line.split('を半減')[0] : line.split('が半減')[0];
-            if (line.includes('（強の場合）')) {
-                halfPart = halfPart.replace('（強の場合）', '').trim();
-                const halfAttrs = halfPart.replace(/・/g, '・').split('・').map(s => s.trim()).filter(s => s);
-                resistances['半減'].push(...halfAttrs.map(attr => `◆${attr}`));
-            } else if (line.includes('（最強の場合）')) {
-                halfPart = halfPart.replace('（最強の場合）', '').trim();
-                const halfAttrs = halfPart.replace(/・/g, '・').split('・').map(s => s.trim()).filter(s => s);
-                resistances['半減'].push(...halfAttrs.map(attr => `◆◆${attr}`));
-            } else {
-                const halfAttrs = halfPart.replace(/・/g, '・').split('・').map(s => s.trim()).filter(s => s);
-                resistances['半減'].push(...halfAttrs);
+    Object.entries(table).forEach(([attr, levels]) => {
+        let previous = '通常';
+        levels.forEach((code, level) => {
+            const category = resistanceCategory(code);
+            if (category !== previous && category !== '通常') {
+                tags[category].push([attr, level]);
             }
-        }
-        
-        if (line.includes('無効')) {
-            let nullPart = line.includes('を無効') ? line.split('を無効')[0] : line.split('が無効')[0];
-            if (line.includes('（強の場合）')) {
-                nullPart = nullPart.replace('（強の場合）', '').trim();
-                const nullAttrs = nullPart.replace(/・/g, '・').split('・').map(s => s.trim()).filter(s => s);
-                resistances['無効'].push(...nullAttrs.map(attr => `◆${attr}`));
-            } else if (line.includes('（最強の場合）')) {
-                nullPart = nullPart.replace('（最強の場合）', '').trim();
-                const nullAttrs = nullPart.replace(/・/g, '・').split('・').map(s => s.trim()).filter(s => s);
-                resistances['無効'].push(...nullAttrs.map(attr => `◆◆${attr}`));
-            } else {
-                const nullAttrs = nullPart.replace(/・/g, '・').split('・').map(s => s.trim()).filter(s => s);
-                resistances['無効'].push(...nullAttrs);
-            }
-        }
+            previous = category;
+        });
     });
     
-    return resistances;
+    return tags;
 }
 
 // 単体モンスター分析
-function analyzeSingleMonster(resistanceInfo, resistanceLevel) {
+function analyzeSingleMonster(resistanceTable, resistanceLevel) {
     const allAttributes = [
         // 呪文系
         'メラ', 'ギラ', 'ヒャド', 'バギ', 'イオ', 'デイン', 'ドルマ',
@@ -750,48 +870,10 @@ function analyzeSingleMonster(resistanceInfo, resistanceLevel) {
     };
     
     allAttributes.forEach(attr => {
-        const isWeak = resistanceInfo.弱点.some(weak => weak.includes(attr));
-        
-        let isHalf = false;
-        let isNull = false;
-        
-        // 半減チェック
-        resistanceInfo.半減.forEach(half => {
-            const cleanHalf = half.replace(/◆/g, '');
-            if (cleanHalf.includes(attr)) {
-                // 通常レベル：◆なしの半減 + 強・最強でも適用
-                if (!half.includes('◆')) {
-                    isHalf = true;
-                }
-                // 強レベル：◆ありの半減も追加で適用
-                else if (resistanceLevel === '強' && half.includes('◆') && !half.includes('◆◆')) {
-                    isHalf = true;
-                }
-                // 最強レベル：◆◆ありの半減も追加で適用
-                else if (resistanceLevel === '最強' && half.includes('◆◆')) {
-                    isHalf = true;
-                }
-            }
-        });
-        
-        // 無効チェック
-        resistanceInfo.無効.forEach(null_item => {
-            const cleanNull = null_item.replace(/◆/g, '');
-            if (cleanNull.includes(attr)) {
-                // 通常レベル：◆なしの無効 + 強・最強でも適用
-                if (!null_item.includes('◆')) {
-                    isNull = true;
-                }
-                // 強レベル：◆ありの無効も追加で適用
-                else if (resistanceLevel === '強' && null_item.includes('◆') && !null_item.includes('◆◆')) {
-                    isNull = true;
-                }
-                // 最強レベル：◆◆ありの無効も追加で適用
-                else if (resistanceLevel === '最強' && null_item.includes('◆◆')) {
-                    isNull = true;
-                }
-            }
-        });
+        const category = resistanceCategoryAt(resistanceTable, attr, resistanceLevel);
+        const isWeak = category === '弱点';
+        const isHalf = category === '半減';
+        const isNull = category === '無効';
         
         if (isWeak) {
             analysis.weakness.push(attr);
@@ -839,50 +921,11 @@ function analyzeCommonWeaknesses(validMonsters) {
             const monster = monstersData[monsterName];
             const resistanceLevel = resistanceLevels[selectedMonsters.indexOf(monsterName)];
             
-            if (monster.耐性 && monster.耐性.説明) {
-                const resistanceInfo = parseResistanceInfo(monster.耐性.説明);
-                
-                const isWeak = resistanceInfo.弱点.some(weak => weak.includes(attr));
-                let isHalf = false;
-                let isNull = false;
-                
-                // 半減判定
-                resistanceInfo.半減.forEach(half => {
-                    const cleanHalf = half.replace(/◆/g, '');
-                    if (cleanHalf.includes(attr)) {
-                        // 通常レベル：◆なしの半減 + 強・最強でも適用
-                        if (!half.includes('◆')) {
-                            isHalf = true;
-                        }
-                        // 強レベル：◆ありの半減も追加で適用
-                        else if (resistanceLevel === '強' && half.includes('◆') && !half.includes('◆◆')) {
-                            isHalf = true;
-                        }
-                        // 最強レベル：◆◆ありの半減も追加で適用
-                        else if (resistanceLevel === '最強' && half.includes('◆◆')) {
-                            isHalf = true;
-                        }
-                    }
-                });
-                
-                // 無効判定
-                resistanceInfo.無効.forEach(null_item => {
-                    const cleanNull = null_item.replace(/◆/g, '');
-                    if (cleanNull.includes(attr)) {
-                        // 通常レベル：◆なしの無効 + 強・最強でも適用
-                        if (!null_item.includes('◆')) {
-                            isNull = true;
-                        }
-                        // 強レベル：◆ありの無効も追加で適用
-                        else if (resistanceLevel === '強' && null_item.includes('◆') && !null_item.includes('◆◆')) {
-                            isNull = true;
-                        }
-                        // 最強レベル：◆◆ありの無効も追加で適用
-                        else if (resistanceLevel === '最強' && null_item.includes('◆◆')) {
-                            isNull = true;
-                        }
-                    }
-                });
+            if (monster.耐性 && monster.耐性.表) {
+                const category = resistanceCategoryAt(monster.耐性.表, attr, resistanceLevel);
+                const isWeak = category === '弱点';
+                const isHalf = category === '半減';
+                const isNull = category === '無効';
                 
                 if (isNull) {
                     resistanceDetails.push(`${monsterName}(${resistanceLevel}):無効`);
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DQMJ2 共通弱点の一括分析
+
+JSONL / CSV ファイルに並べた多数のパーティーについて、Streamlit版の「共通弱点分析」
+（monster_analysis.analyze_common_weaknesses）を行い、結果を1行1パーティーの JSONL で出力する。
+Streamlit には依存しない。--workers を指定すると複数プロセスで分析する。
+
+入力の形式（--format を省略すると、拡張子が .csv なら CSV、それ以外は JSONL）:
+    JSONL  1行に1パーティー。モンスター名のリスト、または
+           {"id": 任意, "monsters": [モンスター名, ...], "levels": [耐性レベル, ...]}
+    CSV    1行に1パーティー。各列にモンスター名（空欄は無視）
+
+モンスター名は「スライム:強」のように耐性レベルを付けて指定できる（省略時は 通常）。
+
+使い方:
+    python batch_analysis.py parties.jsonl --output results.jsonl --workers 4
+"""
+
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from monster_analysis import ResistanceMatrix, analyze_common_weaknesses, build_resistance_matrix
+from monster_dataset import DATA_FILE, RESISTANCE_LEVELS, load_monster_data, parse_member
+
+# 1回にまとめてプロセスへ渡すパーティーの数
+DEFAULT_CHUNK_SIZE = 64
+
+# ワーカープロセスごとに一度だけ読み込むモンスターデータと耐性の配列
+_monsters_data: Dict[str, Any] = {}
+_resistance_matrix: Optional[ResistanceMatrix] = None
+
+
+def parse_party(record: Any) -> Dict[str, Any]:
+    """入力の1行を {"id", "monsters", "levels"} に変換"""
+    if isinstance(record, dict):
+        party_id = record.get("id")
+        entries = record.get("monsters", [])
+        levels = list(record.get("levels", []))
+    else:
+        party_id = None
+        entries = record
+        levels = []
+    if not isinstance(entries, list):
+        raise ValueError("monsters がモンスター名のリストではありません")
+
+    members = [parse_member(entry, levels[i] if i < len(levels) else None)
+               for i, entry in enumerate(entries) if entry and entry.strip()]
+    return {"id": party_id,
+            "monsters": [name for name, _ in members],
+            "levels": [level for _, level in members]}
+
+
+def read_parties(path: str, input_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """入力ファイルのパーティーを1行ずつ読み出す（"-" は標準入力。読めない行は error を付けて返す）"""
+    if input_format is None:
+        input_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+    try:
+        if input_format == "csv":
+            rows = (row for row in csv.reader(f))
+        else:
+            rows = (line for line in f)
+        for line_number, row in enumerate(rows, 1):
+            if not isinstance(row, list):
+                if not row.strip():
+                    continue
+                try:
+                    row = json.loads(row)
+                except json.JSONDecodeError as e:
+                    yield {"line": line_number, "error": f"JSON を解析できません: {e}"}
+                    continue
+            try:
+                party = parse_party(row)
+            except (ValueError, TypeError, AttributeError) as e:
+                yield {"line": line_number, "error": str(e)}
+                continue
+            party["line"] = line_number
+            yield party
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def analyze_party(party: Dict[str, Any], monsters_data: Dict[str, Any],
+                  resistance_matrix: Optional[ResistanceMatrix] = None) -> Dict[str, Any]:
+    """1パーティーを分析し、入力の内容と分析結果を合わせた辞書を返す"""
+    if "error" in party:
+        return party
+    result = {"line": party["line"], "id": party["id"]}
+    unknown = [name for name in party["monsters"] if name not in monsters_data]
+    invalid_levels = [level for level in party["levels"] if level not in RESISTANCE_LEVELS]
+    if unknown or invalid_levels:
+        result["error"] = "、".join(
+            ([f"モンスターが見つかりません: {'、'.join(unknown)}"] if unknown else [])
+            + ([f"耐性レベルが不正です: {'、'.join(invalid_levels)}"] if invalid_levels else []))
+        return result
+    if len(party["monsters"]) < 2:
+        result["error"] = "モンスターを2体以上指定してください"
+        return result
+    result.update(analyze_common_weaknesses(party["monsters"], monsters_data, party["levels"], resistance_matrix))
+    return result
+
+
+def analyze_parties(parties: Iterable[Dict[str, Any]], monsters_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """パーティーを順に分析する（1プロセス版。耐性の配列は最初に一度だけ作る）"""
+    resistance_matrix = build_resistance_matrix(monsters_data)
+    for party in parties:
+        yield analyze_party(party, monsters_data, resistance_matrix)
+
+
+def _init_worker(data_file: str):
+    """ワーカープロセスの初期化（モンスターデータと耐性の配列を一度だけ読み込む）"""
+    global _monsters_data, _resistance_matrix
+    _monsters_data = load_monster_data(data_file)
+    _resistance_matrix = build_resistance_matrix(_monsters_data)
+
+
+def _analyze_in_worker(party: Dict[str, Any]) -> Dict[str, Any]:
+    return analyze_party(party, _monsters_data, _resistance_matrix)
+
+
+def analyze_parties_parallel(parties: Iterable[Dict[str, Any]], data_file: str, workers: int,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """パーティーを複数プロセスで分析し、入力と同じ順に結果を返す
+
+    入力は workers × chunk_size × 4 件ずつ読み進めるため、巨大なファイルでも全体をメモリに載せない。
+    """
+    parties = iter(parties)
+    batch_size = workers * chunk_size * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_file,)) as executor:
+        while True:
+            batch = list(islice(parties, batch_size))
+            if not batch:
+                break
+            yield from executor.map(_analyze_in_worker, batch, chunksize=chunk_size)
+
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="DQMJ2 共通弱点の一括分析（結果は JSONL）")
+    parser.add_argument("input", help="パーティーを並べた JSONL / CSV ファイル（- で標準入力）")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="入力の形式（省略時は拡張子で判断）")
+    parser.add_argument("--data", default=DATA_FILE,
+                        help=f"モンスターデータのファイル（デフォルト: {DATA_FILE}）")
+    parser.add_argument("--output", default="-",
+                        help="出力先の JSONL ファイル（デフォルト: 標準出力）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="分析に使うプロセス数（デフォルト: 1）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"1回にまとめてプロセスへ渡すパーティーの数（デフォルト: {DEFAULT_CHUNK_SIZE}）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """メイン関数"""
+    args = parse_args(argv)
+    monsters_data = load_monster_data(args.data)
+    if not monsters_data:
+        print(f"モンスターデータが見つかりません: {args.data}", file=sys.stderr)
+        return 1
+
+    parties = read_parties(args.input, args.format)
+    if args.workers > 1:
+        results = analyze_parties_parallel(parties, args.data, args.workers, args.chunk_size)
+    else:
+        results = analyze_parties(parties, monsters_data)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    analyzed = failed = 0
+    try:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            if "error" in result:
+                failed += 1
+            else:
+                analyzed += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{analyzed}件を分析しました" + (f"（エラー {failed}件）" if failed else ""), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GitHub Pages 版（index.html / app.js）用の静的データの作成
+
+dqmj2_monsters.json を次のファイルに分割し、最小化したJSONと
+事前圧縮した .gz（brotli モジュールがあれば .br も）を書き出す。
+
+    data/index.json          モンスター名と系統の一覧（オートコンプリート用）
+    data/skills.json         全モンスターで共有するスキル一覧
+    data/search.json         モンスター名の検索索引（monster_search.py）
+    data/monsters/<n>.json   系統ごとのモンスターの詳細（スキルはスキル一覧の番号で参照、耐性表つき）
+
+app.js はまず index.json だけを読み込み、モンスターが選択されたときにその系統の
+詳細と skills.json を読み込む。
+
+使い方:
+    python build_static.py [--data dqmj2_monsters.json] [--output data]
+"""
+
+import argparse
+import gzip
+import importlib.util
+import json
+import os
+import shutil
+from typing import Any, Dict, List
+
+from monster_dataset import DATA_FILE, build_resistance_table, build_skill_catalog, load_monster_data
+from monster_search import build_search_index
+
+# 出力先のディレクトリ
+STATIC_DIR = "data"
+
+# 静的データの形式のバージョン（app.js の STATIC_DATA_VERSION と合わせる）
+STATIC_DATA_VERSION = 2
+
+HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+
+
+def minify_json(data: Any) -> bytes:
+    """空白を除いたJSON（UTF-8）"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_static_file(path: str, data: Any) -> Dict[str, int]:
+    """最小化したJSONと事前圧縮した .gz / .br を書き出し、形式 → バイト数 を返す"""
+    content = minify_json(data)
+    variants = {"json": content, "gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if HAS_BROTLI:
+        import brotli
+        variants["br"] = brotli.compress(content, quality=11)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for suffix, data_bytes in variants.items():
+        with open(path if suffix == "json" else f"{path}.{suffix}", "wb") as f:
+            f.write(data_bytes)
+    return {suffix: len(data_bytes) for suffix, data_bytes in variants.items()}
+
+
+def build_static_data(monsters_data: Dict[str, Any]) -> Dict[str, Any]:
+    """静的データのファイル名 → 内容 を作成"""
+    skills, monster_skills = build_skill_catalog(monsters_data)
+    systems: List[str] = []
+    shards: List[Dict[str, Any]] = []
+    monsters = []
+
+    for name, data in monsters_data.items():
+        system = data.get("系統", "未知")
+        resistance = data.get("耐性") or {}
+        if system not in systems:
+            systems.append(system)
+            shards.append({})
+        shard = systems.index(system)
+        monsters.append([name, shard])
+        shards[shard][name] = {
+            "系統": system,
+            "特性": data.get("特性", []),
+            # 耐性表は作成済みのものを持つ（app.js は説明文を解析しない）
+            "耐性": {"説明": resistance["説明"], "表": resistance.get("表") or build_resistance_table(resistance["説明"])}
+                    if resistance.get("説明") else {},
+            "スキル": monster_skills[name],
+        }
+
+    files = {
+        "index.json": {"version": STATIC_DATA_VERSION, "systems": systems, "monsters": monsters},
+        "skills.json": skills,
+        "search.json": build_search_index(monsters_data).to_json(),
+    }
+    for shard, shard_monsters in enumerate(shards):
+        files[f"monsters/{shard}.json"] = shard_monsters
+    return files
+
+
+def write_static_data(monsters_data: Dict[str, Any], output_dir: str = STATIC_DIR) -> Dict[str, Dict[str, int]]:
+    """静的データを output_dir に書き出す（古いファイルは残さない）"""
+    files = build_static_data(monsters_data)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    return {name: write_static_file(os.path.join(output_dir, name), data) for name, data in files.items()}
+
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="GitHub Pages 版の静的データを作成")
+    parser.add_argument("--data", default=DATA_FILE, help=f"モンスターデータのファイル（デフォルト: {DATA_FILE}）")
+    parser.add_argument("--output", default=STATIC_DIR, help=f"出力先のディレクトリ（デフォルト: {STATIC_DIR}）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """メイン関数：静的データを作成して大きさを表示"""
+    args = parse_args(argv)
+    monsters_data = load_monster_data(args.data)
+    if not monsters_data:
+        print(f"モンスターデータが見つかりません: {args.data}")
+        return 1
+
+    sizes = write_static_data(monsters_data, args.output)
+    suffixes = ["json", "gz"] + (["br"] if HAS_BROTLI else [])
+    print(f"{len(monsters_data)}体のモンスターデータを{args.output}に書き出しました")
+    for name in ["index.json", "skills.json", "search.json"]:
+        print(f"  {name}: " + " / ".join(f"{suffix} {sizes[name][suffix]:,}" for suffix in suffixes))
+    shard_sizes = [size for name, size in sizes.items() if name.startswith("monsters/")]
+    print(f"  monsters/*.json ({len(shard_sizes)}ファイル): "
+          + " / ".join(f"{suffix} {sum(size[suffix] for size in shard_sizes):,}" for suffix in suffixes))
+    if not HAS_BROTLI:
+        print("  （brotli モジュールがないため .br は作成していません）")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
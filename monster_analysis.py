@@ -0,0 +1,178 @@
+"""
+DQMJ2 モンスターの耐性分析
+
+全モンスターの耐性を int8 の NumPy 配列（モンスター × 属性 × 耐性レベル）にまとめ、
+共通弱点などの分析を配列演算で行う。Streamlit には依存しない。
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from monster_dataset import RES_NORMAL, RES_NULL, RESISTANCE_LEVELS, build_resistance_table
+
+# 分析対象の属性
+ANALYSIS_ATTRIBUTES = ["メラ", "ギラ", "ヒャド", "バギ", "イオ", "デイン", "ドルマ", "ザキ", "マヒ", "眠り", "混乱", "毒", "マホトーン"]
+
+# 耐性の区分（表示順）
+CATEGORIES = ["弱点", "通常", "半減", "無効"]
+
+
+class ResistanceMatrix:
+    """耐性の配列
+
+    codes[モンスター, 属性, 耐性レベル] に耐性コードを持つ。
+    耐性情報のないモンスターは has_info が False になる。
+    """
+
+    def __init__(self, names: List[str], attributes: List[str], codes: np.ndarray, has_info: np.ndarray):
+        self.names = names
+        self.attributes = attributes
+        self.codes = codes
+        self.has_info = has_info
+        self.rows = {name: row for row, name in enumerate(names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def build_resistance_matrix(monsters_data: Dict[str, Any], attributes: List[str] = ANALYSIS_ATTRIBUTES,
+                            aliases: Optional[Dict[str, str]] = None) -> ResistanceMatrix:
+    """モンスターデータから耐性の配列を作成
+
+    aliases には 耐性表での属性名 → 配列での属性名 の読み替えを指定できる。
+    """
+    aliases = aliases or {}
+    names = list(monsters_data)
+    columns = {attr: column for column, attr in enumerate(attributes)}
+    codes = np.full((len(names), len(attributes), len(RESISTANCE_LEVELS)), RES_NORMAL, dtype=np.int8)
+    has_info = np.zeros(len(names), dtype=bool)
+
+    for row, data in enumerate(monsters_data.values()):
+        resistance = data.get("耐性")
+        if not resistance or not resistance.get("説明"):
+            continue
+        has_info[row] = True
+        table = resistance.get("表") or build_resistance_table(resistance["説明"])
+        for attr, levels in table.items():
+            column = columns.get(aliases.get(attr, attr))
+            if column is not None:
+                codes[row, column] = levels
+
+    return ResistanceMatrix(names, list(attributes), codes, has_info)
+
+
+def category_masks(codes: np.ndarray) -> Dict[str, np.ndarray]:
+    """耐性コードの配列を区分ごとの真偽値の配列に分ける（軽減は半減、吸収・反射は無効扱い）"""
+    return {
+        "弱点": codes < RES_NORMAL,
+        "通常": codes == RES_NORMAL,
+        "半減": (codes > RES_NORMAL) & (codes < RES_NULL),
+        "無効": codes >= RES_NULL,
+    }
+
+
+def category_labels(codes: np.ndarray) -> np.ndarray:
+    """耐性コードの配列を区分名の配列に変換"""
+    masks = category_masks(codes)
+    return np.select([masks[category] for category in CATEGORIES], CATEGORIES, default="通常")
+
+
+def select_codes(matrix: ResistanceMatrix, monster_names: List[str], resistance_levels: List[str]) -> np.ndarray:
+    """選択したモンスターの、それぞれの耐性レベルでの耐性コード（モンスター × 属性）を取り出す"""
+    rows = [matrix.rows[name] for name in monster_names]
+    levels = [RESISTANCE_LEVELS.index(level) for level in resistance_levels]
+    return matrix.codes[rows, :, levels]
+
+
+def analyze_single_monster(monster_name: str, resistance_level: str,
+                           matrix: ResistanceMatrix) -> Dict[str, List[str]]:
+    """1体のモンスターについて、区分 → 属性のリスト を求める"""
+    codes = select_codes(matrix, [monster_name], [resistance_level])[0]
+    masks = category_masks(codes)
+    return {
+        category: [matrix.attributes[column] for column in np.flatnonzero(mask)]
+        for category, mask in masks.items()
+    }
+
+
+def category_counts(matrix: ResistanceMatrix, resistance_level: str) -> Dict[str, Dict[str, int]]:
+    """全モンスターについて、属性 → 区分ごとの体数 を集計（耐性情報のないモンスターは除く）"""
+    codes = matrix.codes[matrix.has_info, :, RESISTANCE_LEVELS.index(resistance_level)]
+    counts = {category: mask.sum(axis=0) for category, mask in category_masks(codes).items()}
+    return {
+        attr: {category: int(counts[category][column]) for category in CATEGORIES}
+        for column, attr in enumerate(matrix.attributes)
+    }
+
+
+def analyze_common_weaknesses(selected_monsters: List[str], monsters_data: Dict[str, Any], resistance_levels: List[str],
+                              resistance_matrix: Optional[ResistanceMatrix] = None) -> Dict[str, List[str]]:
+    """選択されたモンスター全員に共通する弱点・効きやすい攻撃を分析（モンスターごとの耐性レベル対応）
+
+    選択できるモンスターの数に上限はない。耐性の配列が渡されない場合は選択されたモンスター分だけ作成する。
+    """
+    if len(selected_monsters) < 2:
+        return {"effective_attacks": [], "ineffective_attacks": [], "explanation": []}
+
+    # 有効なモンスターのみフィルタ
+    valid_monsters = []
+    valid_levels = []
+    for i, monster in enumerate(selected_monsters):
+        if monster and monster in monsters_data:
+            valid_monsters.append(monster)
+            valid_levels.append(resistance_levels[i] if i < len(resistance_levels) else "通常")
+
+    if len(valid_monsters) < 2:
+        return {"effective_attacks": [], "ineffective_attacks": [], "explanation": []}
+
+    if resistance_matrix is None:
+        resistance_matrix = build_resistance_matrix({name: monsters_data[name] for name in valid_monsters})
+
+    # 選択されたモンスター × 属性 の区分を一括で求める
+    codes = select_codes(resistance_matrix, valid_monsters, valid_levels)
+    has_info = resistance_matrix.has_info[[resistance_matrix.rows[name] for name in valid_monsters]]
+    masks = {category: mask & has_info[:, None] for category, mask in category_masks(codes).items()}
+    labels = np.where(has_info[:, None], category_labels(codes), "情報なし").T.tolist()
+
+    effective_for_all = (~(masks["半減"] | masks["無効"]).any(axis=0)).tolist()
+    weak_counts = masks["弱点"].sum(axis=0).tolist()
+    half_counts = masks["半減"].sum(axis=0).tolist()
+    null_counts = masks["無効"].sum(axis=0).tolist()
+    monster_labels = [f"{name}({level})" for name, level in zip(valid_monsters, valid_levels)]
+
+    effective_attacks = []
+    ineffective_attacks = []
+    resistance_summary = {}
+
+    for column, attr in enumerate(resistance_matrix.attributes):
+        # 効果的な攻撃の判定
+        if effective_for_all[column]:
+            if weak_counts[column] > 0:
+                effective_attacks.append(f"🔥 {attr} (弱点×{weak_counts[column]})")
+            else:
+                effective_attacks.append(f"⚡ {attr}")
+
+        # 非効果的な攻撃の判定
+        if null_counts[column] > 0:
+            if null_counts[column] == len(valid_monsters):
+                ineffective_attacks.append(f"❌ {attr} (全員無効)")
+            else:
+                ineffective_attacks.append(f"� {attr} (無効×{null_counts[column]})")
+        elif half_counts[column] > 0:
+            if half_counts[column] == len(valid_monsters):
+                ineffective_attacks.append(f"🔽 {attr} (全員半減)")
+            else:
+                ineffective_attacks.append(f"📉 {attr} (半減×{half_counts[column]})")
+
+        resistance_summary[attr] = [
+            f"{monster}:{label}" for monster, label in zip(monster_labels, labels[column])
+        ]
+
+    return {
+        "effective_attacks": effective_attacks,
+        "ineffective_attacks": ineffective_attacks,
+        "resistance_summary": resistance_summary,
+        "valid_monsters": valid_monsters,
+        "resistance_levels": valid_levels
+    }
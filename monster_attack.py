@@ -0,0 +1,200 @@
+"""
+DQMJ2 敵パーティーに有効な攻撃手段の検索
+
+特技の効果文から属性を割り出した 特技 → 属性 の索引を一度だけ作り、
+敵パーティーの耐性と組み合わせて、全特技・スキル・モンスターの有効度を配列演算でまとめて求める。
+Streamlit には依存しない。
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from monster_analysis import ResistanceMatrix, build_resistance_matrix, select_codes
+from monster_dataset import RES_WEAK
+
+# 特技の属性（耐性表の属性名に合わせる）
+ATTACK_ATTRIBUTES = [
+    "メラ", "ギラ", "ヒャド", "バギ", "イオ", "デイン", "ドルマ", "ベタン", "炎ブレス", "吹雪ブレス",
+    "ザキ", "マヒ", "眠り", "混乱", "毒", "休み", "マインド", "マヌーサ", "マホトラ", "ハック",
+    "ルカニ", "ダウン", "ボミエ", "フール", "マホトーン", "体技封じ", "息封じ", "斬撃封じ", "踊り封じ", "踊り",
+]
+
+# 攻撃の手段を表す属性（これに耐性があると、他の属性に関係なく効きにくくなる）
+DELIVERY_ATTRIBUTES = ["踊り"]
+
+# 耐性表で別名になっている属性
+ATTRIBUTE_ALIASES = {"吹雪": "吹雪ブレス"}
+
+# 効果文の言い回し → 属性（属性名そのものは効果文から直接拾う）
+EFFECT_PHRASES = [
+    ("炎の息", "炎ブレス"), ("炎を吐", "炎ブレス"), ("火炎", "炎ブレス"), ("小さな炎", "炎ブレス"), ("灼熱", "炎ブレス"),
+    ("吹雪を吐", "吹雪ブレス"), ("冷たい息", "吹雪ブレス"), ("輝く息", "吹雪ブレス"),
+    ("息の根を止め", "ザキ"),
+    ("眠", "眠り"), ("麻痺", "マヒ"), ("幻", "マヌーサ"), ("MPをうばい", "マホトラ"),
+    ("素早さを", "ボミエ"), ("すばやさを", "ボミエ"), ("守備力を", "ルカニ"), ("攻撃力を", "ダウン"),
+    ("賢さを", "フール"), ("かしこさを", "フール"),
+    ("呪文を封じ", "マホトーン"), ("息の攻撃を封じ", "息封じ"), ("斬撃を封じ", "斬撃封じ"), ("体技を封じ", "体技封じ"),
+    ("踊りを封じ", "踊り封じ"), ("踊りによる攻撃を封じ", "踊り封じ"), ("踊らせ", "踊り"),
+]
+
+# 耐性コードごとの効き目（弱点, 通常, 軽減, 半減, 無効, 吸収, 反射 の順。ダメージ倍率の目安）
+EFFECTIVENESS = np.array([1.5, 1.0, 0.75, 0.5, 0.0, -0.5, -0.5])
+
+
+def technique_attributes(effect: str) -> List[str]:
+    """特技の効果文から属性を割り出す（敵に向けた特技でなければ空のリスト）"""
+    # 「※ バイキルト、ダウン無効」のような注記は属性ではない
+    effect = effect.split("※")[0]
+    if "耐性を" in effect or "跳ね返" in effect or ("敵" not in effect and "斬撃" not in effect):
+        return []
+
+    attributes = []
+    for phrase, attr in EFFECT_PHRASES:
+        if phrase in effect and attr not in attributes:
+            attributes.append(attr)
+            effect = effect.replace(phrase, "")
+    # 長い属性名から拾う（吹雪ブレス → 吹雪、踊り封じ → 踊り の誤検出を防ぐ）
+    for attr in sorted(ATTACK_ATTRIBUTES, key=len, reverse=True):
+        if attr in effect:
+            if attr not in attributes:
+                attributes.append(attr)
+            effect = effect.replace(attr, "")
+    return [attr for attr in ATTACK_ATTRIBUTES if attr in attributes]
+
+
+def _skill_key(skill: Dict[str, Any]) -> tuple:
+    """スキルの内容（同名でも特技の並びが違うスキルがあるため、内容ごとに1件とする）"""
+    return skill["スキル名"], tuple((t["技名"], t["SP"], t["効果"]) for t in skill["特技"])
+
+
+class AttackIndex:
+    """特技 → 属性 と スキル → 特技、モンスター → スキル の索引
+
+    スキルは内容ごと、特技は 技名 と効果文から割り出した属性 の組ごとに1件とする
+    （同名のスキル・特技が複数並ぶことがある）。
+    """
+
+    def __init__(self, monsters_data: Dict[str, Any]):
+        self.techniques = []
+        self.effects = []
+        self.technique_attributes = []
+        self.skills = []
+        technique_rows = {}
+        skill_rows = {}
+        skill_members = []
+        effect_attributes = {}
+
+        for data in monsters_data.values():
+            for skill in data.get("スキル", []):
+                key = _skill_key(skill)
+                if key in skill_rows:
+                    continue
+                skill_rows[key] = len(self.skills)
+                self.skills.append(skill["スキル名"])
+                members = []
+                for technique in skill["特技"]:
+                    effect = technique["効果"]
+                    if effect not in effect_attributes:
+                        effect_attributes[effect] = technique_attributes(effect)
+                    technique_key = (technique["技名"], tuple(effect_attributes[effect]))
+                    if technique_key not in technique_rows:
+                        technique_rows[technique_key] = len(self.techniques)
+                        self.techniques.append(technique["技名"])
+                        self.effects.append(effect)
+                        self.technique_attributes.append(effect_attributes[effect])
+                    members.append(technique_rows[technique_key])
+                skill_members.append(members)
+
+        self.attributes = list(ATTACK_ATTRIBUTES)
+        columns = {attr: column for column, attr in enumerate(self.attributes)}
+        self.elements = np.zeros((len(self.techniques), len(self.attributes)), dtype=bool)
+        self.delivery = np.zeros((len(self.techniques), len(self.attributes)), dtype=bool)
+        for row, attributes in enumerate(self.technique_attributes):
+            for attr in attributes:
+                target = self.delivery if attr in DELIVERY_ATTRIBUTES else self.elements
+                target[row, columns[attr]] = True
+        self.has_attribute = (self.elements | self.delivery).any(axis=1)
+
+        self.skill_techniques = np.zeros((len(self.skills), len(self.techniques)), dtype=bool)
+        for row, members in enumerate(skill_members):
+            self.skill_techniques[row, members] = True
+        self.technique_skills = [
+            list(dict.fromkeys(self.skills[row] for row in np.flatnonzero(self.skill_techniques[:, column])))
+            for column in range(len(self.techniques))
+        ]
+
+        self.monsters = list(monsters_data)
+        self.monster_skills = np.zeros((len(self.monsters), len(self.skills)), dtype=bool)
+        for row, data in enumerate(monsters_data.values()):
+            for skill in data.get("スキル", []):
+                self.monster_skills[row, skill_rows[_skill_key(skill)]] = True
+
+
+def build_attack_index(monsters_data: Dict[str, Any]) -> AttackIndex:
+    """モンスターデータから 特技 → 属性 の索引を作成"""
+    return AttackIndex(monsters_data)
+
+
+def build_attack_matrix(monsters_data: Dict[str, Any]) -> ResistanceMatrix:
+    """特技の属性すべてについての耐性の配列を作成"""
+    return build_resistance_matrix(monsters_data, ATTACK_ATTRIBUTES, ATTRIBUTE_ALIASES)
+
+
+def technique_effectiveness(index: AttackIndex, matrix: ResistanceMatrix,
+                            party: List[str], resistance_levels: List[str]) -> np.ndarray:
+    """全特技の、敵パーティー各員に対する効き目（特技 × 敵）を求める
+
+    複数の属性を持つ特技は相手の耐性が低い方の属性で効き目を決め、
+    踊りのような攻撃手段の属性に耐性があればそちらで頭打ちにする。
+    """
+    codes = select_codes(matrix, party, resistance_levels)
+    effectiveness = EFFECTIVENESS[codes.astype(np.intp) - RES_WEAK]
+
+    element = np.where(index.elements[:, None, :], effectiveness[None, :, :], -np.inf).max(axis=2)
+    element = np.where(index.elements.any(axis=1)[:, None], element, 1.0)
+    delivery = np.where(index.delivery[:, None, :], effectiveness[None, :, :], np.inf).min(axis=2)
+    return np.minimum(element, delivery)
+
+
+def _rank(names: List[str], scores: np.ndarray, candidates: np.ndarray, top: Optional[int],
+          details: Optional[Callable[[int], Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """効き目（候補 × 敵）を平均の高い順・最低値の高い順に並べる（details は行番号 → 追加の項目）"""
+    rows = np.flatnonzero(candidates)
+    mean = scores[rows].mean(axis=1)
+    worst = scores[rows].min(axis=1)
+    covered = (scores[rows] >= 1.0).sum(axis=1)
+    order = np.lexsort((-worst, -mean))
+    if top is not None:
+        order = order[:top]
+    return [
+        {
+            "名前": names[rows[i]],
+            "平均": round(float(mean[i]), 3),
+            "最低": round(float(worst[i]), 3),
+            "等倍以上": int(covered[i]),
+            "敵ごと": [round(float(score), 3) for score in scores[rows[i]]],
+            **(details(rows[i]) if details else {}),
+        }
+        for i in order
+    ]
+
+
+def rank_attacks(index: AttackIndex, matrix: ResistanceMatrix, party: List[str], resistance_levels: List[str],
+                 top: Optional[int] = 20) -> Dict[str, List[Dict[str, Any]]]:
+    """敵パーティーに対する特技・スキル・モンスターのおすすめ順を求める
+
+    スキルはその中で一番効く特技、モンスターは覚えるスキルの中で一番効くスキルで評価する。
+    属性を持たない特技は耐性に左右されないため順位付けの対象外。
+    """
+    techniques = technique_effectiveness(index, matrix, party, resistance_levels)
+    techniques = np.where(index.has_attribute[:, None], techniques, -np.inf)
+    skills = np.where(index.skill_techniques[:, :, None], techniques[None, :, :], -np.inf).max(axis=1)
+    monsters = np.where(index.monster_skills[:, :, None], skills[None, :, :], -np.inf).max(axis=1)
+
+    return {
+        "特技": _rank(index.techniques, techniques, index.has_attribute, top,
+                    lambda row: {"属性": index.technique_attributes[row], "スキル": index.technique_skills[row]}),
+        "スキル": _rank(index.skills, skills, np.isfinite(skills).all(axis=1), top),
+        "モンスター": _rank(index.monsters, monsters, np.isfinite(monsters).all(axis=1), top),
+    }
@@ -0,0 +1,409 @@
+"""
+DQMJ2 モンスターデータの読み込み
+
+dqmj2_monsters.json を読むだけのツールが、スクレイピング用のライブラリ
+（requests / BeautifulSoup）を読み込まずに済むよう scraper.py から分離したモジュール
+"""
+
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# データファイルのパス
+DATA_FILE = "dqmj2_monsters.json"
+# スキル一覧を分離した形式のバージョン（normalize_monster_data を参照）
+DATASET_VERSION = 2
+
+# バイナリスナップショット（monster_snapshot.py）のパスと先頭のマジックバイト列
+SNAPSHOT_FILE = "dqmj2_monsters.bin"
+SNAPSHOT_MAGIC = b"DQMJ2SNP"
+# SQLite データベース（monster_store.py）のパスと先頭のマジックバイト列
+STORE_FILE = "dqmj2_monsters.db"
+STORE_MAGIC = b"SQLite format 3\0"
+
+# 耐性の強さを表す整数コード（値が大きいほど攻撃が効きにくい）
+RES_WEAK = -1     # 弱点
+RES_NORMAL = 0    # 通常
+RES_REDUCE = 1    # 軽減
+RES_HALF = 2      # 半減
+RES_NULL = 3      # 無効
+RES_ABSORB = 4    # 吸収
+RES_REFLECT = 5   # 反射
+
+# 耐性レベル（耐性表の各要素の並び順）
+RESISTANCE_LEVELS = ["通常", "強", "最強"]
+
+# 耐性の説明文1行の形式（例: "マホトラ・踊り封じを半減（強の場合）"）
+_RESISTANCE_LINE = re.compile(
+    r"^(?P<attrs>.*?)[にをが]?(?P<kind>弱い|よわい|半減|半額|軽減|無効|吸収|反射)(?P<tier>（強の場合）|（最強の場合）)?$")
+_RESISTANCE_KINDS = {
+    "弱い": RES_WEAK,
+    "よわい": RES_WEAK,
+    "半減": RES_HALF,
+    "半額": RES_HALF,
+    "軽減": RES_REDUCE,
+    "無効": RES_NULL,
+    "吸収": RES_ABSORB,
+    "反射": RES_REFLECT,
+}
+_RESISTANCE_TIERS = {"（強の場合）": 1, "（最強の場合）": 2}
+
+
+def build_resistance_table(resistance_text: str) -> Dict[str, List[int]]:
+    """耐性の説明文から 属性 → [通常, 強, 最強] の耐性コード の表を作成
+
+    （強の場合）の行は強・最強に、（最強の場合）の行は最強にだけ適用する。
+    同じレベルに複数の行が当てはまる場合は効きにくい方を採用する。
+    """
+    table = {}
+    for line in resistance_text.split("\n"):
+        match = _RESISTANCE_LINE.match(line.strip())
+        if not match:
+            continue
+        code = _RESISTANCE_KINDS[match.group("kind")]
+        tier = _RESISTANCE_TIERS.get(match.group("tier"), 0)
+        for attr in re.split(r"[・。]", match.group("attrs")):
+            attr = attr.strip()
+            if not attr:
+                continue
+            levels = table.setdefault(attr, [None, None, None])
+            for level in range(tier, len(RESISTANCE_LEVELS)):
+                levels[level] = code if levels[level] is None else max(levels[level], code)
+    return {attr: [RES_NORMAL if code is None else code for code in levels]
+            for attr, levels in table.items()}
+
+
+def resistance_category(code: int) -> str:
+    """耐性コードを 弱点 / 通常 / 半減 / 無効 の区分に変換（軽減は半減、吸収・反射は無効扱い）"""
+    if code < RES_NORMAL:
+        return "弱点"
+    if code == RES_NORMAL:
+        return "通常"
+    if code < RES_NULL:
+        return "半減"
+    return "無効"
+
+
+def resistance_tags(table: Dict[str, List[int]]) -> Dict[str, List[Tuple[str, int]]]:
+    """耐性表を表示用に 区分 → [(属性, その区分になるレベルの番号)] にまとめる
+
+    レベルの番号は 0 が通常、1 が強、2 が最強。
+    """
+    tags = {"弱点": [], "半減": [], "無効": []}
+    for attr, levels in table.items():
+        previous = "通常"
+        for level, code in enumerate(levels):
+            category = resistance_category(code)
+            if category != previous and category != "通常":
+                tags[category].append((attr, level))
+            previous = category
+    return tags
+
+
+def parse_resistance_info(resistance_text: str) -> Dict[str, List[str]]:
+    """耐性情報を解析（強の場合は◆、最強の場合は◆◆を属性名の前に付ける）"""
+    table = build_resistance_table(resistance_text)
+    return {
+        category: [f"{'◆' * level}{attr}" for attr, level in tags]
+        for category, tags in resistance_tags(table).items()
+    }
+
+
+def ensure_resistance_table(monster: dict) -> dict:
+    """耐性表を持たない（旧形式の）モンスターデータに耐性表を追加する"""
+    resistance = monster.get("耐性")
+    if resistance and resistance.get("説明") and "表" not in resistance:
+        resistance["表"] = build_resistance_table(resistance["説明"])
+    return monster
+
+
+def parse_member(entry: str, level: Optional[str] = None) -> Tuple[str, str]:
+    """「スライム:強」形式の指定を (モンスター名, 耐性レベル) に変換"""
+    name, separator, suffix = entry.strip().rpartition(":")
+    if separator and suffix in RESISTANCE_LEVELS:
+        return name, suffix
+    return entry.strip(), level or "通常"
+
+
+def build_skill_catalog(monsters_data: dict) -> Tuple[List[dict], Dict[str, List[int]]]:
+    """同じ内容のスキルを1件にまとめたスキル一覧と、モンスター名 → スキル番号のリスト を作成
+
+    同名でも特技の並びが違うスキルがあるため、スキル名ではなく内容で同一かを判定する。
+    """
+    catalog = []
+    ids = {}
+    monster_skills = {}
+    for name, monster in monsters_data.items():
+        monster_skills[name] = _add_skills(monster, catalog, ids)
+    return catalog, monster_skills
+
+
+def _add_skills(monster: dict, catalog: List[dict], ids: Dict[str, int]) -> List[int]:
+    """モンスターのスキルをスキル一覧に追加し、スキル番号のリストを返す（ids は スキルの内容 → 番号）"""
+    skill_ids = []
+    for skill in monster.get("スキル", []):
+        key = json.dumps(skill, ensure_ascii=False, sort_keys=True)
+        if key not in ids:
+            ids[key] = len(catalog)
+            catalog.append(skill)
+        skill_ids.append(ids[key])
+    return skill_ids
+
+
+def skill_variants(monsters_data: dict) -> Dict[str, int]:
+    """同じスキル名で内容（特技の並び）が異なるスキルの スキル名 → 種類数"""
+    catalog, _ = build_skill_catalog(monsters_data)
+    return catalog_variants(catalog)
+
+
+def catalog_variants(catalog: List[dict]) -> Dict[str, int]:
+    """スキル一覧のうち、同じスキル名で内容が異なるスキルの スキル名 → 種類数"""
+    counts = {}
+    for skill in catalog:
+        counts[skill["スキル名"]] = counts.get(skill["スキル名"], 0) + 1
+    return {name: count for name, count in counts.items() if count > 1}
+
+
+def normalize_monster_data(monsters_data: dict) -> dict:
+    """モンスターデータを、スキル一覧を一度だけ持ちモンスターはスキル番号で参照する形式に変換
+
+        {"version": 2, "skills": [スキル, ...], "monsters": {モンスター名: {..., "スキル": [スキル番号, ...]}}}
+    """
+    catalog, monster_skills = build_skill_catalog(monsters_data)
+    return {
+        "version": DATASET_VERSION,
+        "skills": catalog,
+        "monsters": {name: {**monster, "スキル": monster_skills[name]} for name, monster in monsters_data.items()},
+    }
+
+
+def _indented_json(value, depth: int) -> str:
+    """json.dump(..., indent=4) で depth 段目に置いたときと同じ書式のJSON"""
+    return json.dumps(value, ensure_ascii=False, indent=4).replace("\n", "\n" + "    " * depth)
+
+
+def write_monster_data(iter_monsters: Callable[[], Iterable[Tuple[str, dict]]], data_file: str = DATA_FILE,
+                       legacy_format: bool = False) -> Tuple[int, List[dict]]:
+    """モンスターデータを1体ずつJSONファイルに書き出し、(モンスター数, スキル一覧) を返す
+
+    iter_monsters は呼ぶたびに (モンスター名, データ) を先頭から返す関数。スキル一覧を分離した形式では
+    1回目でスキル一覧だけを作り、2回目でモンスターを書き出すため、全モンスターを同時にメモリに持たない。
+    内容は normalize_monster_data（legacy_format なら元のデータ）を json.dump(..., indent=4) したものと同じ。
+    一時ファイルに書き終えてから置き換えるため、読み込み側が書き込み途中のファイルを見ることはない。
+    """
+    catalog = []
+    ids = {}
+    if not legacy_format:
+        for _, monster in iter_monsters():
+            _add_skills(monster, catalog, ids)
+
+    depth = 1 if legacy_format else 2
+    count = 0
+    tmp_file = data_file + ".tmp"
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            if legacy_format:
+                f.write("{")
+            else:
+                f.write(f'{{\n    "version": {DATASET_VERSION},\n    "skills": {_indented_json(catalog, 1)},\n    "monsters": {{')
+            for name, monster in iter_monsters():
+                if not legacy_format:
+                    skill_ids = _add_skills(monster, catalog, ids)
+                    # 番号から引き直したスキルが元のスキルと一致することを確かめてから書き出す
+                    if [catalog[i] for i in skill_ids] != monster.get("スキル", []):
+                        raise ValueError(f"スキル一覧の作成に失敗しました: {name}")
+                    monster = {**monster, "スキル": skill_ids}
+                f.write(("," if count else "") + "\n" + "    " * depth
+                        + f"{json.dumps(name, ensure_ascii=False)}: {_indented_json(monster, depth)}")
+                count += 1
+            closing = "}"
+            if count:
+                closing = "\n" + "    " * (depth - 1) + closing
+            f.write(closing if legacy_format else closing + "\n}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, data_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return count, catalog
+
+
+def is_normalized_data(data: dict) -> bool:
+    """normalize_monster_data の形式か（旧形式はモンスター名がそのままキー）"""
+    return data.get("version") == DATASET_VERSION and "skills" in data and "monsters" in data
+
+
+def rehydrate_monster_data(data: dict) -> dict:
+    """normalize_monster_data の形式を旧形式（各モンスターがスキルの内容を持つ）に戻す
+
+    同じスキルは全モンスターで同じ辞書を共有する。
+    """
+    catalog = data["skills"]
+    return {name: {**monster, "スキル": [catalog[skill_id] for skill_id in monster.get("スキル", [])]}
+            for name, monster in data["monsters"].items()}
+
+
+class _JsonMemberReader:
+    """JSONファイルのオブジェクトをメンバーごとに先頭から読む（ファイル全体は読み込まない）
+
+    members() がキーを返すたびに、呼び出し側は value() か members() でその値を読むこと。
+    """
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, f):
+        self._file = f
+        self._buffer = ""
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """読み終えた部分を捨てて読み足す（ファイルの終わりなら False）
+
+        読みかけの値が大きくても読み直しの回数が増えないよう、読みかけの部分と同じ長さずつ読み足す。
+        """
+        chunk = self._file.read(max(self.CHUNK_SIZE, len(self._buffer) - self._pos))
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _next_char(self) -> str:
+        """空白を飛ばした次の1文字（読み進めない。ファイルの終わりなら空文字列）"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def _expect(self, char: str):
+        if self._next_char() != char:
+            raise ValueError(f"JSONの {self._pos} 文字目付近に {char!r} がありません")
+        self._pos += 1
+
+    def value(self):
+        """次の値を1つ読む"""
+        self._next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            # 数値はチャンクの終わりで途切れているかもしれない
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """次のオブジェクトのキーを順に返す"""
+        self._expect("{")
+        if self._next_char() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("JSONオブジェクトのキーが文字列ではありません")
+            self._expect(":")
+            yield key
+            separator = self._next_char()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"JSONの {self._pos} 文字目付近に ',' がありません")
+
+
+def iter_monster_records(data_file: str = DATA_FILE) -> Iterator[Tuple[str, dict]]:
+    """モンスターデータを (モンスター名, データ) の順に1体ずつ読み出す（ファイルがなければ何も返さない）
+
+    データは load_monster_data と同じ形（スキルの内容と耐性表を持つ）。JSONファイルは先頭から
+    少しずつ読み、全モンスターを同時にメモリに持たない。壊れたJSONファイルでは ValueError になる。
+    """
+    try:
+        with open(data_file, "rb") as f:
+            magic = f.read(len(STORE_MAGIC))
+    except FileNotFoundError:
+        return
+    if magic.startswith(SNAPSHOT_MAGIC) or magic == STORE_MAGIC:
+        # スナップショット・データベースはもともと1体ずつ展開する
+        yield from load_monster_data(data_file).items()
+        return
+
+    with open(data_file, "r", encoding="utf-8") as f:
+        reader = _JsonMemberReader(f)
+        keys = reader.members()
+        key = next(keys, None)
+        if key is None:
+            return
+        value = reader.value()
+        if key != "version" or value != DATASET_VERSION:
+            # 旧形式（モンスター名がそのままキー）
+            yield key, ensure_resistance_table(value)
+            for name in keys:
+                yield name, ensure_resistance_table(reader.value())
+            return
+
+        catalog = None
+        for key in keys:
+            if key == "skills":
+                catalog = reader.value()
+            elif key == "monsters" and catalog is not None:
+                for name in reader.members():
+                    monster = reader.value()
+                    monster = {**monster, "スキル": [catalog[skill_id] for skill_id in monster.get("スキル", [])]}
+                    yield name, ensure_resistance_table(monster)
+            else:
+                reader.value()
+
+
+def preferred_data_file(data_file: str = DATA_FILE, snapshot_file: str = SNAPSHOT_FILE) -> str:
+    """読み込むデータファイルを選ぶ（JSONファイルより古くないスナップショットがあればそちら）"""
+    try:
+        snapshot_mtime = os.path.getmtime(snapshot_file)
+    except OSError:
+        return data_file
+    try:
+        if os.path.getmtime(data_file) > snapshot_mtime:
+            return data_file
+    except OSError:
+        pass
+    return snapshot_file
+
+
+def load_monster_data(data_file: str = DATA_FILE) -> dict:
+    """モンスターデータを読み込む（存在しない・壊れている場合は空の辞書）
+
+    スキル一覧を分離した形式のファイルは、各モンスターがスキルの内容を持つ旧形式に戻す。
+    耐性表のない旧形式のファイルは、読み込み時に耐性表を補う。
+    バイナリスナップショットを指定した場合は、メモリマップした
+    monster_snapshot.MonsterSnapshot（読み取り専用の辞書として使える）を、
+    SQLite データベースを指定した場合は monster_store.MonsterStore を返す。
+    """
+    try:
+        with open(data_file, "rb") as f:
+            magic = f.read(len(STORE_MAGIC))
+        if magic.startswith(SNAPSHOT_MAGIC):
+            from monster_snapshot import open_snapshot
+            return open_snapshot(data_file)
+        if magic == STORE_MAGIC:
+            from monster_store import open_store
+            return open_store(data_file)
+        with open(data_file, "r", encoding="utf-8") as f:
+            monsters = json.load(f)
+        if is_normalized_data(monsters):
+            monsters = rehydrate_monster_data(monsters)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        # JSONとして壊れている、または対応していないスナップショット
+        return {}
+    for monster in monsters.values():
+        ensure_resistance_table(monster)
+    return monsters
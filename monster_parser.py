@@ -0,0 +1,469 @@
+"""
+DQMJ2 モンスター詳細ページの解析
+
+BeautifulSoup (html.parser) による基準実装と、同じ結果を返す lxml による高速実装を持つ。
+"""
+
+import importlib.util
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from monster_dataset import build_resistance_table
+
+# 系統ごとのモンスター名セレクタ
+SYSTEM_SELECTORS = {
+    '自然系': 'h2.sizen',
+    '魔獣系': 'h2.majyuu',
+    '物質系': 'h2.bussitu',
+    '悪魔系': 'h2.akuma',
+    'ドラゴン系': 'h2.doragon',
+    'スライム系': 'h2.suraimu',
+    'ゾンビ系': 'h2.zonbi',
+    '？？？系': 'h2.akuma',  # ？？？系は悪魔系と同じセレクタ
+    '特殊系（魔王）': 'h2.majyuu',  # 魔王系は魔獣系と同じセレクタ
+    '特殊系（神獣）': 'h2.kami'
+}
+
+# 期待されるセレクタで見つからない場合に試すセレクタ
+NAME_SELECTORS = ['h2.sizen', 'h2.majyuu', 'h2.bussitu', 'h2.akuma',
+                  'h2.doragon', 'h2.suraimu', 'h2.zonbi', 'h2.kami']
+
+# lxml と html.parser で木構造が変わりうる要素（開始タグと終了タグの数を確認する）
+_BALANCE_CHECK_PATTERN = re.compile(rb'<(/?)(table|tr|td|th|span|h2)[\s>/]')
+
+# lxml は改行コード CR を LF に変換するため、解析中は私用領域の文字に退避する
+_CR_PLACEHOLDER = "\ue000"
+
+# テーブルの種類
+TRAITS_TABLE = "特性・耐性"
+SKILLS_TABLE = "スキル"
+
+
+@dataclass
+class ParsedTechnique:
+    """スキルで覚える特技（解析結果。読み込み側の monster_records.Technique とは別）"""
+    name: str
+    sp: str
+    effect: str
+
+
+@dataclass
+class ParsedSkill:
+    """スキルと、そのスキルで覚える特技の一覧（解析結果。読み込み側の monster_records.Skill とは別）"""
+    name: str
+    techniques: List[ParsedTechnique] = field(default_factory=list)
+
+
+@dataclass
+class MonsterRecord:
+    """詳細ページ1件分の解析結果"""
+    name: str
+    system: str
+    traits: List[str] = field(default_factory=list)
+    resistance: Optional[str] = None
+    skills: List[ParsedSkill] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        """dqmj2_monsters.json のモンスター1体分の形式に変換"""
+        return {
+            "系統": self.system,
+            "特性": list(self.traits),
+            "耐性": {
+                "説明": self.resistance,
+                "表": build_resistance_table(self.resistance)
+            } if self.resistance else {},
+            "スキル": [
+                {
+                    "スキル名": skill.name,
+                    "特技": [
+                        {"技名": t.name, "SP": t.sp, "効果": t.effect}
+                        for t in skill.techniques
+                    ]
+                }
+                for skill in self.skills
+            ]
+        }
+
+
+def parse_with_html_parser(content: bytes, system_name: str, monster_url: str = ""):
+    """BeautifulSoup (html.parser) による解析（基準となる実装）"""
+    from bs4 import BeautifulSoup
+
+    monster_soup = BeautifulSoup(content, 'html.parser')
+
+    # モンスター名（動的セレクタ選択）
+    name_element = None
+    name = None
+
+    # まず期待される系統のセレクタを試す
+    selector = SYSTEM_SELECTORS.get(system_name, 'h2')
+    name_element = monster_soup.select_one(selector)
+
+    # 期待されるセレクタで見つからない場合、全ての系統セレクタを試す
+    if not name_element:
+        for alt_selector in NAME_SELECTORS:
+            name_element = monster_soup.select_one(alt_selector)
+            if name_element:
+                break
+
+    # それでも見つからない場合は一般的なh2タグを使用
+    if not name_element:
+        h2_elements = monster_soup.find_all('h2')
+        # モンスター名らしいh2を探す（最初の文字列h2を使用）
+        for h2 in h2_elements:
+            text = h2.text.strip()
+            if text and len(text) < 50:  # 長すぎるテキストは除外
+                name_element = h2
+                break
+
+    if not name_element:
+        print(f"    警告: モンスター名が見つかりません ({system_name}): {monster_url}")
+        return None  # モンスター名が見つからない場合はスキップ
+    name = name_element.text.strip()
+
+    # 特性・耐性・スキル情報を初期化
+    tokusei = []
+    taisei = {}
+    skills = []
+
+
+    # 全てのテーブルから特性・耐性情報を探す
+    tables = monster_soup.find_all('table')
+    for table in tables:
+        text = table.get_text()
+        # 特性と耐性の情報が含まれているテーブルを探す
+        if '特性' in text and '耐性' in text:
+            # テーブルの行を処理
+            rows = table.find_all('tr')
+            for row in rows:
+                cells = row.find_all(['td', 'th'])
+                if len(cells) >= 3:
+                    # 1列目が特性、2列目が耐性、3列目が出現場所
+                    tokusei_cell = cells[0]
+                    taisei_cell = cells[1]
+
+                    # 特性の処理
+                    tokusei_text = tokusei_cell.get_text().strip()
+                    if tokusei_text and tokusei_text != '特性':
+                        # 改行で分割して複数の特性を取得
+                        tokusei_list = [t.strip() for t in tokusei_text.split('\n') if t.strip()]
+                        tokusei.extend(tokusei_list)
+
+                    # 耐性の処理（色分け情報も含める）
+                    if taisei_cell and taisei_cell.get_text().strip() != '耐性':
+                        # HTMLを解析して色分け情報を処理
+                        taisei_lines = []
+
+                        # br タグで分割された各行を処理
+                        content = str(taisei_cell)
+                        lines = content.split('<br/>')
+
+                        for line in lines:
+                            # HTMLタグを含む行をBeautifulSoupで解析
+                            line_soup = BeautifulSoup(line, 'html.parser')
+
+                            # spanタグがある場合の処理
+                            purple_spans = line_soup.find_all('span', class_='c-purple2')
+                            red_spans = line_soup.find_all('span', class_='c-red2')
+
+                            if purple_spans:
+                                for span in purple_spans:
+                                    span_text = span.get_text().strip()
+                                    if span_text:
+                                        taisei_lines.append(f"{span_text}（強の場合）")
+                            elif red_spans:
+                                for span in red_spans:
+                                    span_text = span.get_text().strip()
+                                    if span_text:
+                                        taisei_lines.append(f"{span_text}（最強の場合）")
+                            else:
+                                # 通常のテキスト
+                                plain_text = line_soup.get_text().strip()
+                                if plain_text:
+                                    taisei_lines.append(plain_text)
+
+                        if taisei_lines:
+                            taisei['説明'] = '\n'.join(taisei_lines)
+            break
+
+    # スキル情報を取得
+    for table in tables:
+        text = table.get_text()
+        # スキルテーブルを特定（スキル名、特技、SPが含まれる）
+        if 'スキル' in text and '特技' in text and 'SP' in text:
+            rows = table.find_all('tr')
+            current_skill = None
+
+            for row in rows[1:]:  # ヘッダー行をスキップ
+                cells = row.find_all(['td', 'th'])
+                if len(cells) >= 5:
+                    skill_name_cell = cells[0].get_text().strip()
+                    technique_name = cells[2].get_text().strip()
+                    sp_value = cells[3].get_text().strip()
+                    effect = cells[4].get_text().strip()
+
+                    # 新しいスキルの開始
+                    if skill_name_cell:
+                        current_skill = {
+                            'スキル名': skill_name_cell,
+                            '特技': []
+                        }
+                        skills.append(current_skill)
+
+                    # 特技情報を追加
+                    if current_skill and technique_name:
+                        technique_info = {
+                            '技名': technique_name,
+                            'SP': sp_value,
+                            '効果': effect
+                        }
+                        current_skill['特技'].append(technique_info)
+            break
+
+    # モンスターデータに系統情報も追加
+    return MonsterRecord(
+        name=name,
+        system=system_name,
+        traits=tokusei,
+        resistance=taisei.get('説明'),
+        skills=[
+            ParsedSkill(skill['スキル名'], [ParsedTechnique(t['技名'], t['SP'], t['効果']) for t in skill['特技']])
+            for skill in skills
+        ]
+    )
+
+
+def _lxml_document(content):
+    """lxml で文書を解析（文字コードの判定は BeautifulSoup と同じ方法で行う）"""
+    import lxml.html
+    from bs4.dammit import UnicodeDammit
+
+    if isinstance(content, bytes):
+        content = UnicodeDammit(content, is_html=True).unicode_markup
+    content = content.replace("\r", _CR_PLACEHOLDER)
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    return lxml.html.document_fromstring(content.encode("utf-8"), parser=parser)
+
+
+def _text(element) -> str:
+    """要素のテキスト（BeautifulSoup の get_text() に相当）"""
+    return str(element.text_content()).replace(_CR_PLACEHOLDER, "\r")
+
+
+def _has_class(element, class_name: str) -> bool:
+    return class_name in (element.get("class") or "").split()
+
+
+def _select_h2(document, selector: str):
+    """'h2' または 'h2.クラス名' 形式のセレクタに一致する最初の要素"""
+    class_name = selector.partition(".")[2]
+    for h2 in document.iter("h2"):
+        if not class_name or _has_class(h2, class_name):
+            return h2
+    return None
+
+
+def _iter_cell_events(element):
+    """要素の内容を ('text', 文字列) / ('start', 要素) / ('end', 要素) / ('br',) の列として返す"""
+    if element.text:
+        yield ("text", element.text.replace(_CR_PLACEHOLDER, "\r"))
+    for child in element:
+        if isinstance(child.tag, str):  # コメント等は get_text() と同様に無視
+            if child.tag == "br":
+                yield ("br",)
+            else:
+                yield ("start", child)
+                yield from _iter_cell_events(child)
+                yield ("end", child)
+        if child.tail:
+            yield ("text", child.tail.replace(_CR_PLACEHOLDER, "\r"))
+
+
+def _taisei_lines(cell):
+    """耐性セルを <br/> ごとの行に分け、色分け情報付きの行一覧を返す
+
+    html.parser 実装がセルのHTML文字列を '<br/>' で分割して行ごとに再解析するのと
+    同じ結果になるよう、各行の中で開始した span だけを色分けの対象にする。
+    """
+    segments = [[]]
+    for event in _iter_cell_events(cell):
+        if event[0] == "br":
+            segments.append([])
+        else:
+            segments[-1].append(event)
+
+    taisei_lines = []
+    for segment in segments:
+        open_spans = []
+        purple_spans = []
+        red_spans = []
+        texts = []
+        for event in segment:
+            if event[0] == "text":
+                texts.append(event[1])
+                for _, buffer in open_spans:
+                    buffer.append(event[1])
+            elif event[1].tag == "span":
+                if event[0] == "start":
+                    buffer = []
+                    open_spans.append((event[1], buffer))
+                    if _has_class(event[1], "c-purple2"):
+                        purple_spans.append(buffer)
+                    if _has_class(event[1], "c-red2"):
+                        red_spans.append(buffer)
+                else:
+                    open_spans = [span for span in open_spans if span[0] is not event[1]]
+
+        if purple_spans:
+            for buffer in purple_spans:
+                span_text = "".join(buffer).strip()
+                if span_text:
+                    taisei_lines.append(f"{span_text}（強の場合）")
+        elif red_spans:
+            for buffer in red_spans:
+                span_text = "".join(buffer).strip()
+                if span_text:
+                    taisei_lines.append(f"{span_text}（最強の場合）")
+        else:
+            plain_text = "".join(texts).strip()
+            if plain_text:
+                taisei_lines.append(plain_text)
+    return taisei_lines
+
+
+def classify_table(table) -> List[str]:
+    """テーブルの種類（TRAITS_TABLE / SKILLS_TABLE）を判定する
+
+    基準実装と同じくテーブル全体のテキストで判定し、テキストの取得は1回だけ行う。
+    両方の条件を満たすテーブルは両方の種類を返す。
+    """
+    text = table.text_content()
+    kinds = []
+    if '特性' in text and '耐性' in text:
+        kinds.append(TRAITS_TABLE)
+    if 'スキル' in text and '特技' in text and 'SP' in text:
+        kinds.append(SKILLS_TABLE)
+    return kinds
+
+
+def find_tables(document) -> Dict[str, object]:
+    """文書を1回走査し、種類ごとに最初に見つかったテーブルを返す"""
+    found = {}
+    for table in document.iter("table"):
+        for kind in classify_table(table):
+            found.setdefault(kind, table)
+        if len(found) == 2:
+            break
+    return found
+
+
+def extract_traits_and_resistance(table):
+    """特性・耐性テーブルから (特性の一覧, 耐性の説明) を取り出す"""
+    traits = []
+    resistance = None
+    for row in table.iter("tr"):
+        cells = list(row.iter("td", "th"))
+        if len(cells) < 3:
+            continue
+        # 1列目が特性、2列目が耐性、3列目が出現場所
+        traits_text = _text(cells[0]).strip()
+        if traits_text and traits_text != '特性':
+            traits.extend(t.strip() for t in traits_text.split('\n') if t.strip())
+
+        if _text(cells[1]).strip() != '耐性':
+            taisei_lines = _taisei_lines(cells[1])
+            if taisei_lines:
+                resistance = '\n'.join(taisei_lines)
+    return traits, resistance
+
+
+def extract_skills(table) -> List[ParsedSkill]:
+    """スキルテーブルからスキルと特技の一覧を取り出す"""
+    skills = []
+    current_skill = None
+    rows = table.iter("tr")
+    next(rows, None)  # ヘッダー行をスキップ
+    for row in rows:
+        cells = list(row.iter("td", "th"))
+        if len(cells) < 5:
+            continue
+        skill_name = _text(cells[0]).strip()
+        technique_name = _text(cells[2]).strip()
+        if skill_name:
+            current_skill = ParsedSkill(skill_name)
+            skills.append(current_skill)
+        if current_skill and technique_name:
+            current_skill.techniques.append(
+                ParsedTechnique(technique_name, _text(cells[3]).strip(), _text(cells[4]).strip()))
+    return skills
+
+
+def find_monster_name(document, system_name: str) -> Optional[str]:
+    """モンスター名を探す（parse_with_html_parser と同じ順序でセレクタを試す）"""
+    name_element = _select_h2(document, SYSTEM_SELECTORS.get(system_name, 'h2'))
+    if name_element is None:
+        for alt_selector in NAME_SELECTORS:
+            name_element = _select_h2(document, alt_selector)
+            if name_element is not None:
+                break
+    if name_element is None:
+        for h2 in document.iter("h2"):
+            text = _text(h2).strip()
+            if text and len(text) < 50:
+                name_element = h2
+                break
+    return None if name_element is None else _text(name_element).strip()
+
+
+def parse_with_lxml(content: bytes, system_name: str, monster_url: str = ""):
+    """lxml による高速な解析（parse_with_html_parser と同じ結果を返す）"""
+    document = _lxml_document(content)
+
+    name = find_monster_name(document, system_name)
+    if name is None:
+        print(f"    警告: モンスター名が見つかりません ({system_name}): {monster_url}")
+        return None
+
+    record = MonsterRecord(name=name, system=system_name)
+    tables = find_tables(document)
+    if TRAITS_TABLE in tables:
+        record.traits, record.resistance = extract_traits_and_resistance(tables[TRAITS_TABLE])
+    if SKILLS_TABLE in tables:
+        record.skills = extract_skills(tables[SKILLS_TABLE])
+    return record
+
+
+def _is_balanced(content) -> bool:
+    """表・span・見出しの開始タグと終了タグの数が一致しているか
+
+    終了タグの省略などがあると lxml と html.parser で木構造が変わるため、
+    その場合は基準実装で解析する。
+    """
+    if not isinstance(content, bytes):
+        content = content.encode("utf-8")
+    counts = {}
+    for closing, tag in _BALANCE_CHECK_PATTERN.findall(content.lower()):
+        counts[tag] = counts.get(tag, 0) + (-1 if closing else 1)
+    return not any(counts.values())
+
+
+PARSER_BACKENDS = {
+    "html.parser": parse_with_html_parser,
+    "lxml": parse_with_lxml,
+}
+
+# lxml がインストールされていれば高速実装を使う
+DEFAULT_BACKEND = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+def parse_monster_page(content: bytes, system_name: str, monster_url: str = "",
+                       backend: str = DEFAULT_BACKEND) -> Optional[MonsterRecord]:
+    """モンスター詳細ページを解析して MonsterRecord を返す
+
+    モンスター名が見つからない場合は None を返す。backend には
+    PARSER_BACKENDS のキーを指定する。
+    """
+    if backend != "html.parser" and not _is_balanced(content):
+        backend = "html.parser"
+    return PARSER_BACKENDS[backend](content, system_name, monster_url)
@@ -0,0 +1,118 @@
+"""
+DQMJ2 モンスターの逆引き検索
+
+「ギラが弱点のモンスター」「最強でザキを無効にするモンスター」「特定の特性・スキルを持つモンスター」
+のような問い合わせに、読み込み時に一度だけ作る転置索引で答える。Streamlit には依存しない。
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from monster_dataset import RESISTANCE_LEVELS, build_resistance_table, resistance_category
+
+# 逆引きできる耐性の区分
+QUERY_CATEGORIES = ["弱点", "通常", "半減", "無効"]
+
+
+class MonsterQueryIndex:
+    """逆引き用の転置索引
+
+    耐性は 耐性レベル → 区分 → 属性 → モンスター名の集合、
+    特性・スキル・系統は それぞれの名前 → モンスター名の集合 で持つ。
+    特技のSPは (SP, モンスター名) を SP の順に並べたリストで持つ。
+    """
+
+    def __init__(self, monsters_data: Dict[str, Any]):
+        self.names = list(monsters_data)
+        self._order = {name: i for i, name in enumerate(self.names)}
+        self.resistances = {level: {category: {} for category in QUERY_CATEGORIES} for level in RESISTANCE_LEVELS}
+        self.traits = {}
+        self.skills = {}
+        self.systems = {}
+        self.with_resistance = set()
+        sp_entries = set()
+
+        for name, data in monsters_data.items():
+            self.systems.setdefault(data.get("系統", "未知"), set()).add(name)
+            for trait in data.get("特性", []):
+                self.traits.setdefault(trait, set()).add(name)
+            for skill in data.get("スキル", []):
+                self.skills.setdefault(skill["スキル名"], set()).add(name)
+                sp_entries.update((int(t["SP"]), name) for t in skill["特技"] if t["SP"].isdigit())
+
+            resistance = data.get("耐性")
+            if not resistance or not resistance.get("説明"):
+                continue
+            self.with_resistance.add(name)
+            table = resistance.get("表") or build_resistance_table(resistance["説明"])
+            for attr, levels in table.items():
+                for level, code in zip(RESISTANCE_LEVELS, levels):
+                    category = resistance_category(code)
+                    self.resistances[level][category].setdefault(attr, set()).add(name)
+
+        # 耐性表に現れる属性（出現数の多い順）
+        counts = {}
+        for level_index in self.resistances[RESISTANCE_LEVELS[0]].values():
+            for attr, names in level_index.items():
+                counts[attr] = counts.get(attr, 0) + len(names)
+        self.attributes = sorted(counts, key=lambda attr: -counts[attr])
+
+        sp_entries = sorted(sp_entries)
+        self._sp_values = [sp for sp, _ in sp_entries]
+        self._sp_names = [name for _, name in sp_entries]
+        self.sp_range = (self._sp_values[0], self._sp_values[-1]) if sp_entries else (0, 0)
+
+    @property
+    def system_counts(self) -> Dict[str, int]:
+        """系統 → モンスター数"""
+        return {system: len(names) for system, names in self.systems.items()}
+
+    def monsters_with_resistance(self, attr: str, category: str, resistance_level: str = "通常") -> FrozenSet[str]:
+        """指定した耐性レベルで、属性が指定した区分になるモンスター"""
+        by_category = self.resistances[resistance_level]
+        if category != "通常":
+            return frozenset(by_category[category].get(attr, ()))
+        # 耐性表に載っていない属性は通常扱い
+        others = set()
+        for other in ("弱点", "半減", "無効"):
+            others.update(by_category[other].get(attr, ()))
+        return frozenset(self.with_resistance - others)
+
+    def monsters_with_sp(self, sp_min: Optional[int] = None, sp_max: Optional[int] = None) -> FrozenSet[str]:
+        """SPが sp_min 以上 sp_max 以下の特技を覚えるモンスター"""
+        start = 0 if sp_min is None else bisect_left(self._sp_values, sp_min)
+        end = len(self._sp_values) if sp_max is None else bisect_right(self._sp_values, sp_max)
+        return frozenset(self._sp_names[start:end])
+
+    def query(self, attr: Optional[str] = None, category: Optional[str] = None, resistance_level: str = "通常",
+              trait: Optional[str] = None, skill: Optional[str] = None, systems: Optional[Iterable[str]] = None,
+              sp_min: Optional[int] = None, sp_max: Optional[int] = None) -> List[str]:
+        """条件をすべて満たすモンスター名のリストを返す（データファイルの並び順）
+
+        指定しなかった条件は絞り込みに使わない。sp_min / sp_max は、その範囲のSPで覚える特技があるかで絞り込む。
+        """
+        candidates = []
+        if attr and category:
+            candidates.append(self.monsters_with_resistance(attr, category, resistance_level))
+        if trait:
+            candidates.append(self.traits.get(trait, set()))
+        if skill:
+            candidates.append(self.skills.get(skill, set()))
+        if systems:
+            candidates.append(set().union(*(self.systems.get(system, set()) for system in systems)))
+        if sp_min is not None or sp_max is not None:
+            candidates.append(self.monsters_with_sp(sp_min, sp_max))
+
+        if not candidates:
+            return list(self.names)
+        # 小さい集合から順に積集合を取る
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for names in candidates[1:]:
+            result &= names
+        return sorted(result, key=self._order.__getitem__)
+
+
+def build_query_index(monsters_data: Dict[str, Any]) -> MonsterQueryIndex:
+    """モンスターデータから逆引き用の転置索引を作成"""
+    return MonsterQueryIndex(monsters_data)
@@ -0,0 +1,166 @@
+"""
+DQMJ2 モンスターデータの省メモリな読み込み
+
+dqmj2_monsters.json を辞書とリストのまま持つ代わりに、__slots__ を使った
+Monster / Resistance / Skill / Technique のオブジェクトに変換する。文字列はすべて
+sys.intern し、同じ内容のスキル・特技・耐性は1つのオブジェクトを共有する。
+
+各オブジェクトは JSON と同じキー（"系統"、"スキル名"、"SP" など）でも読めるため、
+モンスターデータの辞書を受け取る既存の関数にそのまま渡せる。
+"""
+
+import sys
+from typing import Any, Dict, Tuple
+
+from monster_dataset import DATA_FILE, build_resistance_table, load_monster_data
+
+
+class _Record:
+    """JSON のキーで属性を読めるようにする（読み取り専用の辞書の代わり）"""
+
+    __slots__ = ()
+    _KEYS: Dict[str, str] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, self._KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        attribute = self._KEYS.get(key)
+        return default if attribute is None else getattr(self, attribute)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._KEYS
+
+    def keys(self):
+        return self._KEYS.keys()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """dqmj2_monsters.json と同じ形の辞書に戻す"""
+        return {key: _to_json(getattr(self, attribute)) for key, attribute in self._KEYS.items()}
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, _Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    return value
+
+
+class Technique(_Record):
+    """特技"""
+
+    __slots__ = ("name", "sp", "effect")
+    _KEYS = {"技名": "name", "SP": "sp", "効果": "effect"}
+
+    def __init__(self, name: str, sp: str, effect: str):
+        self.name = name
+        self.sp = sp
+        self.effect = effect
+
+
+class Skill(_Record):
+    """スキル（同じ内容のスキルは全モンスターで1つのオブジェクトを共有する）"""
+
+    __slots__ = ("name", "techniques")
+    _KEYS = {"スキル名": "name", "特技": "techniques"}
+
+    def __init__(self, name: str, techniques: Tuple[Technique, ...]):
+        self.name = name
+        self.techniques = techniques
+
+
+class Resistance(_Record):
+    """耐性の説明と耐性表（属性 → (通常, 強, 最強) の耐性コード）"""
+
+    __slots__ = ("text", "table")
+    _KEYS = {"説明": "text", "表": "table"}
+
+    def __init__(self, text: str, table: Dict[str, Tuple[int, ...]]):
+        self.text = text
+        self.table = table
+
+
+class Monster(_Record):
+    """モンスター"""
+
+    __slots__ = ("name", "system", "traits", "resistance", "skills")
+    _KEYS = {"系統": "system", "特性": "traits", "耐性": "resistance", "スキル": "skills"}
+
+    def __init__(self, name: str, system: str, traits: Tuple[str, ...], resistance, skills: Tuple[Skill, ...]):
+        self.name = name
+        self.system = system
+        self.traits = traits
+        # 耐性情報がない場合は JSON と同じく空の辞書
+        self.resistance = resistance if resistance is not None else {}
+        self.skills = skills
+
+
+class _RecordBuilder:
+    """同じ内容のオブジェクトを共有しながらモンスターデータを変換する"""
+
+    def __init__(self):
+        self.techniques = {}
+        self.skills = {}
+        self.resistances = {}
+        self.levels = {}
+
+    def technique(self, data: Dict[str, str]) -> Technique:
+        key = (data["技名"], data["SP"], data["効果"])
+        technique = self.techniques.get(key)
+        if technique is None:
+            technique = self.techniques[key] = Technique(*map(sys.intern, key))
+        return technique
+
+    def skill(self, data: Dict[str, Any]) -> Skill:
+        # 同名でも特技の並びが違うスキルがあるため、内容ごとに共有する
+        techniques = tuple(self.technique(technique) for technique in data["特技"])
+        key = (data["スキル名"], techniques)
+        skill = self.skills.get(key)
+        if skill is None:
+            skill = self.skills[key] = Skill(sys.intern(data["スキル名"]), techniques)
+        return skill
+
+    def resistance(self, data: Dict[str, Any]):
+        text = (data or {}).get("説明")
+        if not text:
+            return None
+        resistance = self.resistances.get(text)
+        if resistance is None:
+            table = data.get("表") or build_resistance_table(text)
+            table = {sys.intern(attr): self.levels.setdefault(tuple(levels), tuple(levels))
+                     for attr, levels in table.items()}
+            resistance = self.resistances[text] = Resistance(sys.intern(text), table)
+        return resistance
+
+    def monster(self, name: str, data: Dict[str, Any]) -> Monster:
+        return Monster(
+            sys.intern(name),
+            sys.intern(data.get("系統", "未知")),
+            tuple(sys.intern(trait) for trait in data.get("特性", [])),
+            self.resistance(data.get("耐性")),
+            tuple(self.skill(skill) for skill in data.get("スキル", [])),
+        )
+
+
+def build_monster_records(monsters_data: Dict[str, Any]) -> Dict[str, Monster]:
+    """モンスターデータの辞書を モンスター名 → Monster の辞書に変換"""
+    builder = _RecordBuilder()
+    return {monster.name: monster
+            for monster in (builder.monster(name, data) for name, data in monsters_data.items())}
+
+
+def load_monster_records(data_file: str = DATA_FILE) -> Dict[str, Any]:
+    """モンスターデータを読み込み、Monster のオブジェクトに変換する
+
+    スナップショット・SQLite データベースは必要な分だけ読み出す形式のため、変換せずにそのまま返す。
+    """
+    monsters_data = load_monster_data(data_file)
+    if type(monsters_data) is not dict:
+        return monsters_data
+    return build_monster_records(monsters_data)
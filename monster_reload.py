@@ -0,0 +1,89 @@
+"""
+DQMJ2 モンスターデータの再読み込み
+
+データファイルの 更新時刻・大きさ を一定間隔で調べ、変わっていれば裏のスレッドで新しいデータ
+（と索引）を作り終えてから、参照を1回の代入で差し替える。利用側は current を読むだけなので、
+作り直しの途中のデータを見ることも、作り直しを待つこともない。
+
+書き込み途中などで読み込めなかった場合は古いデータのまま使い続け、ファイルがもう一度
+変わったときに作り直す。Streamlit には依存しない。
+"""
+
+import os
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+# データファイルを調べる間隔（秒）
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+# データファイルの版（パス, 更新時刻[ns], 大きさ）
+Signature = Tuple[str, int, int]
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    """データファイルの版（ファイルがなければ None）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class DataReloader:
+    """データファイルが変わったら作り直して差し替える
+
+    locate() は読み込むデータファイルのパスを返す関数、build(signature) はその版のデータを作る関数で、
+    読み込めなかった場合は None を返す。作ったデータは current で参照する。
+    """
+
+    def __init__(self, locate: Callable[[], str], build: Callable[[Signature], Any],
+                 interval: float = DEFAULT_RELOAD_INTERVAL):
+        self.locate = locate
+        self.build = build
+        self.interval = interval
+        self.reloads = 0
+        self._failed: Optional[Signature] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.signature = file_signature(locate())
+        self.current = build(self.signature) if self.signature else None
+
+    def poll(self) -> bool:
+        """データファイルが変わっていれば作り直して差し替える（差し替えたら True）"""
+        signature = file_signature(self.locate())
+        if signature is None or signature in (self.signature, self._failed):
+            return False
+        try:
+            current = self.build(signature)
+        except Exception as e:
+            print(f"データの再読み込みに失敗しました: {signature[0]}: {e}")
+            current = None
+        if file_signature(self.locate()) != signature:
+            # 作り直している間にファイルが変わった（次の確認で作り直す）
+            return False
+        if current is None:
+            self._failed = signature
+            return False
+        self.current = current
+        self.signature = signature
+        self.reloads += 1
+        return True
+
+    def start(self):
+        """裏のスレッドで interval 秒ごとにデータファイルを調べる（interval が 0 以下なら調べない）"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="monster-data-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """監視のスレッドを止める"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
@@ -0,0 +1,82 @@
+"""
+DQMJ2 全モンスター一覧表
+
+全モンスターの 系統・特性・耐性の区分ごとの属性数・スキル数・特技数 を、列ごとの配列から
+一度だけ pandas の DataFrame にまとめる。絞り込み・並べ替えは DataFrame 全体に対して行い、
+表示するのは1ページ分だけにする。Streamlit には依存しない。
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+from monster_dataset import RESISTANCE_LEVELS, build_resistance_table, resistance_category
+from monster_search import normalize_kana
+
+# 一覧表の列（並べ替えに使える列）
+ROSTER_COLUMNS = ["名前", "系統", "特性", "弱点", "半減", "無効", "スキル数", "特技数"]
+
+# 名前での絞り込みに使う正規化済みの名前の列（表示しない）
+_KEY_COLUMN = "_key"
+
+
+def build_roster_frame(monsters_data: Dict[str, Any], resistance_level: str = "通常") -> pd.DataFrame:
+    """全モンスターの一覧表を作成（耐性の区分ごとの属性数は resistance_level での値）
+
+    耐性情報のないモンスターの属性数は欠損値になる。
+    """
+    level = RESISTANCE_LEVELS.index(resistance_level)
+    columns = {column: [] for column in ROSTER_COLUMNS + [_KEY_COLUMN]}
+
+    for name, data in monsters_data.items():
+        columns["名前"].append(name)
+        columns[_KEY_COLUMN].append(normalize_kana(name))
+        columns["系統"].append(data.get("系統", "未知"))
+        columns["特性"].append("、".join(data.get("特性", [])))
+
+        counts = {"弱点": None, "半減": None, "無効": None}
+        resistance = data.get("耐性")
+        if resistance and resistance.get("説明"):
+            counts = {"弱点": 0, "半減": 0, "無効": 0, "通常": 0}
+            table = resistance.get("表") or build_resistance_table(resistance["説明"])
+            for levels in table.values():
+                counts[resistance_category(levels[level])] += 1
+        for category in ("弱点", "半減", "無効"):
+            columns[category].append(counts[category])
+
+        skills = data.get("スキル", [])
+        columns["スキル数"].append(len(skills))
+        columns["特技数"].append(sum(len(skill["特技"]) for skill in skills))
+
+    frame = pd.DataFrame(columns)
+    for category in ("弱点", "半減", "無効"):
+        frame[category] = frame[category].astype("Int64")
+    frame["系統"] = frame["系統"].astype("category")
+    return frame
+
+
+def filter_roster(frame: pd.DataFrame, name: str = "", systems: Optional[Iterable[str]] = None,
+                  trait: str = "", sort_by: str = "名前", ascending: bool = True) -> pd.DataFrame:
+    """一覧表を絞り込んで並べ替える（名前はひらがな・カタカナを区別せずに部分一致）"""
+    mask = pd.Series(True, index=frame.index)
+    name = normalize_kana(name.strip())
+    if name:
+        mask &= frame[_KEY_COLUMN].str.contains(name, regex=False)
+    systems = list(systems or [])
+    if systems:
+        mask &= frame["系統"].isin(systems)
+    if trait.strip():
+        mask &= frame["特性"].str.contains(trait.strip(), regex=False)
+    # 同じ値の行はデータファイルの並び順のまま
+    return frame[mask].sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+
+
+def roster_page(frame: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
+    """絞り込んだ一覧表の page ページ目（1始まり）を表示用の列だけにして返す"""
+    start = (page - 1) * page_size
+    return frame.iloc[start:start + page_size][ROSTER_COLUMNS].reset_index(drop=True)
+
+
+def page_count(frame: pd.DataFrame, page_size: int) -> int:
+    """ページ数（0件でも1ページ）"""
+    return max(1, -(-len(frame) // page_size))
@@ -0,0 +1,105 @@
+"""
+DQMJ2 モンスター名の検索索引（オートコンプリート用）
+
+モンスター名をひらがな → カタカナ・全角英数字 → 半角・小文字に正規化したキーと、
+キーの1文字・2文字ごとの転置リスト（n-gram）を一度だけ作る。検索時は入力文字列だけを
+正規化し、転置リストの積集合から候補を絞り込む。
+
+モンスターの番号は 名前の短い順（同じ長さならデータファイルの並び順）に振ってあり、
+完全一致 → 前方一致 → 部分一致 → 系統名の一致 の区分ごとに番号順で並べたものが検索結果の順位になる。
+build_static.py が app.js 用に data/search.json として書き出す。Streamlit には依存しない。
+"""
+
+from typing import Any, Dict, List, Optional
+
+# 検索索引の形式のバージョン（app.js の SEARCH_INDEX_VERSION と合わせる）
+SEARCH_INDEX_VERSION = 1
+
+# 全角英数字 → 半角英数字
+_FULLWIDTH = {code: code - 0xFEE0 for start, end in (("Ａ", "Ｚ"), ("ａ", "ｚ"), ("０", "９"))
+              for code in range(ord(start), ord(end) + 1)}
+# ひらがな → カタカナ
+_HIRAGANA = {code: code + 0x60 for code in range(0x3041, 0x3097)}
+_NORMALIZE = {**_FULLWIDTH, **_HIRAGANA}
+
+
+def normalize_kana(text: str) -> str:
+    """検索用に正規化（小文字化・ひらがな → カタカナ・全角英数字 → 半角。app.js の normalizeString と同じ）"""
+    return text.lower().translate(_NORMALIZE)
+
+
+def _grams(key: str) -> set:
+    """キーに含まれる1文字と2文字の部分文字列"""
+    return set(key) | {key[i:i + 2] for i in range(len(key) - 1)}
+
+
+class MonsterSearchIndex:
+    """モンスター名の n-gram 転置索引"""
+
+    def __init__(self, monsters_data: Dict[str, Any]):
+        name_system = {name: data.get("系統", "未知") for name, data in monsters_data.items()}
+        order = {name: i for i, name in enumerate(name_system)}
+        self.names = sorted(name_system, key=lambda name: (len(name), order[name]))
+        self.keys = [normalize_kana(name) for name in self.names]
+        self.systems = []
+        self.name_systems = []
+        for name in self.names:
+            system = name_system[name]
+            if system not in self.systems:
+                self.systems.append(system)
+            self.name_systems.append(self.systems.index(system))
+        self.system_keys = [normalize_kana(system) for system in self.systems]
+
+        self.grams: Dict[str, List[int]] = {}
+        for i, key in enumerate(self.keys):
+            for gram in _grams(key):
+                self.grams.setdefault(gram, []).append(i)
+
+    def _candidates(self, query: str) -> List[int]:
+        """キーに query を含むモンスターの番号（昇順）"""
+        if len(query) == 1:
+            return self.grams.get(query, [])
+        postings = sorted((self.grams.get(query[i:i + 2], []) for i in range(len(query) - 1)), key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0]).intersection(*postings[1:])
+        # 2文字ごとの一致だけでは連続しているとは限らないため、キーで確かめる
+        return sorted(i for i in candidates if query in self.keys[i])
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """名前または系統名に query を含むモンスター名を順位順に返す"""
+        query = normalize_kana(query.strip())
+        if not query:
+            return []
+
+        tiers = ([], [], [])  # 完全一致, 前方一致, 部分一致
+        for i in self._candidates(query):
+            key = self.keys[i]
+            tiers[0 if key == query else 1 if key.startswith(query) else 2].append(i)
+        ranked = tiers[0] + tiers[1] + tiers[2]
+
+        matched_systems = {s for s, key in enumerate(self.system_keys) if query in key}
+        if matched_systems:
+            found = set(ranked)
+            ranked += [i for i, s in enumerate(self.name_systems) if s in matched_systems and i not in found]
+
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.names[i] for i in ranked]
+
+    def to_json(self) -> Dict[str, Any]:
+        """app.js 用の検索索引（data/search.json の内容）"""
+        return {
+            "version": SEARCH_INDEX_VERSION,
+            "names": self.names,
+            "keys": self.keys,
+            "systems": self.systems,
+            "systemKeys": self.system_keys,
+            "nameSystems": self.name_systems,
+            "grams": self.grams,
+        }
+
+
+def build_search_index(monsters_data: Dict[str, Any]) -> MonsterSearchIndex:
+    """モンスターデータから検索索引を作成"""
+    return MonsterSearchIndex(monsters_data)
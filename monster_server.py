@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DQMJ2 モンスターデータの HTTP サーバー
+
+モンスターデータを起動時に一度だけ読み込み、索引を作ってメモリに置いたまま、
+モンスターの詳細・共通弱点分析・逆引き検索・名前検索を JSON で返す。標準ライブラリの
+ThreadingHTTPServer で複数のリクエストを同時に処理する。Streamlit には依存しない。
+
+応答は本文の SHA-1 を ETag にしてメモリにキャッシュし、If-None-Match が一致すれば 304 を返す。
+/metrics はリクエスト数・処理時間・キャッシュの命中数を Prometheus のテキスト形式で返す。
+
+データファイルが書き換えられると、裏のスレッドで読み込みと索引の作成を済ませてから
+新しいデータに切り替える（monster_reload.py。応答のキャッシュもデータごとに持つ）。
+
+エンドポイント（すべて GET）:
+    /monsters                モンスター名と系統の一覧
+    /monsters/<名前>         モンスターの詳細（耐性の区分ごとの属性つき）
+    /analyze?monster=A&monster=B:強
+                             共通弱点分析（「名前:耐性レベル」で耐性レベルを指定）
+    /query?attr=ギラ&category=弱点&level=強&trait=&skill=&system=&sp_min=&sp_max=
+                             逆引き検索（system は複数指定可）
+    /search?q=すらいむ&limit=10
+                             モンスター名の検索
+    /metrics                 メトリクス
+
+使い方:
+    python monster_server.py [--data dqmj2_monsters.json] [--host 127.0.0.1] [--port 8765] [--reload-interval 2]
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from monster_analysis import analyze_common_weaknesses, build_resistance_matrix
+from monster_dataset import DATA_FILE, RESISTANCE_LEVELS, load_monster_data, parse_member, parse_resistance_info
+from monster_query import QUERY_CATEGORIES, build_query_index
+from monster_reload import DEFAULT_RELOAD_INTERVAL, DataReloader, Signature
+from monster_search import build_search_index
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# キャッシュする応答の数
+DEFAULT_CACHE_SIZE = 4096
+
+# 処理時間のヒストグラムの区切り（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+
+class RequestError(Exception):
+    """クライアントに返すエラー（HTTP ステータスつき）"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """リクエスト → (ルート名, ステータス, 本文, ETag) の LRU キャッシュ（スレッドセーフ）"""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, int, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, int, bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: Tuple[str, int, bytes, str]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MonsterService:
+    """読み込んだモンスターデータと索引から、リクエストパスに対する JSON を作る
+
+    スナップショット・SQLite データベースも起動時に辞書へ展開し、以後は読み取りだけを行う。
+    そのため複数のスレッドから同時に呼び出せる。応答のキャッシュもこのデータ専用に持つ。
+    """
+
+    def __init__(self, monsters_data: Dict[str, Any], cache_size: int = DEFAULT_CACHE_SIZE):
+        self.monsters_data = {name: monsters_data[name] for name in monsters_data}
+        self.cache = ResponseCache(cache_size)
+        self.resistance_matrix = build_resistance_matrix(self.monsters_data)
+        self.query_index = build_query_index(self.monsters_data)
+        self.search_index = build_search_index(self.monsters_data)
+        self.routes = {
+            "monsters": self.list_monsters,
+            "analyze": self.analyze,
+            "query": self.query,
+            "search": self.search,
+        }
+
+    def route(self, path: str) -> Tuple[str, Optional[str]]:
+        """パスを (ルート名, モンスター名) に変換"""
+        parts = [part for part in path.split("/") if part]
+        if parts == ["monsters"]:
+            return "monsters", None
+        if len(parts) == 2 and parts[0] == "monsters":
+            return "monster", unquote(parts[1])
+        if len(parts) == 1 and parts[0] in ("analyze", "query", "search"):
+            return parts[0], None
+        raise RequestError(404, f"不明なパスです: {path}")
+
+    def handle(self, route: str, name: Optional[str], params: Dict[str, List[str]]) -> Any:
+        """ルートを処理して応答の内容を返す"""
+        if route == "monster":
+            return self.get_monster(name)
+        return self.routes[route](params)
+
+    def list_monsters(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        monsters = [{"名前": name, "系統": data.get("系統", "未知")} for name, data in self.monsters_data.items()]
+        return {"count": len(monsters), "monsters": monsters}
+
+    def get_monster(self, name: str) -> Dict[str, Any]:
+        data = self.monsters_data.get(name)
+        if data is None:
+            raise RequestError(404, f"モンスターが見つかりません: {name}")
+        resistance = data.get("耐性") or {}
+        info = parse_resistance_info(resistance["説明"]) if resistance.get("説明") else None
+        return {"名前": name, **data, "耐性情報": info}
+
+    def analyze(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        members = [parse_member(entry) for entry in params.get("monster", []) if entry.strip()]
+        names = [name for name, _ in members]
+        unknown = [name for name in names if name not in self.monsters_data]
+        if unknown:
+            raise RequestError(404, f"モンスターが見つかりません: {'、'.join(unknown)}")
+        if len(names) < 2:
+            raise RequestError(400, "monster を2体以上指定してください")
+        return analyze_common_weaknesses(names, self.monsters_data, [level for _, level in members],
+                                         self.resistance_matrix)
+
+    def query(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        def single(key: str) -> Optional[str]:
+            values = params.get(key)
+            return values[-1] if values and values[-1] else None
+
+        def number(key: str) -> Optional[int]:
+            value = single(key)
+            return None if value is None else parse_count(key, value)
+
+        category = single("category")
+        level = single("level") or "通常"
+        if category is not None and category not in QUERY_CATEGORIES:
+            raise RequestError(400, f"category は {' / '.join(QUERY_CATEGORIES)} のいずれかです: {category}")
+        if level not in RESISTANCE_LEVELS:
+            raise RequestError(400, f"level は {' / '.join(RESISTANCE_LEVELS)} のいずれかです: {level}")
+        results = self.query_index.query(single("attr"), category, level, single("trait"), single("skill"),
+                                         params.get("system"), number("sp_min"), number("sp_max"))
+        return {"count": len(results), "monsters": results}
+
+    def search(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        query = (params.get("q") or [""])[-1]
+        limit = (params.get("limit") or [""])[-1]
+        results = self.search_index.search(query, parse_count("limit", limit) if limit else None)
+        return {"count": len(results), "monsters": results}
+
+
+class Metrics:
+    """ルート・ステータスごとのリクエスト数と処理時間、キャッシュの命中数を集計（スレッドセーフ）"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.latency: Dict[str, List[float]] = {}  # ルート → [バケットごとの件数..., 件数, 合計秒数]
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, status: int, seconds: float, cache_hit: Optional[bool], not_modified: bool):
+        with self._lock:
+            self.requests[route, status] = self.requests.get((route, status), 0) + 1
+            buckets = self.latency.setdefault(route, [0] * len(LATENCY_BUCKETS) + [0, 0.0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            buckets[-2] += 1
+            buckets[-1] += seconds
+            if cache_hit is not None:
+                if cache_hit:
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+            if not_modified:
+                self.not_modified += 1
+
+    def render(self, monsters: int, cached: int, reloads: int) -> str:
+        """Prometheus のテキスト形式"""
+        with self._lock:
+            lines = [
+                "# TYPE dqmj2_requests_total counter",
+                *(f'dqmj2_requests_total{{route="{route}",status="{status}"}} {count}'
+                  for (route, status), count in sorted(self.requests.items())),
+                "# TYPE dqmj2_request_duration_seconds histogram",
+            ]
+            for route, buckets in sorted(self.latency.items()):
+                for bound, count in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'dqmj2_request_duration_seconds_bucket{{route="{route}",le="{bound}"}} {count}')
+                lines.append(f'dqmj2_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {buckets[-2]}')
+                lines.append(f'dqmj2_request_duration_seconds_count{{route="{route}"}} {buckets[-2]}')
+                lines.append(f'dqmj2_request_duration_seconds_sum{{route="{route}"}} {buckets[-1]:.6f}')
+            lines += [
+                "# TYPE dqmj2_response_cache_hits_total counter",
+                f"dqmj2_response_cache_hits_total {self.cache_hits}",
+                "# TYPE dqmj2_response_cache_misses_total counter",
+                f"dqmj2_response_cache_misses_total {self.cache_misses}",
+                "# TYPE dqmj2_not_modified_total counter",
+                f"dqmj2_not_modified_total {self.not_modified}",
+            ]
+        lines += [
+            "# TYPE dqmj2_response_cache_entries gauge",
+            f"dqmj2_response_cache_entries {cached}",
+            "# TYPE dqmj2_monsters gauge",
+            f"dqmj2_monsters {monsters}",
+            "# TYPE dqmj2_reloads_total counter",
+            f"dqmj2_reloads_total {reloads}",
+            "# TYPE dqmj2_uptime_seconds gauge",
+            f"dqmj2_uptime_seconds {time.time() - self.started:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def parse_count(key: str, value: str) -> int:
+    """0 以上の整数のパラメーターを変換（半角数字以外は 400）"""
+    if not (value.isascii() and value.isdigit()):
+        raise RequestError(400, f"{key} は整数で指定してください: {value}")
+    return int(value)
+
+
+def encode_response(status: int, content: Any) -> Tuple[int, bytes, str]:
+    """応答の内容を (ステータス, JSON の本文, ETag) にする"""
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return status, body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーが ETag に一致するか（弱い比較）"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class MonsterRequestHandler(BaseHTTPRequestHandler):
+    """MonsterServer のリクエストハンドラー"""
+
+    protocol_version = "HTTP/1.1"
+    server: "MonsterServer"
+
+    def do_GET(self):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") == "/metrics":
+            body = self.server.render_metrics().encode("utf-8")
+            self._send(200, body, "text/plain; version=0.0.4; charset=utf-8")
+            self.server.metrics.observe("metrics", 200, time.perf_counter() - started, None, False)
+            return
+
+        # 再読み込みで差し替わっても、このリクエストは最初に取得したデータで処理する
+        service = self.server.service
+        key = f"{url.path}?{url.query}"
+        entry = service.cache.get(key)
+        cache_hit = entry is not None
+        if entry is None:
+            route = "unknown"
+            try:
+                route, name = service.route(url.path)
+                entry = (route, *encode_response(200, service.handle(route, name, parse_qs(url.query))))
+            except RequestError as e:
+                entry = (route, *encode_response(e.status, {"error": str(e)}))
+            except Exception:
+                # 想定外のエラーも JSON で返し、メトリクスに 500 として数える
+                self.log_error("予期せぬエラー: %s\n%s", self.path, traceback.format_exc())
+                entry = (route, *encode_response(500, {"error": "サーバー内部でエラーが発生しました"}))
+            # 成功した応答と 404 はデータが変わらない限り同じなのでキャッシュする
+            if entry[1] in (200, 404):
+                service.cache.put(key, entry)
+
+        route, status, body, etag = entry
+        not_modified = status == 200 and etag_matches(self.headers.get("If-None-Match"), etag)
+        if not_modified:
+            self._send(304, b"", None, etag)
+        else:
+            self._send(status, body, "application/json; charset=utf-8", etag)
+        self.server.metrics.observe(route, 304 if not_modified else status, time.perf_counter() - started,
+                                    cache_hit, not_modified)
+
+    def _send(self, status: int, body: bytes, content_type: Optional[str], etag: Optional[str] = None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class MonsterServer(ThreadingHTTPServer):
+    """モンスターデータの HTTP サーバー（リクエストごとにスレッドで処理）"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], reloader: DataReloader, quiet: bool = False):
+        super().__init__(address, MonsterRequestHandler)
+        self.reloader = reloader
+        self.metrics = Metrics()
+        self.quiet = quiet
+
+    @property
+    def service(self) -> MonsterService:
+        """現在のデータの MonsterService"""
+        return self.reloader.current
+
+    def render_metrics(self) -> str:
+        service = self.service
+        return self.metrics.render(len(service.monsters_data), len(service.cache), self.reloader.reloads)
+
+    def server_close(self):
+        self.reloader.stop()
+        super().server_close()
+
+
+def create_server(data_file: str = DATA_FILE, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  cache_size: int = DEFAULT_CACHE_SIZE, quiet: bool = False,
+                  reload_interval: float = DEFAULT_RELOAD_INTERVAL) -> Optional[MonsterServer]:
+    """モンスターデータを読み込んでサーバーを作成（データがなければ None）
+
+    reload_interval 秒ごとにデータファイルを調べ、変わっていれば読み込み直す（0 以下なら調べない）。
+    """
+    def build(version: Signature) -> Optional[MonsterService]:
+        monsters_data = load_monster_data(version[0])
+        return MonsterService(monsters_data, cache_size) if monsters_data else None
+
+    reloader = DataReloader(lambda: data_file, build, reload_interval)
+    if reloader.current is None:
+        return None
+    reloader.start()
+    return MonsterServer((host, port), reloader, quiet)
+
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="DQMJ2 モンスターデータの HTTP サーバー")
+    parser.add_argument("--data", default=DATA_FILE,
+                        help=f"モンスターデータのファイル（デフォルト: {DATA_FILE}）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けるアドレス（デフォルト: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けるポート（デフォルト: {DEFAULT_PORT}）")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"キャッシュする応答の数（デフォルト: {DEFAULT_CACHE_SIZE}）")
+    parser.add_argument("--reload-interval", type=float, default=DEFAULT_RELOAD_INTERVAL,
+                        help=f"データファイルの変更を調べる間隔（秒。0 で調べない。デフォルト: {DEFAULT_RELOAD_INTERVAL:g}）")
+    parser.add_argument("--quiet", action="store_true", help="リクエストごとのログを出力しない")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """メイン関数"""
+    args = parse_args(argv)
+    server = create_server(args.data, args.host, args.port, args.cache_size, args.quiet, args.reload_interval)
+    if server is None:
+        print(f"モンスターデータが見つかりません: {args.data}")
+        return 1
+
+    host, port = server.server_address[:2]
+    print(f"{len(server.service.monsters_data)}体のモンスターデータを読み込みました: http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
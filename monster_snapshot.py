@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DQMJ2 モンスターデータのバイナリスナップショット
+
+dqmj2_monsters.json と同じ内容を、共通の文字列表・固定長の耐性配列・スキルの
+参照表にまとめたバイナリ形式で保存する。読み込み側はファイルをメモリマップし、
+モンスターのデータは参照されたときに1体ずつ辞書に展開する。
+
+使い方（既存のJSONファイルから作成）:
+    python monster_snapshot.py dqmj2_monsters.json dqmj2_monsters.bin
+"""
+
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+from monster_dataset import (DATA_FILE, RESISTANCE_LEVELS, SNAPSHOT_FILE, SNAPSHOT_MAGIC,
+                             build_resistance_table, load_monster_data)
+
+SNAPSHOT_VERSION = 1
+
+# ファイル先頭: マジック, バージョン, 件数（文字列, モンスター, スキル, 特技, 属性）, 各セクションの (位置, 長さ)
+SECTIONS = ["string_offsets", "string_data", "attributes", "monsters", "resistances",
+            "traits", "monster_skills", "skills", "skill_techniques", "techniques"]
+HEADER = struct.Struct("<8sI5I" + "II" * len(SECTIONS))
+
+# モンスター1体: 名前, 系統, 耐性の説明（なしは NO_STRING）, 特性・スキルの参照範囲
+MONSTER = struct.Struct("<5I2H")
+# スキル: 名前, 特技の参照範囲 / 特技: 名前, SP, 効果
+SKILL = struct.Struct("<3I")
+TECHNIQUE = struct.Struct("<3I")
+
+NO_STRING = 0xFFFFFFFF
+# 耐性配列で、耐性の説明に出てこない属性を表す値
+NOT_LISTED = -128
+
+
+class _StringTable:
+    """同じ文字列を1回だけ保存するための文字列表"""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+
+def write_snapshot(monsters_data: Dict[str, Any], path: str = SNAPSHOT_FILE):
+    """モンスターデータをバイナリスナップショットとして書き出す（一時ファイルから置き換え）"""
+    strings = _StringTable()
+    attributes = {}
+    skills = {}
+    techniques = {}
+    skill_records = []
+    skill_techniques = []
+    technique_records = []
+    monster_records = []
+    traits = []
+    monster_skills = []
+    tables = []
+
+    for name, data in monsters_data.items():
+        resistance = data.get("耐性") or {}
+        text = resistance.get("説明")
+        table = (resistance.get("表") or build_resistance_table(text)) if text else {}
+        for attr in table:
+            attributes.setdefault(attr, len(attributes))
+        tables.append(table)
+
+        traits_start = len(traits)
+        traits.extend(strings.add(trait) for trait in data.get("特性", []))
+
+        skills_start = len(monster_skills)
+        for skill in data.get("スキル", []):
+            # 同名でも特技の並びが違うスキルがあるため、内容ごとに1件とする
+            key = (skill["スキル名"], tuple((t["技名"], t["SP"], t["効果"]) for t in skill["特技"]))
+            if key not in skills:
+                skills[key] = len(skill_records)
+                start = len(skill_techniques)
+                for technique in key[1]:
+                    if technique not in techniques:
+                        techniques[technique] = len(technique_records)
+                        technique_records.append(tuple(strings.add(value) for value in technique))
+                    skill_techniques.append(techniques[technique])
+                skill_records.append((strings.add(key[0]), start, len(key[1])))
+            monster_skills.append(skills[key])
+
+        monster_records.append((
+            strings.add(name),
+            strings.add(data.get("系統", "未知")),
+            strings.add(text) if text else NO_STRING,
+            traits_start,
+            skills_start,
+            len(traits) - traits_start,
+            len(monster_skills) - skills_start,
+        ))
+
+    resistances = bytearray(len(monster_records) * len(attributes) * len(RESISTANCE_LEVELS))
+    resistances[:] = struct.pack("b", NOT_LISTED) * len(resistances)
+    for row, table in enumerate(tables):
+        for attr, levels in table.items():
+            start = (row * len(attributes) + attributes[attr]) * len(RESISTANCE_LEVELS)
+            resistances[start:start + len(levels)] = struct.pack(f"{len(levels)}b", *levels)
+
+    attribute_ids = [strings.add(attr) for attr in attributes]
+    encoded = [text.encode("utf-8") for text in strings.strings]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+
+    sections = {
+        "string_offsets": struct.pack(f"<{len(string_offsets)}I", *string_offsets),
+        "string_data": b"".join(encoded),
+        "attributes": struct.pack(f"<{len(attribute_ids)}I", *attribute_ids),
+        "monsters": b"".join(MONSTER.pack(*record) for record in monster_records),
+        "resistances": bytes(resistances),
+        "traits": struct.pack(f"<{len(traits)}I", *traits),
+        "monster_skills": struct.pack(f"<{len(monster_skills)}I", *monster_skills),
+        "skills": b"".join(SKILL.pack(*record) for record in skill_records),
+        "skill_techniques": struct.pack(f"<{len(skill_techniques)}I", *skill_techniques),
+        "techniques": b"".join(TECHNIQUE.pack(*record) for record in technique_records),
+    }
+    layout = []
+    position = HEADER.size
+    for section in SECTIONS:
+        position += -position % 4  # 4バイト境界にそろえる
+        layout.append((position, len(sections[section])))
+        position += len(sections[section])
+
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(strings.strings), len(monster_records),
+                         len(skill_records), len(technique_records), len(attributes),
+                         *(value for pair in layout for value in pair))
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(header)
+        for section, (offset, _) in zip(SECTIONS, layout):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(sections[section])
+    os.replace(tmp_file, path)
+
+
+class MonsterSnapshot(Mapping):
+    """メモリマップしたスナップショットを モンスター名 → モンスターデータ の辞書として扱う
+
+    モンスターのデータは参照されるたびに dqmj2_monsters.json と同じ形の辞書へ展開する。
+    """
+
+    def __init__(self, path: str = SNAPSHOT_FILE, signature: Optional[Tuple[int, int]] = None):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # 開いたファイルの版（更新時刻[ns], 大きさ）
+            self.signature = (stat.st_mtime_ns, stat.st_size)
+            if signature is not None and tuple(signature) != self.signature:
+                raise ValueError(f"スナップショットが書き換えられています: {path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = HEADER.unpack_from(self._mmap, 0)
+        magic, version = fields[0], fields[1]
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"対応していないスナップショットです: {path}")
+        (self._string_count, self._monster_count, self._skill_count,
+         self._technique_count, self._attribute_count) = fields[2:7]
+        self._sections = {section: (fields[7 + 2 * i], fields[8 + 2 * i]) for i, section in enumerate(SECTIONS)}
+        self._view = memoryview(self._mmap)
+        self._strings = {}
+        self._index = None
+        self.attributes = [self._string(string_id) for string_id in self._u32_array("attributes")]
+
+    def __reduce__(self):
+        # 複製するときはファイルを開き直す（置き換えられて別の版になっていれば開かない）
+        return (MonsterSnapshot, (self.path, self.signature))
+
+    def close(self):
+        """メモリマップを閉じる"""
+        self._view.release()
+        self._mmap.close()
+
+    def _u32_array(self, section: str, start: int = 0, count: Optional[int] = None) -> Tuple[int, ...]:
+        """セクションの符号なし32bit整数の配列から start 番目以降の count 個（未指定なら最後まで）
+
+        ファイルはリトルエンディアンで書くため、実行環境のバイト順によらず "<I" で読む。
+        """
+        offset, length = self._sections[section]
+        if count is None:
+            count = length // 4 - start
+        return struct.unpack_from(f"<{count}I", self._mmap, offset + 4 * start)
+
+    def _string(self, string_id: int) -> str:
+        text = self._strings.get(string_id)
+        if text is None:
+            offsets = self._sections["string_offsets"][0]
+            start, end = struct.unpack_from("<2I", self._mmap, offsets + 4 * string_id)
+            data_offset = self._sections["string_data"][0]
+            text = self._strings[string_id] = str(self._view[data_offset + start:data_offset + end], "utf-8")
+        return text
+
+    def _monster_record(self, row: int):
+        return MONSTER.unpack_from(self._mmap, self._sections["monsters"][0] + MONSTER.size * row)
+
+    def _names(self) -> Dict[str, int]:
+        if self._index is None:
+            self._index = {self._string(self._monster_record(row)[0]): row for row in range(self._monster_count)}
+        return self._index
+
+    def __len__(self) -> int:
+        return self._monster_count
+
+    def __iter__(self):
+        return iter(self._names())
+
+    def __contains__(self, name) -> bool:
+        return name in self._names()
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self._decode(self._names()[name])
+
+    def resistance_codes(self, row: int) -> List[List[int]]:
+        """row 番目のモンスターの 属性 × [通常, 強, 最強] の耐性コード（説明に出てこない属性は NOT_LISTED）"""
+        offset = self._sections["resistances"][0]
+        width = len(RESISTANCE_LEVELS)
+        start = offset + row * self._attribute_count * width
+        codes = struct.unpack_from(f"{self._attribute_count * width}b", self._mmap, start)
+        return [list(codes[i:i + width]) for i in range(0, len(codes), width)]
+
+    def _decode(self, row: int) -> Dict[str, Any]:
+        """row 番目のモンスターを dqmj2_monsters.json と同じ形の辞書に展開"""
+        _, system, resistance, traits_start, skills_start, traits_count, skills_count = self._monster_record(row)
+        traits = self._u32_array("traits", traits_start, traits_count)
+        monster_skills = self._u32_array("monster_skills", skills_start, skills_count)
+
+        resistance_data = {}
+        if resistance != NO_STRING:
+            table = {
+                attr: levels
+                for attr, levels in zip(self.attributes, self.resistance_codes(row))
+                if levels[0] != NOT_LISTED
+            }
+            resistance_data = {"説明": self._string(resistance), "表": table}
+
+        return {
+            "系統": self._string(system),
+            "特性": [self._string(trait) for trait in traits],
+            "耐性": resistance_data,
+            "スキル": [self._decode_skill(skill) for skill in monster_skills],
+        }
+
+    def _decode_skill(self, skill_id: int) -> Dict[str, Any]:
+        name, start, count = SKILL.unpack_from(self._mmap, self._sections["skills"][0] + SKILL.size * skill_id)
+        techniques = []
+        for technique_id in self._u32_array("skill_techniques", start, count):
+            offset = self._sections["techniques"][0] + TECHNIQUE.size * technique_id
+            technique, sp, effect = TECHNIQUE.unpack_from(self._mmap, offset)
+            techniques.append({"技名": self._string(technique), "SP": self._string(sp), "効果": self._string(effect)})
+        return {"スキル名": self._string(name), "特技": techniques}
+
+
+def open_snapshot(path: str = SNAPSHOT_FILE) -> MonsterSnapshot:
+    """スナップショットをメモリマップして開く"""
+    return MonsterSnapshot(path)
+
+
+def main(argv=None):
+    """JSONファイルからスナップショットを作成"""
+    argv = sys.argv[1:] if argv is None else argv
+    source = argv[0] if argv else DATA_FILE
+    target = argv[1] if len(argv) > 1 else SNAPSHOT_FILE
+    monsters_data = load_monster_data(source)
+    if not monsters_data:
+        print(f"モンスターデータが見つかりません: {source}")
+        return 1
+    write_snapshot(monsters_data, target)
+    print(f"{len(monsters_data)}体のモンスターデータを{target}に保存しました（{os.path.getsize(target):,} バイト）")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
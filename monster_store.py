@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DQMJ2 モンスターデータの SQLite データベース
+
+モンスター・系統・特性・耐性（耐性レベルごと）・スキル・特技を正規化したテーブルに保存し、
+検索に使う列に索引を張る。読み込み側は全データを辞書に展開せず、必要なモンスターや
+検索結果だけをデータベースから取り出す。
+
+使い方（既存のJSONファイルから作成）:
+    python monster_store.py dqmj2_monsters.json dqmj2_monsters.db
+"""
+
+import os
+import sqlite3
+import sys
+from collections.abc import ItemsView, Mapping, ValuesView
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from monster_dataset import DATA_FILE, RESISTANCE_LEVELS, STORE_FILE, build_resistance_table, load_monster_data
+
+STORE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE systems (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE monsters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    system_id INTEGER NOT NULL REFERENCES systems(id),
+    resistance_text TEXT
+);
+CREATE TABLE traits (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE monster_traits (
+    monster_id INTEGER NOT NULL REFERENCES monsters(id),
+    position INTEGER NOT NULL,
+    trait_id INTEGER NOT NULL REFERENCES traits(id),
+    PRIMARY KEY (monster_id, position)
+);
+CREATE TABLE resistances (
+    monster_id INTEGER NOT NULL REFERENCES monsters(id),
+    position INTEGER NOT NULL,
+    attribute TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    code INTEGER NOT NULL,
+    PRIMARY KEY (monster_id, position, level)
+);
+CREATE TABLE techniques (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    sp TEXT NOT NULL,
+    sp_value INTEGER,
+    effect TEXT NOT NULL
+);
+CREATE TABLE skills (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE skill_techniques (
+    skill_id INTEGER NOT NULL REFERENCES skills(id),
+    position INTEGER NOT NULL,
+    technique_id INTEGER NOT NULL REFERENCES techniques(id),
+    PRIMARY KEY (skill_id, position)
+);
+CREATE TABLE monster_skills (
+    monster_id INTEGER NOT NULL REFERENCES monsters(id),
+    position INTEGER NOT NULL,
+    skill_id INTEGER NOT NULL REFERENCES skills(id),
+    PRIMARY KEY (monster_id, position)
+);
+CREATE INDEX monsters_system ON monsters (system_id);
+CREATE INDEX monster_traits_trait ON monster_traits (trait_id, monster_id);
+CREATE INDEX resistances_lookup ON resistances (attribute, level, code, monster_id);
+CREATE INDEX techniques_sp ON techniques (sp_value);
+CREATE INDEX skills_name ON skills (name);
+CREATE INDEX skill_techniques_technique ON skill_techniques (technique_id);
+CREATE INDEX monster_skills_skill ON monster_skills (skill_id, monster_id);
+"""
+
+# 逆引きの区分 → 耐性コードの条件（軽減は半減、吸収・反射は無効扱い）
+_CATEGORY_CONDITIONS = {
+    "弱点": "code < 0",
+    "半減": "code BETWEEN 1 AND 2",
+    "無効": "code >= 3",
+}
+
+
+def _sp_value(sp: str) -> Optional[int]:
+    """SPの文字列を数値に変換（数値でなければ None）"""
+    return int(sp) if sp.isdigit() else None
+
+
+def write_store(monsters_data: Dict[str, Any], path: str = STORE_FILE):
+    """モンスターデータを SQLite データベースとして書き出す（一時ファイルから置き換え）"""
+    tmp_file = path + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    connection = sqlite3.connect(tmp_file)
+    try:
+        connection.executescript(SCHEMA)
+        systems = {}
+        traits = {}
+        skills = {}
+        techniques = {}
+        rows = {name: [] for name in ("monsters", "monster_traits", "resistances", "techniques",
+                                      "skills", "skill_techniques", "monster_skills")}
+
+        for monster_id, (name, data) in enumerate(monsters_data.items()):
+            system_id = systems.setdefault(data.get("系統", "未知"), len(systems))
+            resistance = data.get("耐性") or {}
+            text = resistance.get("説明") or None
+            rows["monsters"].append((monster_id, name, system_id, text))
+
+            for position, trait in enumerate(data.get("特性", [])):
+                rows["monster_traits"].append((monster_id, position, traits.setdefault(trait, len(traits))))
+
+            table = (resistance.get("表") or build_resistance_table(text)) if text else {}
+            for position, (attr, levels) in enumerate(table.items()):
+                for level, code in enumerate(levels):
+                    rows["resistances"].append((monster_id, position, attr, level, code))
+
+            for position, skill in enumerate(data.get("スキル", [])):
+                # 同名でも特技の並びが違うスキルがあるため、内容ごとに1件とする
+                key = (skill["スキル名"], tuple((t["技名"], t["SP"], t["効果"]) for t in skill["特技"]))
+                if key not in skills:
+                    skill_id = skills[key] = len(skills)
+                    rows["skills"].append((skill_id, key[0]))
+                    for technique_position, technique in enumerate(key[1]):
+                        if technique not in techniques:
+                            technique_id = techniques[technique] = len(techniques)
+                            technique_name, sp, effect = technique
+                            rows["techniques"].append((technique_id, technique_name, sp, _sp_value(sp), effect))
+                        rows["skill_techniques"].append((skill_id, technique_position, techniques[technique]))
+                rows["monster_skills"].append((monster_id, position, skills[key]))
+
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [("version", str(STORE_VERSION))])
+        connection.executemany("INSERT INTO systems VALUES (?, ?)", [(i, name) for name, i in systems.items()])
+        connection.executemany("INSERT INTO traits VALUES (?, ?)", [(i, name) for name, i in traits.items()])
+        for table_name, table_rows in rows.items():
+            if table_rows:
+                placeholders = ", ".join("?" * len(table_rows[0]))
+                connection.executemany(f"INSERT INTO {table_name} VALUES ({placeholders})", table_rows)
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    os.replace(tmp_file, path)
+
+
+def _monster_record(system: str, resistance_text: Optional[str], traits: List[str],
+                    resistance_rows: Iterable[Tuple[str, int]], skills: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """データベースの行から dqmj2_monsters.json と同じ形のモンスターデータを作る"""
+    resistance = {}
+    if resistance_text:
+        table = {}
+        for attr, code in resistance_rows:
+            table.setdefault(attr, []).append(code)
+        resistance = {"説明": resistance_text, "表": table}
+    return {"系統": system, "特性": traits, "耐性": resistance, "スキル": skills}
+
+
+class _StoreItemsView(ItemsView):
+    def __iter__(self):
+        return self._mapping._iter_records()
+
+
+class _StoreValuesView(ValuesView):
+    def __iter__(self):
+        return (data for _, data in self._mapping._iter_records())
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class MonsterStore(Mapping):
+    """SQLite データベースを モンスター名 → モンスターデータ の辞書として扱う
+
+    モンスターのデータは参照されるたびに dqmj2_monsters.json と同じ形の辞書へ展開する。
+    逆引き検索には monster_query.MonsterQueryIndex と同じ形の query を、索引を使った SQL で答える。
+    """
+
+    def __init__(self, path: str = STORE_FILE, signature: Optional[Tuple[int, int]] = None):
+        self.path = path
+        # 開いたファイルの版（更新時刻[ns], 大きさ）
+        self.signature = _file_signature(path)
+        if signature is not None and tuple(signature) != self.signature:
+            raise ValueError(f"データベースが書き換えられています: {path}")
+        # 読み取り専用で開く（Streamlit のスクリプト実行スレッドから使えるようにする）
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            version = self._connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.DatabaseError:
+            version = None
+        if version is None or version[0] != str(STORE_VERSION):
+            self._connection.close()
+            raise ValueError(f"対応していないデータベースです: {path}")
+        if _file_signature(path) != self.signature:
+            self._connection.close()
+            raise ValueError(f"開いている間にデータベースが書き換えられました: {path}")
+
+    def __reduce__(self):
+        # 複製するときはデータベースを開き直す（置き換えられて別の版になっていれば開かない）
+        return (MonsterStore, (self.path, self.signature))
+
+    def close(self):
+        """データベースを閉じる"""
+        self._connection.close()
+
+    def _column(self, sql: str, parameters: Iterable[Any] = ()) -> List[Any]:
+        return [row[0] for row in self._connection.execute(sql, tuple(parameters))]
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM monsters").fetchone()[0]
+
+    def __iter__(self):
+        return iter(self._column("SELECT name FROM monsters ORDER BY id"))
+
+    def __contains__(self, name) -> bool:
+        return self._connection.execute("SELECT 1 FROM monsters WHERE name = ?", (name,)).fetchone() is not None
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        row = self._connection.execute(
+            "SELECT monsters.id, systems.name, resistance_text FROM monsters "
+            "JOIN systems ON systems.id = monsters.system_id WHERE monsters.name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        monster_id, system, resistance_text = row
+
+        resistance_rows = self._connection.execute(
+            "SELECT attribute, code FROM resistances WHERE monster_id = ? ORDER BY position, level", (monster_id,))
+        skills = {}
+        for skill_id, skill_name, technique, sp, effect in self._connection.execute(
+                "SELECT skills.id, skills.name, techniques.name, sp, effect FROM monster_skills "
+                "JOIN skills ON skills.id = monster_skills.skill_id "
+                "LEFT JOIN skill_techniques ON skill_techniques.skill_id = skills.id "
+                "LEFT JOIN techniques ON techniques.id = skill_techniques.technique_id "
+                "WHERE monster_id = ? ORDER BY monster_skills.position, skill_techniques.position", (monster_id,)):
+            skill = skills.setdefault(skill_id, {"スキル名": skill_name, "特技": []})
+            if technique is not None:  # 特技のないスキル
+                skill["特技"].append({"技名": technique, "SP": sp, "効果": effect})
+
+        traits = self._column("SELECT traits.name FROM monster_traits JOIN traits ON traits.id = trait_id "
+                              "WHERE monster_id = ? ORDER BY position", (monster_id,))
+        return _monster_record(system, resistance_text, traits, resistance_rows, list(skills.values()))
+
+    def items(self):
+        return _StoreItemsView(self)
+
+    def values(self):
+        return _StoreValuesView(self)
+
+    def _rows_by_monster(self, sql: str):
+        """monster_id の順に並べた行を読み進め、指定したモンスターの行（monster_id を除く列）を返す関数を作る
+
+        モンスターの id の昇順に呼び出すこと。
+        """
+        groups = groupby(self._connection.execute(sql), key=itemgetter(0))
+        current = next(groups, None)
+
+        def rows_of(monster_id: int) -> List[Tuple[Any, ...]]:
+            nonlocal current
+            if current is None or current[0] != monster_id:
+                return []
+            rows = [row[1:] for row in current[1]]
+            current = next(groups, None)
+            return rows
+
+        return rows_of
+
+    def _iter_records(self):
+        """全モンスターの (名前, データ) をデータファイルの並び順で返す
+
+        モンスターごとに問い合わせず、表ごとに1回ずつ monster_id の順に読み進めて組み立てる。
+        スキルは同じ内容のスキルで1つの辞書を共有する（読み取り専用として扱うこと）。
+        """
+        catalog = {}
+        for skill_id, skill_name, technique, sp, effect in self._connection.execute(
+                "SELECT skills.id, skills.name, techniques.name, sp, effect FROM skills "
+                "LEFT JOIN skill_techniques ON skill_techniques.skill_id = skills.id "
+                "LEFT JOIN techniques ON techniques.id = skill_techniques.technique_id "
+                "ORDER BY skills.id, skill_techniques.position"):
+            skill = catalog.setdefault(skill_id, {"スキル名": skill_name, "特技": []})
+            if technique is not None:  # 特技のないスキル
+                skill["特技"].append({"技名": technique, "SP": sp, "効果": effect})
+
+        traits_of = self._rows_by_monster(
+            "SELECT monster_id, traits.name FROM monster_traits JOIN traits ON traits.id = trait_id "
+            "ORDER BY monster_id, position")
+        resistances_of = self._rows_by_monster(
+            "SELECT monster_id, attribute, code FROM resistances ORDER BY monster_id, position, level")
+        skills_of = self._rows_by_monster(
+            "SELECT monster_id, skill_id FROM monster_skills ORDER BY monster_id, position")
+        for monster_id, name, system, resistance_text in self._connection.execute(
+                "SELECT monsters.id, monsters.name, systems.name, resistance_text FROM monsters "
+                "JOIN systems ON systems.id = monsters.system_id ORDER BY monsters.id"):
+            traits = [trait for trait, in traits_of(monster_id)]
+            skills = [catalog[skill_id] for skill_id, in skills_of(monster_id)]
+            yield name, _monster_record(system, resistance_text, traits, resistances_of(monster_id), skills)
+
+    @property
+    def attributes(self) -> List[str]:
+        """耐性表に現れる属性（出現数の多い順）"""
+        return self._column("SELECT attribute FROM resistances WHERE level = 0 "
+                            "GROUP BY attribute ORDER BY COUNT(*) DESC, MIN(monster_id)")
+
+    @property
+    def systems(self) -> List[str]:
+        return self._column("SELECT name FROM systems ORDER BY id")
+
+    @property
+    def system_counts(self) -> Dict[str, int]:
+        """系統 → モンスター数"""
+        return dict(self._connection.execute(
+            "SELECT systems.name, COUNT(*) FROM monsters JOIN systems ON systems.id = monsters.system_id "
+            "GROUP BY system_id ORDER BY system_id"))
+
+    @property
+    def traits(self) -> List[str]:
+        return self._column("SELECT name FROM traits ORDER BY id")
+
+    @property
+    def skills(self) -> List[str]:
+        return self._column("SELECT DISTINCT name FROM skills ORDER BY id")
+
+    @property
+    def sp_range(self) -> Tuple[int, int]:
+        """特技のSPの最小値と最大値（SPが数値の特技がなければ (0, 0)）"""
+        low, high = self._connection.execute("SELECT MIN(sp_value), MAX(sp_value) FROM techniques").fetchone()
+        return (low, high) if low is not None else (0, 0)
+
+    def query(self, attr: Optional[str] = None, category: Optional[str] = None, resistance_level: str = "通常",
+              trait: Optional[str] = None, skill: Optional[str] = None, systems: Optional[Iterable[str]] = None,
+              sp_min: Optional[int] = None, sp_max: Optional[int] = None) -> List[str]:
+        """条件をすべて満たすモンスター名のリストを返す（データファイルの並び順）
+
+        指定しなかった条件は絞り込みに使わない。sp_min / sp_max は、その範囲のSPで覚える特技があるかで絞り込む。
+        """
+        conditions = []
+        parameters = []
+        if attr and category:
+            level = RESISTANCE_LEVELS.index(resistance_level)
+            if category == "通常":
+                # 耐性表に載っていない属性は通常扱い
+                conditions.append("resistance_text IS NOT NULL AND id NOT IN (SELECT monster_id FROM resistances "
+                                  "WHERE attribute = ? AND level = ? AND code != 0)")
+            else:
+                conditions.append("id IN (SELECT monster_id FROM resistances WHERE attribute = ? AND level = ? "
+                                  f"AND {_CATEGORY_CONDITIONS[category]})")
+            parameters += [attr, level]
+        if trait:
+            conditions.append("id IN (SELECT monster_id FROM monster_traits JOIN traits ON traits.id = trait_id "
+                              "WHERE traits.name = ?)")
+            parameters.append(trait)
+        if skill:
+            conditions.append("id IN (SELECT monster_id FROM monster_skills JOIN skills ON skills.id = skill_id "
+                              "WHERE skills.name = ?)")
+            parameters.append(skill)
+        systems = list(systems or [])
+        if systems:
+            placeholders = ", ".join("?" * len(systems))
+            conditions.append(f"system_id IN (SELECT id FROM systems WHERE name IN ({placeholders}))")
+            parameters += systems
+        if sp_min is not None or sp_max is not None:
+            conditions.append("id IN (SELECT monster_id FROM monster_skills "
+                              "JOIN skill_techniques ON skill_techniques.skill_id = monster_skills.skill_id "
+                              "JOIN techniques ON techniques.id = technique_id WHERE sp_value BETWEEN ? AND ?)")
+            parameters += [sp_min if sp_min is not None else 0, sp_max if sp_max is not None else sys.maxsize]
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return self._column(f"SELECT name FROM monsters{where} ORDER BY id", parameters)
+
+
+def open_store(path: str = STORE_FILE) -> MonsterStore:
+    """SQLite データベースを読み取り専用で開く"""
+    return MonsterStore(path)
+
+
+def main(argv=None):
+    """JSONファイルから SQLite データベースを作成"""
+    argv = sys.argv[1:] if argv is None else argv
+    source = argv[0] if argv else DATA_FILE
+    target = argv[1] if len(argv) > 1 else STORE_FILE
+    monsters_data = load_monster_data(source)
+    if not monsters_data:
+        print(f"モンスターデータが見つかりません: {source}")
+        return 1
+    write_store(monsters_data, target)
+    print(f"{len(monsters_data)}体のモンスターデータを{target}に保存しました（{os.path.getsize(target):,} バイト）")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
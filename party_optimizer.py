@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DQMJ2 パーティー編成の探索
+
+想定する敵の攻撃（脅威プロファイル: 属性 → 重み）に対して、弱点が重なりにくい
+パーティーを全モンスターの組み合わせから探す。各モンスターの弱点・耐性はビット列で持ち、
+分枝限定法で見込みのない組み合わせを打ち切る。必要なら複数プロセスで探索する。
+
+使い方:
+    python party_optimizer.py --threat メラ:2 ギラ ザキ --level 強 --top 10
+"""
+
+import argparse
+import heapq
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from monster_analysis import ANALYSIS_ATTRIBUTES, build_resistance_matrix
+from monster_attack import ATTRIBUTE_ALIASES
+from monster_dataset import DATA_FILE, RES_NORMAL, RESISTANCE_LEVELS, load_monster_data
+
+# 評価の重み（弱点持ちがいる属性、2体以上が弱点の属性、3体以上が弱点の属性、
+# 誰も耐性を持たない属性、耐性持ちが1体以下の属性）
+WEAK_PENALTY = 1.0
+SHARED_PENALTY = 2.0
+TRIPLE_PENALTY = 3.0
+UNCOVERED_PENALTY = 0.5
+THIN_PENALTY = 0.25
+
+DEFAULT_PARTY_SIZE = 3
+DEFAULT_TOP = 10
+
+
+class PartyProblem:
+    """パーティー編成の問題
+
+    候補モンスターごとに、脅威プロファイルの属性の 弱点ビット列 と 耐性（半減以上）ビット列 を持つ。
+    ビット列の重みの合計はバイトごとの表引きで求める。
+    """
+
+    def __init__(self, names: List[str], weak_bits: np.ndarray, resist_bits: np.ndarray, weights: List[float]):
+        self.names = names
+        self.weak_bits = weak_bits
+        self.resist_bits = resist_bits
+        self.weights = weights
+        self.full_mask = (1 << len(weights)) - 1
+        # バイト位置ごとの 256 通りの重みの合計
+        self.byte_tables = []
+        for offset in range(0, len(weights), 8):
+            chunk = weights[offset:offset + 8]
+            table = np.zeros(256)
+            for value in range(256):
+                table[value] = sum(weight for bit, weight in enumerate(chunk) if value >> bit & 1)
+            self.byte_tables.append(table)
+
+    def weight(self, bits):
+        """ビット列（整数または整数の配列）に立っている属性の重みの合計"""
+        bits = np.asarray(bits, dtype=np.int64)
+        total = np.zeros(bits.shape)
+        for i, table in enumerate(self.byte_tables):
+            total = total + table[(bits >> (8 * i)) & 0xFF]
+        return total
+
+    def cost(self, ge1, ge2, ge3, resisted1, resisted2):
+        """パーティーの評価値（小さいほど良い）
+
+        ge1 / ge2 / ge3 は弱点持ちが 1 / 2 / 3 体以上の属性、resisted1 / resisted2 は
+        耐性持ちが 1 / 2 体以上の属性のビット列。
+        """
+        return (WEAK_PENALTY * self.weight(ge1) + SHARED_PENALTY * self.weight(ge2)
+                + TRIPLE_PENALTY * self.weight(ge3)
+                + UNCOVERED_PENALTY * self.weight(~np.asarray(resisted1, dtype=np.int64) & self.full_mask)
+                + THIN_PENALTY * self.weight(~np.asarray(resisted2, dtype=np.int64) & self.full_mask))
+
+
+def build_party_problem(monsters_data: Dict[str, Any], threat: Dict[str, float], resistance_level: str = "通常",
+                        candidates: Optional[Sequence[str]] = None) -> PartyProblem:
+    """モンスターデータと脅威プロファイルから探索問題を作成（耐性情報のないモンスターは候補外）"""
+    attributes = list(threat)
+    if candidates is not None:
+        monsters_data = {name: monsters_data[name] for name in candidates if name in monsters_data}
+    matrix = build_resistance_matrix(monsters_data, attributes, ATTRIBUTE_ALIASES)
+    rows = np.flatnonzero(matrix.has_info)
+    codes = matrix.codes[rows, :, RESISTANCE_LEVELS.index(resistance_level)].astype(np.int64)
+
+    bit_values = np.int64(1) << np.arange(len(attributes), dtype=np.int64)
+    weak_bits = ((codes < RES_NORMAL) * bit_values).sum(axis=1)
+    resist_bits = ((codes > RES_NORMAL) * bit_values).sum(axis=1)
+
+    # 単体で弱点の重みが小さい順に並べると、良い解が早く見つかり打ち切りが効く
+    problem = PartyProblem([], weak_bits, resist_bits, [float(threat[attr]) for attr in attributes])
+    order = np.argsort(problem.weight(weak_bits), kind="stable")
+    problem.names = [matrix.names[rows[i]] for i in order]
+    problem.weak_bits = weak_bits[order]
+    problem.resist_bits = resist_bits[order]
+    return problem
+
+
+def _search(problem: PartyProblem, party_size: int, top: int, required: Sequence[int],
+            first_members: Sequence[int]) -> List[Tuple[float, Tuple[int, ...]]]:
+    """分枝限定法で評価値の小さい top 件のパーティーを探す（先頭のメンバーを first_members に限る）"""
+    best = []  # (-評価値, パーティー) の最大ヒープ
+    count = len(problem.names)
+    weak_bits = problem.weak_bits
+    resist_bits = problem.resist_bits
+
+    def threshold():
+        return -best[0][0] if len(best) >= top else np.inf
+
+    def bound(ge1, ge2, ge3):
+        # メンバーを足しても弱点の重なりは減らないので、ここまでの弱点の分が下限になる
+        return float(problem.cost(ge1, ge2, ge3, problem.full_mask, problem.full_mask))
+
+    def extend(members, start, ge1, ge2, ge3, r1, r2):
+        if bound(ge1, ge2, ge3) >= threshold():
+            return
+        if len(members) == party_size - 1:
+            # 最後のメンバーは残りの候補をまとめて配列演算で評価する
+            last = np.arange(start, count)
+            last = last[~np.isin(last, members)]
+            if len(last) == 0:
+                return
+            w = weak_bits[last]
+            r = resist_bits[last]
+            costs = problem.cost(ge1 | w, ge2 | (ge1 & w), ge3 | (ge2 & w), r1 | r, r2 | (r1 & r))
+            limit = threshold()
+            for i in np.flatnonzero(costs < limit)[np.argsort(costs[costs < limit], kind="stable")]:
+                if costs[i] >= threshold():
+                    break
+                party = tuple(sorted(members + [int(last[i])]))
+                entry = (-float(costs[i]), party)
+                if len(best) < top:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heappushpop(best, entry)
+            return
+        for member in range(start, count):
+            if member in members:
+                continue
+            w = int(weak_bits[member])
+            r = int(resist_bits[member])
+            extend(members + [member], member + 1, ge1 | w, ge2 | (ge1 & w), ge3 | (ge2 & w), r1 | r, r2 | (r1 & r))
+
+    # 必須メンバーを先に入れる
+    ge1 = ge2 = ge3 = r1 = r2 = 0
+    for member in required:
+        w = int(weak_bits[member])
+        r = int(resist_bits[member])
+        ge1, ge2, ge3 = ge1 | w, ge2 | (ge1 & w), ge3 | (ge2 & w)
+        r1, r2 = r1 | r, r2 | (r1 & r)
+    members = list(required)
+
+    if len(members) >= party_size:
+        cost = float(problem.cost(ge1, ge2, ge3, r1, r2))
+        return [(cost, tuple(sorted(members)))]
+
+    if len(members) == party_size - 1:
+        extend(members, 0, ge1, ge2, ge3, r1, r2)
+        return sorted((-cost, party) for cost, party in best)
+
+    for first in first_members:
+        if first in members:
+            continue
+        w = int(weak_bits[first])
+        r = int(resist_bits[first])
+        extend(members + [first], first + 1, ge1 | w, ge2 | (ge1 & w), ge3 | (ge2 & w), r1 | r, r2 | (r1 & r))
+
+    return sorted((-cost, party) for cost, party in best)
+
+
+def optimize_party(monsters_data: Dict[str, Any], threat: Dict[str, float], resistance_level: str = "通常",
+                   party_size: int = DEFAULT_PARTY_SIZE, top: int = DEFAULT_TOP,
+                   required: Sequence[str] = (), candidates: Optional[Sequence[str]] = None,
+                   workers: int = 1) -> List[Dict[str, Any]]:
+    """脅威プロファイルに対して弱点が重なりにくいパーティーを評価値の良い順に top 件返す
+
+    workers が 2 以上の場合は、先頭のメンバーごとに分けて複数プロセスで探索する。
+    """
+    problem = build_party_problem(monsters_data, threat, resistance_level, candidates)
+    rows = {name: row for row, name in enumerate(problem.names)}
+    required_rows = [rows[name] for name in required if name in rows]
+    free_slots = party_size - len(required_rows)
+    if free_slots > len(problem.names) - len(required_rows):
+        return []
+
+    if workers > 1 and free_slots > 1:
+        # 先頭のメンバーを交互に振り分けて、各プロセスの負荷をそろえる
+        chunks = [list(range(worker, len(problem.names), workers)) for worker in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_search, problem, party_size, top, required_rows, chunk) for chunk in chunks]
+            results = [result for future in futures for result in future.result()]
+        results = sorted(set(results))[:top]
+    else:
+        results = _search(problem, party_size, top, required_rows, range(len(problem.names)))
+
+    return [describe_party(problem, threat, party, cost) for cost, party in results]
+
+
+def describe_party(problem: PartyProblem, threat: Dict[str, float], party: Tuple[int, ...], cost: float) -> Dict[str, Any]:
+    """探索結果のパーティーを、属性ごとの弱点・耐性の数つきでまとめる"""
+    details = {}
+    for bit, attr in enumerate(threat):
+        details[attr] = {
+            "弱点": sum(1 for member in party if problem.weak_bits[member] >> bit & 1),
+            "耐性": sum(1 for member in party if problem.resist_bits[member] >> bit & 1),
+        }
+    return {
+        "パーティー": [problem.names[member] for member in party],
+        "評価値": round(cost, 3),
+        "属性": details,
+    }
+
+
+def parse_threat(values: Optional[Sequence[str]]) -> Dict[str, float]:
+    """「メラ:2」形式の指定を 属性 → 重み に変換（重みを省略すると 1、指定がなければ主要属性すべて）"""
+    if not values:
+        return {attr: 1.0 for attr in ANALYSIS_ATTRIBUTES}
+    threat = {}
+    for value in values:
+        attr, _, weight = value.partition(":")
+        threat[attr] = float(weight) if weight else 1.0
+    return threat
+
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="DQMJ2 パーティー編成の探索")
+    parser.add_argument("--data", default=DATA_FILE,
+                        help=f"モンスターデータのファイル（デフォルト: {DATA_FILE}）")
+    parser.add_argument("--threat", nargs="*",
+                        help="想定する敵の攻撃の属性（「メラ:2」のように重みを指定可能。省略時は主要属性すべて）")
+    parser.add_argument("--level", choices=RESISTANCE_LEVELS, default="通常",
+                        help="パーティーの耐性レベル（デフォルト: 通常）")
+    parser.add_argument("--size", type=int, default=DEFAULT_PARTY_SIZE,
+                        help=f"パーティーの人数（デフォルト: {DEFAULT_PARTY_SIZE}）")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"表示する候補の数（デフォルト: {DEFAULT_TOP}）")
+    parser.add_argument("--require", nargs="*", default=[],
+                        help="必ずパーティーに入れるモンスター")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="探索に使うプロセス数（デフォルト: 1）")
+    parser.add_argument("--json", action="store_true",
+                        help="結果を JSON で出力")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """メイン関数"""
+    args = parse_args(argv)
+    monsters_data = load_monster_data(args.data)
+    if not monsters_data:
+        print(f"モンスターデータが見つかりません: {args.data}")
+        return 1
+
+    threat = parse_threat(args.threat)
+    unknown = [name for name in args.require if name not in monsters_data]
+    if unknown:
+        print(f"モンスターが見つかりません: {'、'.join(unknown)}")
+        return 1
+
+    results = optimize_party(monsters_data, threat, args.level, args.size, args.top, args.require,
+                             workers=args.workers)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"脅威: {'、'.join(f'{attr}×{weight:g}' for attr, weight in threat.items())}（耐性レベル: {args.level}）")
+    for rank, result in enumerate(results, 1):
+        weak = [attr for attr, detail in result["属性"].items() if detail["弱点"] >= 2]
+        print(f"{rank:2d}. {' / '.join(result['パーティー'])}  評価値: {result['評価値']}"
+              + (f"  （重なる弱点: {'、'.join(weak)}）" if weak else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
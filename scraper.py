@@ -2,264 +2,867 @@
 DQMJ2 モンスターデータスクレイピングツール
 
 Webサイトから全モンスターのデータを取得してJSONファイルに保存するスクリプト
+
+requests / BeautifulSoup などの重いライブラリは取得・解析を行う関数の中で
+読み込むため、データを読むだけの用途では import のコストがかからない。
 """
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import functools
+import hashlib
 import json
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
 import time
+import zipfile
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from monster_dataset import DATA_FILE, catalog_variants, iter_monster_records, load_monster_data, write_monster_data
+from monster_parser import DEFAULT_BACKEND, PARSER_BACKENDS, parse_monster_page
+from monster_snapshot import write_snapshot
+from monster_store import write_store
 
 # --- データ取得（スクレイピング）設定 ---
 BASE_URL = "http://capch.net/dqmj2/book/"
-DATA_FILE = "dqmj2_monsters.json"
 
-def scrape_monster_data():
-    """Webサイトから全モンスターのデータを取得してJSONファイルに保存する"""
+# 詳細ページの同時取得数と、1秒あたりのリクエスト数上限（サーバーへの負荷軽減）
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 10.0
+
+# HTTP通信の設定（タイムアウト秒数、リトライ回数、リトライ間隔の係数）
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# 解析ステージのプロセス数（None でCPUコア数、1 でメインプロセス内で解析）
+DEFAULT_PARSE_WORKERS = None
+
+# ページキャッシュの保存先（ETag/Last-Modified による差分取得に使用）
+DEFAULT_CACHE_DIR = ".page_cache"
+
+# 取得・解析の済んだモンスターを追記するチェックポイント（出力先のJSONファイル名に付ける）
+CHECKPOINT_SUFFIX = ".partial.jsonl"
+CHECKPOINT_VERSION = 1
+
+# 全系統のプレフィックスを定義
+# DQMJ2の系統: 自然・魔獣・物質・悪魔・ドラゴン・スライム・ゾンビ・？？？・特殊系
+SYSTEM_PREFIXES = {
+    'si': '自然系',
+    'm': '魔獣系',
+    'b': '物質系',
+    'a': '悪魔系',
+    'd': 'ドラゴン系',
+    'sr': 'スライム系',
+    'z': 'ゾンビ系',
+    'p': '？？？系',
+    'x': '特殊系（魔王）',
+    'k': '特殊系（神獣）'
+}
+
+class TokenBucket:
+    """トークンバケット方式のレートリミッタ（スレッドセーフ）
+
+    rate 個/秒でトークンが補充され、最大 capacity 個まで貯まる。
+    rate が 0 以下の場合は制限しない。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ消費する（足りなければ補充されるまで待機）"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def create_session(pool_size: int = DEFAULT_CONCURRENCY, retries: int = DEFAULT_RETRIES,
+                   backoff: float = DEFAULT_BACKOFF):
+    """コネクションプールとリトライ設定を持つ共有セッション (requests.Session) を作成
+
+    接続エラー・タイムアウト・5xx応答は backoff * 2^n 秒の間隔で最大 retries 回再試行する。
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PageCache:
+    """URLをキーにページ本文と ETag / Last-Modified を保存するディスクキャッシュ
+
+    cache_dir/index.json に URL ごとの検証情報を、cache_dir/pages/ に本文を保存する。
+    更新内容は save() を呼ぶまでディスクに反映しない。
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._index_file = os.path.join(cache_dir, "index.json")
+        self._pages_dir = os.path.join(cache_dir, "pages")
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._unchanged = set()
+        try:
+            with open(self._index_file, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._index = {}
+
+    def _page_path(self, url: str) -> str:
+        return os.path.join(self._pages_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html")
+
+    def validators(self, url: str) -> dict:
+        """条件付きリクエスト用のヘッダーを返す"""
+        with self._lock:
+            entry = self._index.get(url)
+        if not entry or not os.path.exists(self._page_path(url)):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, url: str) -> bytes:
+        """キャッシュ済みの本文を返す"""
+        with self._lock:
+            if url in self._pending:
+                return self._pending[url]
+        with open(self._page_path(url), "rb") as f:
+            return f.read()
+
+    def store(self, url: str, content: bytes, etag=None, last_modified=None):
+        """取得した本文と検証情報を記録（前回の対応モンスター名は破棄）"""
+        with self._lock:
+            self._pending[url] = content
+            self._index[url] = {"etag": etag, "last_modified": last_modified}
+
+    def mark_unchanged(self, url: str):
+        with self._lock:
+            self._unchanged.add(url)
+
+    def is_unchanged(self, url: str) -> bool:
+        """今回の実行で 304 Not Modified が返されたURLかどうか"""
+        with self._lock:
+            return url in self._unchanged
+
+    def monster_name(self, url: str):
+        """前回このURLから取得したモンスター名"""
+        with self._lock:
+            return self._index.get(url, {}).get("name")
+
+    def set_monster_name(self, url: str, name: str):
+        with self._lock:
+            if url in self._index:
+                self._index[url]["name"] = name
+
+    def save(self):
+        """保留中の本文と索引をディスクに書き出す"""
+        os.makedirs(self._pages_dir, exist_ok=True)
+        with self._lock:
+            for url, content in self._pending.items():
+                with open(self._page_path(url), "wb") as f:
+                    f.write(content)
+            self._pending.clear()
+            tmp_file = self._index_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(tmp_file, self._index_file)
+
+
+def fetch_page(url: str, session=None, timeout: float = DEFAULT_TIMEOUT, cache: PageCache = None) -> bytes:
+    """1ページを取得して本文を返す
+
+    cache を渡した場合は条件付きリクエストを送り、304 Not Modified なら
+    キャッシュ済みの本文を返す。
+    """
+    import requests
+
+    headers = cache.validators(url) if cache else {}
+    response = (session or requests).get(url, timeout=timeout, headers=headers)
+    if cache and headers and response.status_code == 304:
+        cache.mark_unchanged(url)
+        return cache.load(url)
+    response.raise_for_status()
+    if cache:
+        cache.store(url, response.content,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"))
+    return response.content
+
+
+def archive_name(url: str, base_url: str = BASE_URL) -> str:
+    """URLをアーカイブ内のファイル名に変換（図鑑トップページは index.html）"""
+    name = url[len(base_url):] if url.startswith(base_url) else url.rsplit("/", 1)[-1]
+    return name or "index.html"
+
+
+class PageArchive:
+    """取得済みHTMLのアーカイブ（ディレクトリ / zip / tar）からページを読み出す
+
+    ファイル名は archive_name() の形式。アーカイブ内の最上位ディレクトリは無視する。
+    ネットワークには一切アクセスしない。
+    """
+
+    def __init__(self, path: str, base_url: str = BASE_URL):
+        self.path = path
+        self.base_url = base_url
+        self._lock = threading.Lock()
+        self._members = {}
+        if os.path.isdir(path):
+            self._kind = "dir"
+        elif zipfile.is_zipfile(path):
+            self._kind = "zip"
+            self._archive = zipfile.ZipFile(path)
+            for member in self._archive.namelist():
+                self._add_member(member, member)
+        elif tarfile.is_tarfile(path):
+            self._kind = "tar"
+            self._archive = tarfile.open(path)
+            for member in self._archive.getmembers():
+                if member.isfile():
+                    self._add_member(member.name, member)
+        else:
+            raise ValueError(f"アーカイブ形式を判別できません: {path}")
+
+    def _add_member(self, name: str, member):
+        parts = name.strip("/").split("/")
+        self._members.setdefault("/".join(parts), member)
+        if len(parts) > 1:
+            self._members.setdefault("/".join(parts[1:]), member)
+
+    def fetch(self, url: str) -> bytes:
+        """URLに対応するページ本文を返す（見つからない場合は FileNotFoundError）"""
+        name = archive_name(url, self.base_url)
+        if self._kind == "dir":
+            with open(os.path.join(self.path, name), "rb") as f:
+                return f.read()
+        member = self._members.get(name)
+        if member is None:
+            raise FileNotFoundError(f"アーカイブにページがありません: {name}")
+        with self._lock:
+            if self._kind == "zip":
+                return self._archive.read(member)
+            return self._archive.extractfile(member).read()
+
+    def close(self):
+        if self._kind != "dir":
+            self._archive.close()
+
+
+class PageArchiveWriter:
+    """取得したページを PageArchive で読めるアーカイブとして保存する
+
+    path の拡張子が .zip なら zip、.tar / .tar.gz / .tgz なら tar、それ以外はディレクトリ。
+    ページは close() 時にまとめて書き出す。
+    """
+
+    def __init__(self, path: str, base_url: str = BASE_URL):
+        self.path = path
+        self.base_url = base_url
+        self._lock = threading.Lock()
+        self._pages = {}
+
+    def wrap(self, fetch):
+        """fetch 関数をラップし、取得したページを記録する"""
+        def capturing_fetch(url):
+            content = fetch(url)
+            with self._lock:
+                self._pages[archive_name(url, self.base_url)] = content
+            return content
+        return capturing_fetch
+
+    def close(self):
+        """記録したページを書き出す"""
+        with self._lock:
+            pages = sorted(self._pages.items())
+        if self.path.endswith(".zip"):
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for name, content in pages:
+                    archive.writestr(name, content)
+        elif self.path.endswith((".tar", ".tar.gz", ".tgz")):
+            mode = "w" if self.path.endswith(".tar") else "w:gz"
+            with tarfile.open(self.path, mode) as archive:
+                for name, content in pages:
+                    info = tarfile.TarInfo(name)
+                    info.size = len(content)
+                    info.mtime = int(time.time())
+                    archive.addfile(info, io.BytesIO(content))
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            for name, content in pages:
+                with open(os.path.join(self.path, name), "wb") as f:
+                    f.write(content)
+        print(f"{len(pages)}ページを {self.path} に保存しました")
+
+
+class ScrapeCheckpoint:
+    """取得・解析の済んだモンスターを1行ずつ追記する JSONL のチェックポイント
+
+    1行目は取得元などの情報、2行目以降は {"url": 詳細ページのURL, "name": モンスター名, "data": データ}。
+    中断したあと同じ条件で再実行すると、記録済みのURLは取得・解析せずに再開する。
+    メモリには URL ごとの モンスター名・系統・行の位置 だけを持ち、データは書き出すときに読み直す。
+    """
+
+    def __init__(self, path: str, header: dict, resume: bool = True):
+        self.path = path
+        self._entries = {}  # URL → (モンスター名, 系統, 行の位置)
+        header = {"checkpoint": CHECKPOINT_VERSION, **header}
+        end = self._load(header) if resume else 0
+        if end == 0:
+            with open(path, "wb") as f:
+                f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+        else:
+            # 中断時に書きかけだった最後の行を捨てる
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        self._file = open(path, "ab")
+
+    def _load(self, header: dict) -> int:
+        """既存のチェックポイントを読み、有効な行の終わりの位置を返す（使えなければ 0）"""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            try:
+                if json.loads(f.readline()) != header:
+                    return 0
+            except ValueError:
+                return 0
+            end = f.tell()
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._entries[entry["url"]] = (entry["name"], entry["data"].get("系統", "未知"), end)
+                end = f.tell()
+        return end
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def name(self, url: str) -> str:
+        return self._entries[url][0]
+
+    def system(self, url: str) -> str:
+        return self._entries[url][1]
+
+    def add(self, url: str, name: str, data: dict):
+        """モンスターを1体記録する（すぐにファイルへ書き出す）"""
+        offset = self._file.tell()
+        self._file.write(json.dumps({"url": url, "name": name, "data": data}, ensure_ascii=False).encode("utf-8")
+                         + b"\n")
+        self._file.flush()
+        self._entries[url] = (name, data.get("系統", "未知"), offset)
+
+    def monsters(self, urls):
+        """記録済みの urls のモンスターを (モンスター名, データ) の順に読み出す
+
+        同じ名前のモンスターが複数のURLにある場合は、最初の位置に最後のデータを置く（辞書に順に入れた場合と同じ）。
+        """
+        order = {}
+        for url in urls:
+            if url in self._entries:
+                order[self._entries[url][0]] = url
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            for name, url in order.items():
+                f.seek(self._entries[url][2])
+                yield name, json.loads(f.readline())["data"]
+
+    def close(self):
+        if not self._file.closed:
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def remove(self):
+        """出力先へ書き出し終えたチェックポイントを削除"""
+        self.close()
+        os.remove(self.path)
+
+
+def iter_fetched_pages(urls, fetch=fetch_page, concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE):
+    """複数ページを並行して取得し、取得が完了した順に (インデックス, 結果) を返す
+
+    結果は本文（bytes）か、取得に失敗した場合はその例外オブジェクト。
+    """
+    limiter = TokenBucket(rate)
+
+    def fetch_one(url):
+        limiter.acquire()
+        try:
+            return fetch(url)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(fetch_one, url): index for index, url in enumerate(urls)}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # 途中で打ち切られた場合は、まだ始まっていない取得を取り消す
+            executor.shutdown(cancel_futures=True)
+
+
+def fetch_pages(urls, fetch=fetch_page, concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE):
+    """複数ページを並行して取得する
+
+    取得結果は urls と同じ順序のリストで返す。各要素は本文（bytes）か、
+    取得に失敗した場合はその例外オブジェクト。
+    """
+    pages = [None] * len(urls)
+    for index, page in iter_fetched_pages(urls, fetch, concurrency, rate):
+        pages[index] = page
+    return pages
+
+
+class SerialExecutor(Executor):
+    """submit() の時点で呼び出し元のプロセス内で実行する Executor"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def create_parse_executor(workers=DEFAULT_PARSE_WORKERS) -> Executor:
+    """解析ステージ用の Executor を作成（workers が 1 ならプロセスプールを使わない）"""
+    if workers == 1:
+        return SerialExecutor()
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def collect_monster_links(top_content: bytes):
+    """図鑑トップページから (リンク, 系統名) の一覧を取得"""
+    from bs4 import BeautifulSoup
+
+    top_soup = BeautifulSoup(top_content, 'html.parser')
+
+    all_monster_links = []
+    for prefix, system_name in SYSTEM_PREFIXES.items():
+        # 各系統のモンスターを取得
+        system_links = [a['href'] for a in top_soup.select(f'a[href^="{prefix}-"]') if a['href'].endswith('.html')]
+        print(f"{system_name}: {len(system_links)} 体のモンスターを発見")
+        all_monster_links.extend([(link, system_name) for link in system_links])
+    return all_monster_links
+
+
+def read_monster_names(data_file: str) -> set:
+    """JSONファイルのモンスター名の集合（データは1体ずつ読み捨てる。ファイルがない・壊れている場合は空）"""
+    try:
+        return {name for name, _ in iter_monster_records(data_file)}
+    except ValueError:
+        return set()
+
+
+def report_failed_urls(failed_urls):
+    """最終的に取得・解析できなかったURLの一覧を表示"""
+    print(f"\n=== 取得・解析に失敗したURL ({len(failed_urls)}件) ===")
+    for url, error in failed_urls:
+        print(f"  {url} - {error}")
+
+
+def scrape_monster_data(base_url: str = BASE_URL, data_file: str = DATA_FILE,
+                        concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                        timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                        backoff: float = DEFAULT_BACKOFF, allow_partial: bool = False,
+                        cache_dir: str = DEFAULT_CACHE_DIR, replay: str = None,
+                        capture: str = None, parse_workers=DEFAULT_PARSE_WORKERS,
+                        parse_only: bool = False, backend: str = DEFAULT_BACKEND,
+                        snapshot_file: str = None, store_file: str = None, legacy_format: bool = False,
+                        resume: bool = True):
+    """Webサイトから全モンスターのデータを取得してJSONファイルに保存する
+
+    詳細ページは最大 concurrency 件を並行して取得し、リクエスト開始は
+    rate 件/秒に制限する。出力順は図鑑トップページのリンク順で固定。
+
+    リトライ後も取得できないページや解析に失敗したページがあった場合は失敗したURLを表示し、
+    allow_partial が False なら不完全なJSONファイルは書き出さない。
+
+    cache_dir を指定した場合は条件付きリクエストで差分取得し、前回から
+    変更のないページは解析せず既存のJSONファイルのデータを再利用する。
+
+    replay を指定した場合はネットワークにアクセスせず、そのアーカイブ
+    （ディレクトリ / zip / tar）のHTMLから再構築する。capture を指定した
+    場合は取得した全ページをアーカイブとして保存する。
+
+    詳細ページの解析は parse_workers 個のプロセスで行い、取得の完了した
+    ページから順に解析を始める。parse_only の場合はネットワークを使わず
+    アーカイブ（未指定ならページキャッシュ）の全ページを読み込んでから
+    解析し、解析ステージの所要時間を表示する（チェックポイントや
+    JSONファイルなどの出力先は読み書きしない）。backend には解析に使う
+    monster_parser.PARSER_BACKENDS のキーを指定する。
+
+    snapshot_file を指定した場合は、JSONファイルと同じ内容のバイナリ
+    スナップショット（monster_snapshot.py）も、store_file を指定した場合は
+    SQLite データベース（monster_store.py）も書き出す。
+
+    JSONファイルはスキル一覧を一度だけ持ち、モンスターはスキル番号で参照する
+    形式（monster_dataset.normalize_monster_data）で書き出す。legacy_format の
+    場合は各モンスターがスキルの内容を持つ旧形式で書き出す。
+
+    取得・解析の済んだモンスターはすぐにチェックポイント（data_file + CHECKPOINT_SUFFIX）へ追記し、
+    全モンスターを集めた辞書は作らない。JSONファイルはチェックポイントから1体ずつ一時ファイルに
+    書き出してから置き換える。途中で中断した場合や取得・解析に失敗したページがあった場合は
+    チェックポイントを残し、resume が True なら次の実行で記録済みのページを飛ばして再開する。
+
+    戻り値は {"monsters": モンスター数, "systems": {系統: 体数}}（エラー時は {"error": メッセージ}）。
+    """
+    import requests
+
+    session = None
+    archive = None
+    cache = None
+    if replay:
+        archive = PageArchive(replay, base_url)
+        fetch = archive.fetch
+        rate = 0  # ローカルのアーカイブなのでリクエスト数の制限は不要
+    elif parse_only:
+        fetch = PageCache(cache_dir or DEFAULT_CACHE_DIR).load
+        rate = 0
+    else:
+        session = create_session(concurrency, retries, backoff)
+        cache = PageCache(cache_dir) if cache_dir else None
+        fetch = functools.partial(fetch_page, session=session, timeout=timeout, cache=cache)
+    # 前回のJSONファイルはモンスター名だけを読んでおき、再利用するデータは取得のあとで1体ずつ読み出す
+    existing_names = read_monster_names(data_file) if cache else set()
+    writer = PageArchiveWriter(capture, base_url) if capture else None
+    if writer:
+        fetch = writer.wrap(fetch)
+    checkpoint = None
+    work_dir = None
     try:
         print("モンスターデータの取得を開始します...")
-        
-        # 全系統のプレフィックスを定義
-        # DQMJ2の系統: 自然・魔獣・物質・悪魔・ドラゴン・スライム・ゾンビ・？？？・特殊系
-        system_prefixes = {
-            'si': '自然系',
-            'm': '魔獣系', 
-            'b': '物質系',
-            'a': '悪魔系',
-            'd': 'ドラゴン系',
-            'sr': 'スライム系',
-            'z': 'ゾンビ系',
-            'p': '？？？系',
-            'x': '特殊系（魔王）',
-            'k': '特殊系（神獣）'
-        }
-        
+
         # 図鑑トップページから全モンスターのリンクを取得
-        top_response = requests.get(BASE_URL)
-        top_response.raise_for_status()
-        top_soup = BeautifulSoup(top_response.content, 'html.parser')
-        
-        all_monster_links = []
-        for prefix, system_name in system_prefixes.items():
-            # 各系統のモンスターを取得
-            system_links = [a['href'] for a in top_soup.select(f'a[href^="{prefix}-"]') if a['href'].endswith('.html')]
-            print(f"{system_name}: {len(system_links)} 体のモンスターを発見")
-            all_monster_links.extend([(link, system_name) for link in system_links])
+        all_monster_links = collect_monster_links(fetch(base_url))
 
         print(f"総モンスター数: {len(all_monster_links)} 体")
-        
+
         if not all_monster_links:
             return {"error": "モンスターへのリンクが見つかりませんでした。"}
 
-        all_monsters_data = {}
-        processed_count = 0
-        
-        # 各モンスターの詳細ページからデータを取得
-        for monster_link, system_name in all_monster_links:
-            processed_count += 1
-            monster_url = BASE_URL + monster_link
-            print(f"進行状況 {processed_count}/{len(all_monster_links)}: {monster_link} ({system_name})")
-            
-            time.sleep(0.1)  # サーバーへの負荷軽減
-            
+        monster_urls = [base_url + monster_link for monster_link, _ in all_monster_links]
+        checkpoint_file = data_file + CHECKPOINT_SUFFIX
+        if parse_only:
+            # 解析ステージの計測では前回の途中結果を使わず、再開用のチェックポイントにも触れない
+            work_dir = tempfile.mkdtemp(prefix="dqmj2-parse-only-")
+            checkpoint_file = os.path.join(work_dir, os.path.basename(checkpoint_file))
+        checkpoint = ScrapeCheckpoint(checkpoint_file, {"base_url": base_url, "parser": backend},
+                                      resume and not parse_only)
+        if len(checkpoint):
+            print(f"前回の途中結果から再開します（{len(checkpoint)}体取得済み）")
+
+        # 各モンスターの詳細ページを並行取得（取得済みのページは除く）
+        pending = [index for index, monster_url in enumerate(monster_urls) if monster_url not in checkpoint]
+        print(f"詳細ページを取得中...（同時接続数: {concurrency}, 上限: {rate} 件/秒）")
+        fetched = ((pending[i], page) for i, page in iter_fetched_pages(
+            [monster_urls[index] for index in pending], fetch=fetch, concurrency=concurrency, rate=rate))
+        if parse_only:
+            # 読み込みを先に済ませ、解析ステージだけを計測する
+            fetched = list(fetched)
+
+        def is_reusable(monster_url):
+            # 前回から変更のないページは解析せず既存データを再利用
+            return (cache is not None and cache.is_unchanged(monster_url)
+                    and cache.monster_name(monster_url) in existing_names)
+
+        failed = {}
+        reused_count = 0
+        resumed_count = len(monster_urls) - len(pending)
+        parse_count = 0
+        parse_futures = {}
+        reused = {}  # 再利用するモンスター名 → そのページのインデックスのリスト
+
+        def record_parsed(future):
+            # 解析の済んだモンスターをすぐにチェックポイントへ書き出す
+            index = parse_futures.pop(future)
+            monster_url = monster_urls[index]
             try:
-                monster_response = requests.get(monster_url)
-                monster_response.raise_for_status()
-                monster_soup = BeautifulSoup(monster_response.content, 'html.parser')
-
-                # モンスター名（動的セレクタ選択）
-                name_element = None
-                name = None
-                
-                # まず期待される系統のセレクタを試す
-                system_selectors = {
-                    '自然系': 'h2.sizen',
-                    '魔獣系': 'h2.majyuu', 
-                    '物質系': 'h2.bussitu',
-                    '悪魔系': 'h2.akuma',
-                    'ドラゴン系': 'h2.doragon',
-                    'スライム系': 'h2.suraimu',
-                    'ゾンビ系': 'h2.zonbi',
-                    '？？？系': 'h2.akuma',  # ？？？系は悪魔系と同じセレクタ
-                    '特殊系（魔王）': 'h2.majyuu',  # 魔王系は魔獣系と同じセレクタ
-                    '特殊系（神獣）': 'h2.kami'
-                }
-                
-                selector = system_selectors.get(system_name, 'h2')
-                name_element = monster_soup.select_one(selector)
-                
-                # 期待されるセレクタで見つからない場合、全ての系統セレクタを試す
-                if not name_element:
-                    all_selectors = ['h2.sizen', 'h2.majyuu', 'h2.bussitu', 'h2.akuma', 
-                                   'h2.doragon', 'h2.suraimu', 'h2.zonbi', 'h2.kami']
-                    for alt_selector in all_selectors:
-                        name_element = monster_soup.select_one(alt_selector)
-                        if name_element:
-                            break
-                
-                # それでも見つからない場合は一般的なh2タグを使用
-                if not name_element:
-                    h2_elements = monster_soup.find_all('h2')
-                    # モンスター名らしいh2を探す（最初の文字列h2を使用）
-                    for h2 in h2_elements:
-                        text = h2.text.strip()
-                        if text and len(text) < 50:  # 長すぎるテキストは除外
-                            name_element = h2
-                            break
-                
-                if not name_element:
-                    print(f"    警告: モンスター名が見つかりません ({system_name}): {monster_url}")
-                    continue  # モンスター名が見つからない場合はスキップ
-                name = name_element.text.strip()
-                print(f"    処理中: {name}")
-                
-                # 特性・耐性・スキル情報を初期化
-                tokusei = []
-                taisei = {}
-                skills = []
-                    
-                
-                # 全てのテーブルから特性・耐性情報を探す
-                tables = monster_soup.find_all('table')
-                for table in tables:
-                    text = table.get_text()
-                    # 特性と耐性の情報が含まれているテーブルを探す
-                    if '特性' in text and '耐性' in text:
-                        # テーブルの行を処理
-                        rows = table.find_all('tr')
-                        for row in rows:
-                            cells = row.find_all(['td', 'th'])
-                            if len(cells) >= 3:
-                                # 1列目が特性、2列目が耐性、3列目が出現場所
-                                tokusei_cell = cells[0]
-                                taisei_cell = cells[1]
-                                
-                                # 特性の処理
-                                tokusei_text = tokusei_cell.get_text().strip()
-                                if tokusei_text and tokusei_text != '特性':
-                                    # 改行で分割して複数の特性を取得
-                                    tokusei_list = [t.strip() for t in tokusei_text.split('\n') if t.strip()]
-                                    tokusei.extend(tokusei_list)
-                                
-                                # 耐性の処理（色分け情報も含める）
-                                if taisei_cell and taisei_cell.get_text().strip() != '耐性':
-                                    # HTMLを解析して色分け情報を処理
-                                    taisei_lines = []
-                                    
-                                    # br タグで分割された各行を処理
-                                    content = str(taisei_cell)
-                                    lines = content.split('<br/>')
-                                    
-                                    for line in lines:
-                                        # HTMLタグを含む行をBeautifulSoupで解析
-                                        line_soup = BeautifulSoup(line, 'html.parser')
-                                        
-                                        # spanタグがある場合の処理
-                                        purple_spans = line_soup.find_all('span', class_='c-purple2')
-                                        red_spans = line_soup.find_all('span', class_='c-red2')
-                                        
-                                        if purple_spans:
-                                            for span in purple_spans:
-                                                span_text = span.get_text().strip()
-                                                if span_text:
-                                                    taisei_lines.append(f"{span_text}（強の場合）")
-                                        elif red_spans:
-                                            for span in red_spans:
-                                                span_text = span.get_text().strip()
-                                                if span_text:
-                                                    taisei_lines.append(f"{span_text}（最強の場合）")
-                                        else:
-                                            # 通常のテキスト
-                                            plain_text = line_soup.get_text().strip()
-                                            if plain_text:
-                                                taisei_lines.append(plain_text)
-                                    
-                                    if taisei_lines:
-                                        taisei['説明'] = '\n'.join(taisei_lines)
-                        break
-                
-                # スキル情報を取得
-                for table in tables:
-                    text = table.get_text()
-                    # スキルテーブルを特定（スキル名、特技、SPが含まれる）
-                    if 'スキル' in text and '特技' in text and 'SP' in text:
-                        rows = table.find_all('tr')
-                        current_skill = None
-                        
-                        for row in rows[1:]:  # ヘッダー行をスキップ
-                            cells = row.find_all(['td', 'th'])
-                            if len(cells) >= 5:
-                                skill_name_cell = cells[0].get_text().strip()
-                                technique_name = cells[2].get_text().strip()
-                                sp_value = cells[3].get_text().strip()
-                                effect = cells[4].get_text().strip()
-                                
-                                # 新しいスキルの開始
-                                if skill_name_cell:
-                                    current_skill = {
-                                        'スキル名': skill_name_cell,
-                                        '特技': []
-                                    }
-                                    skills.append(current_skill)
-                                
-                                # 特技情報を追加
-                                if current_skill and technique_name:
-                                    technique_info = {
-                                        '技名': technique_name,
-                                        'SP': sp_value,
-                                        '効果': effect
-                                    }
-                                    current_skill['特技'].append(technique_info)
-                        break
-
-                # モンスターデータに系統情報も追加
-                all_monsters_data[name] = {
-                    "系統": system_name,
-                    "特性": tokusei, 
-                    "耐性": taisei, 
-                    "スキル": skills
-                }
-                
-            except requests.RequestException:
-                print(f"    ネットワークエラー: {monster_url}")
-                continue # 個別ページの取得失敗はスキップ
+                record = future.result()
             except Exception as e:
+                # 取得に失敗したページと同じく書き出しを止め、次の実行で取得し直す
                 print(f"    処理エラー: {monster_url} - {e}")
-                continue
+                failed[index] = (monster_url, e)
+                return
+            if record is None:
+                return
+            print(f"    処理中: {record.name}")
+            checkpoint.add(monster_url, record.name, record.to_dict())
+            if cache:
+                cache.set_monster_name(monster_url, record.name)
+
+        parse_start = time.perf_counter()
+        with create_parse_executor(parse_workers) as executor:
+            # 取得の完了したページから解析ステージへ投入（本文は解析ステージへ渡したら手放す）
+            fetched_count = resumed_count
+            for index, page in fetched:
+                fetched_count += 1
+                print(f"進行状況 {fetched_count}/{len(all_monster_links)}: {all_monster_links[index][0]} "
+                      f"({all_monster_links[index][1]})")
+                monster_url = monster_urls[index]
+                if isinstance(page, Exception):
+                    print(f"    取得エラー: {monster_url}")
+                    failed[index] = (monster_url, page)
+                elif is_reusable(monster_url):
+                    reused.setdefault(cache.monster_name(monster_url), []).append(index)
+                else:
+                    parse_futures[executor.submit(
+                        parse_monster_page, page, all_monster_links[index][1], monster_url, backend)] = index
+                    parse_count += 1
+                del page
+                for future in [future for future in parse_futures if future.done()]:
+                    record_parsed(future)
+
+            for future in as_completed(list(parse_futures)):
+                record_parsed(future)
+
+        if reused:
+            # 前回のJSONファイルを先頭から読み、再利用するモンスターだけをチェックポイントへ書き出す
+            try:
+                for name, data in iter_monster_records(data_file):
+                    for index in reused.pop(name, ()):
+                        checkpoint.add(monster_urls[index], name, data)
+                        reused_count += 1
+            except ValueError as e:
+                print(f"    既存データの読み込みエラー: {data_file} - {e}")
+            # 取得中に前回のJSONファイルが置き換えられていた（次の実行で取得し直す）
+            for name, indexes in reused.items():
+                for index in indexes:
+                    failed[index] = (monster_urls[index], KeyError(f"{data_file}に{name}がありません"))
+        failed_urls = [failed[index] for index in sorted(failed)]
+
+        systems = {}
+        for name, monster_url in {checkpoint.name(url): url for url in monster_urls if url in checkpoint}.items():
+            system = checkpoint.system(monster_url)
+            systems[system] = systems.get(system, 0) + 1
+
+        if parse_only:
+            print(f"解析ステージ: {parse_count}ページ / {time.perf_counter() - parse_start:.2f}秒"
+                  f"（ワーカー数: {parse_workers or os.cpu_count()}, 解析器: {backend}）")
+            if failed_urls:
+                report_failed_urls(failed_urls)
+            if writer:
+                writer.close()
+            # 計測のみ（JSONファイル・スナップショット・データベースは更新しない）
+            return {"monsters": sum(systems.values()), "systems": systems}
+
+        if failed_urls:
+            report_failed_urls(failed_urls)
+            if not allow_partial:
+                return {"error": f"{len(failed_urls)}件のページを取得・解析できなかったため、{data_file}は更新しませんでした。"
+                                 f"（再実行すると取得済みの{len(checkpoint)}体を飛ばして再開します）"}
+
+        # チェックポイントから図鑑のリンク順に1体ずつ書き出す
+        try:
+            monster_count, catalog = write_monster_data(lambda: checkpoint.monsters(monster_urls), data_file,
+                                                        legacy_format)
+        except ValueError:
+            return {"error": f"スキル一覧の作成に失敗したため、{data_file}は更新しませんでした。"}
+        for skill_name, count in catalog_variants(catalog).items():
+            print(f"  スキル「{skill_name}」はモンスターによって特技の並びが異なります（{count}種類）")
+        if snapshot_file or store_file:
+            # スナップショット・データベースは全データから作るため、書き出したJSONファイルを読み込む
+            monsters_data = load_monster_data(data_file)
+            if snapshot_file:
+                write_snapshot(monsters_data, snapshot_file)
+            if store_file:
+                write_store(monsters_data, store_file)
+            del monsters_data
 
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(all_monsters_data, f, ensure_ascii=False, indent=4)
-        
-        print(f"データ取得完了！総モンスター数: {len(all_monsters_data)}")
-        return all_monsters_data
+        checkpoint.remove()
+
+        # JSONファイルへ反映できた場合のみキャッシュを更新
+        if cache:
+            cache.save()
+            print(f"変更のないページ: {reused_count}件（既存データを再利用）")
+        if resumed_count:
+            print(f"前回の途中結果: {resumed_count}件（取得・解析を省略）")
+        if writer:
+            writer.close()
+
+        print(f"データ取得完了！総モンスター数: {monster_count}")
+        return {"monsters": monster_count, "systems": systems}
 
     except requests.RequestException as e:
         return {"error": f"ネットワークエラー: {e}"}
     except Exception as e:
         return {"error": f"予期せぬエラーが発生しました: {e}"}
+    finally:
+        if checkpoint:
+            checkpoint.close()
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if session:
+            session.close()
+        if archive:
+            archive.close()
+
+
+def compare_parser_backends(base_url: str = BASE_URL, cache_dir: str = DEFAULT_CACHE_DIR, replay: str = None):
+    """全ページを各解析器で解析し、出力が基準実装 (html.parser) と一致するか確認する
+
+    ネットワークは使わず、replay のアーカイブ（未指定ならページキャッシュ）を読む。
+    不一致のあったページ数を返す。
+    """
+    archive = PageArchive(replay, base_url) if replay else None
+    fetch = archive.fetch if archive else PageCache(cache_dir or DEFAULT_CACHE_DIR).load
+    try:
+        all_monster_links = collect_monster_links(fetch(base_url))
+        elapsed = {backend: 0.0 for backend in PARSER_BACKENDS}
+        mismatches = 0
+        for monster_link, system_name in all_monster_links:
+            monster_url = base_url + monster_link
+            content = fetch(monster_url)
+            outputs = {}
+            for backend, parse in PARSER_BACKENDS.items():
+                start = time.perf_counter()
+                record = parse(content, system_name, monster_url)
+                outputs[backend] = json.dumps(record and record.to_dict(), ensure_ascii=False)
+                elapsed[backend] += time.perf_counter() - start
+            for backend, output in outputs.items():
+                if output != outputs["html.parser"]:
+                    mismatches += 1
+                    print(f"  不一致 ({backend}): {monster_url}")
+    finally:
+        if archive:
+            archive.close()
+
+    print(f"\n=== 解析器の比較 ({len(all_monster_links)}ページ) ===")
+    for backend, seconds in elapsed.items():
+        print(f"  {backend}: {seconds:.2f}秒")
+    print(f"  不一致: {mismatches}件")
+    return mismatches
 
 
-def main():
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="DQMJ2 モンスターデータスクレイピングツール")
+    parser.add_argument("--base-url", default=BASE_URL, help="図鑑トップページのURL")
+    parser.add_argument("--output", default=DATA_FILE, help="出力するJSONファイル")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="JSONファイルと一緒に書き出すバイナリスナップショット（省略時は --output の拡張子を .bin にしたもの）")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="バイナリスナップショットを書き出さない")
+    parser.add_argument("--legacy-format", action="store_true",
+                        help="スキル一覧を分離せず、各モンスターがスキルの内容を持つ旧形式のJSONファイルを書き出す")
+    parser.add_argument("--sqlite", metavar="PATH",
+                        help="JSONファイルと一緒に SQLite データベースも書き出す（web_gui.py の --data で読み込める）")
+    parser.add_argument("--no-resume", action="store_true",
+                        help=f"前回中断したときの途中結果（--output に {CHECKPOINT_SUFFIX} を付けたファイル）を使わず最初から取得する")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="詳細ページの同時取得数")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="1秒あたりのリクエスト数上限（0以下で無制限）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="1リクエストあたりのタイムアウト秒数")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="接続エラー・タイムアウト・5xx応答時のリトライ回数")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF,
+                        help="リトライ間隔の係数（backoff * 2^n 秒待機）")
+    parser.add_argument("--allow-partial", action="store_true",
+                        help="取得・解析に失敗したページがあってもJSONファイルを書き出す")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="ページキャッシュの保存先（ETag/Last-Modified による差分取得）")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ページキャッシュを使わず全ページを取得・解析する")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="ネットワークを使わず、保存済みHTMLのアーカイブ（ディレクトリ / zip / tar）から再構築する")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="取得した全ページをアーカイブとして保存する（.zip / .tar / .tar.gz / ディレクトリ）")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="解析に使うプロセス数（省略時はCPUコア数、1でプロセスプールを使わない）")
+    parser.add_argument("--parse-only", action="store_true",
+                        help="ネットワークを使わず --replay のアーカイブまたはページキャッシュを解析し、所要時間を表示する"
+                             "（出力先のファイルは更新しない）")
+    parser.add_argument("--parser", choices=sorted(PARSER_BACKENDS), default=DEFAULT_BACKEND,
+                        help="詳細ページの解析器（html.parser は基準となる低速な実装）")
+    parser.add_argument("--compare-parsers", action="store_true",
+                        help="--replay のアーカイブまたはページキャッシュの全ページで、各解析器の出力が一致するか確認する")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """メイン関数：スクレイピングを実行してJSONファイルに保存"""
+    args = parse_args(argv)
+    if args.compare_parsers:
+        return compare_parser_backends(args.base_url, args.cache_dir, args.replay) == 0
+
     print("=== DQMJ2 モンスターデータスクレイピング開始 ===")
-    
-    result = scrape_monster_data()
-    
+
+    snapshot_file = None
+    if not args.no_snapshot:
+        snapshot_file = args.snapshot or os.path.splitext(args.output)[0] + ".bin"
+    result = scrape_monster_data(args.base_url, args.output,
+                                 concurrency=args.concurrency, rate=args.rate,
+                                 timeout=args.timeout, retries=args.retries,
+                                 backoff=args.backoff, allow_partial=args.allow_partial,
+                                 cache_dir=None if args.no_cache else args.cache_dir,
+                                 replay=args.replay, capture=args.capture,
+                                 parse_workers=args.parse_workers, parse_only=args.parse_only,
+                                 backend=args.parser, snapshot_file=snapshot_file, store_file=args.sqlite,
+                                 legacy_format=args.legacy_format, resume=not args.no_resume)
+
     if "error" in result:
         print(f"❌ エラーが発生しました: {result['error']}")
         return False
+    elif args.parse_only:
+        print(f"✅ {result['monsters']}体のモンスターを解析しました（{args.output}は更新していません）。")
+        return True
     else:
-        print(f"✅ 成功！{len(result)}体のモンスターデータを{DATA_FILE}に保存しました。")
-        
+        print(f"✅ 成功！{result['monsters']}体のモンスターデータを{args.output}に保存しました。")
+
         # 系統別集計を表示
-        system_count = {}
-        for name, data in result.items():
-            system = data.get('系統', '未知')
-            system_count[system] = system_count.get(system, 0) + 1
-        
         print("\n=== 系統別集計 ===")
-        for system, count in sorted(system_count.items()):
+        for system, count in sorted(result["systems"].items()):
             print(f"  {system}: {count}体")
-        
+
         return True
 
 
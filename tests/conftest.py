@@ -0,0 +1,33 @@
+"""
+テスト共通の設定
+
+fixtures/pages.tar.gz は図鑑サイトの全ページ（index.html と各詳細ページ）のアーカイブ、
+fixtures/dqmj2_monsters.json.gz はそのアーカイブから scraper.py で作ったJSONファイルの期待値。
+"""
+
+import gzip
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+PAGES_ARCHIVE = os.path.join(FIXTURES, "pages.tar.gz")
+EXPECTED_OUTPUT = os.path.join(FIXTURES, "dqmj2_monsters.json.gz")
+
+# リポジトリ直下のモジュールを import できるようにする
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def pages_archive() -> str:
+    """図鑑サイトの全ページのアーカイブのパス"""
+    return PAGES_ARCHIVE
+
+
+@pytest.fixture(scope="session")
+def expected_output() -> bytes:
+    """アーカイブから作ったJSONファイルの期待値（バイト列）"""
+    with gzip.open(EXPECTED_OUTPUT, "rb") as f:
+        return f.read()
@@ -0,0 +1,96 @@
+"""monster_parser の lxml 実装の部品（テーブルの判定・取り出し、モンスター名の検索）を小さなHTMLで確認する"""
+
+import pytest
+
+from monster_parser import (SKILLS_TABLE, TRAITS_TABLE, ParsedSkill, ParsedTechnique, classify_table,
+                            extract_skills, extract_traits_and_resistance, find_monster_name, find_tables,
+                            parse_with_html_parser, parse_with_lxml)
+
+lxml_html = pytest.importorskip("lxml.html")
+
+TRAITS_HTML = """
+<table>
+<tr><th>特性</th><th>耐性</th><th>出現場所</th></tr>
+<tr>
+<td>みかわしアップ<br/>
+れんぞく</td>
+<td>ギラ・炎ブレスに弱い<br/>バギを無効<br/><span class="c-purple2">ザキを半減</span><br/><span class="c-red2">ザキを無効</span></td>
+<td>草原</td>
+</tr>
+</table>
+"""
+
+SKILLS_HTML = """
+<table>
+<tr><th>スキル</th><th>No.</th><th>特技</th><th>SP</th><th>効果</th></tr>
+<tr><td>バギ＆デイン</td><td>1</td><td>バギ</td><td>3</td><td>敵全体にバギ系の呪文ダメージ</td></tr>
+<tr><td></td><td>2</td><td>デイン</td><td>10</td><td>敵1体にデイン系の呪文ダメージ</td></tr>
+<tr><td colspan="5">備考</td></tr>
+<tr><td>ひかりのはどう</td><td>1</td><td></td><td></td><td></td></tr>
+<tr><td></td><td>2</td><td>ベホイミ</td><td>？</td><td>味方1体のHPを回復</td></tr>
+</table>
+"""
+
+
+def fragment(html):
+    return lxml_html.fragment_fromstring(html.strip())
+
+
+def document(body):
+    return lxml_html.document_fromstring(f"<html><body>{body}</body></html>")
+
+
+def test_classify_table():
+    assert classify_table(fragment(TRAITS_HTML)) == [TRAITS_TABLE]
+    assert classify_table(fragment(SKILLS_HTML)) == [SKILLS_TABLE]
+    assert classify_table(fragment("<table><tr><td>特性 耐性 スキル 特技 SP</td></tr></table>")) == \
+        [TRAITS_TABLE, SKILLS_TABLE]
+    # スキルのテーブルには SP の列も要る
+    assert classify_table(fragment("<table><tr><td>スキル</td><td>特技</td></tr></table>")) == []
+
+
+def test_find_tables_returns_first_table_of_each_kind():
+    tables = find_tables(document("<table><tr><td>出現場所</td></tr></table>"
+                                  + SKILLS_HTML + TRAITS_HTML + SKILLS_HTML.replace("バギ＆デイン", "別のスキル")))
+    assert set(tables) == {TRAITS_TABLE, SKILLS_TABLE}
+    assert "バギ＆デイン" in tables[SKILLS_TABLE].text_content()
+    assert "みかわしアップ" in tables[TRAITS_TABLE].text_content()
+    assert find_tables(document("<p>テーブルなし</p>")) == {}
+
+
+def test_extract_traits_and_resistance():
+    traits, resistance = extract_traits_and_resistance(fragment(TRAITS_HTML))
+    assert traits == ["みかわしアップ", "れんぞく"]
+    assert resistance == "ギラ・炎ブレスに弱い\nバギを無効\nザキを半減（強の場合）\nザキを無効（最強の場合）"
+
+
+def test_extract_traits_without_resistance():
+    traits, resistance = extract_traits_and_resistance(fragment(
+        "<table><tr><th>特性</th><th>耐性</th><th>出現場所</th></tr>"
+        "<tr><td>ギガボディ</td><td></td><td>-</td></tr></table>"))
+    assert traits == ["ギガボディ"]
+    assert resistance is None
+
+
+def test_extract_skills():
+    assert extract_skills(fragment(SKILLS_HTML)) == [
+        ParsedSkill("バギ＆デイン", [ParsedTechnique("バギ", "3", "敵全体にバギ系の呪文ダメージ"),
+                                    ParsedTechnique("デイン", "10", "敵1体にデイン系の呪文ダメージ")]),
+        ParsedSkill("ひかりのはどう", [ParsedTechnique("ベホイミ", "？", "味方1体のHPを回復")]),
+    ]
+
+
+def test_find_monster_name():
+    # 系統のセレクタ → ほかの系統のセレクタ → 短いテキストの h2 の順に探す
+    assert find_monster_name(document('<h2>目次</h2><h2 class="sizen">カバシラー</h2>'), "自然系") == "カバシラー"
+    assert find_monster_name(document('<h2 class="kami"> ゴッドライダー </h2>'), "自然系") == "ゴッドライダー"
+    assert find_monster_name(document(f"<h2>{'長' * 50}</h2><h2>スライム</h2>"), "スライム系") == "スライム"
+    assert find_monster_name(document("<p>見出しなし</p>"), "スライム系") is None
+
+
+def test_lxml_page_matches_reference():
+    content = f'<html><body><h2 class="sizen">カバシラー</h2>{TRAITS_HTML}{SKILLS_HTML}</body></html>'.encode()
+    record = parse_with_lxml(content, "自然系")
+    assert record == parse_with_html_parser(content, "自然系")
+    assert record.traits == ["みかわしアップ", "れんぞく"]
+    assert [skill.name for skill in record.skills] == ["バギ＆デイン", "ひかりのはどう"]
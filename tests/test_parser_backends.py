@@ -0,0 +1,47 @@
+"""解析器（monster_parser.PARSER_BACKENDS）の出力が基準実装 html.parser と一致するかの確認"""
+
+import json
+
+import pytest
+
+import scraper
+from monster_parser import PARSER_BACKENDS
+
+
+@pytest.fixture(scope="module")
+def pages(pages_archive):
+    """アーカイブの全詳細ページ [(URL, 系統名, 本文)]（図鑑のリンク順）"""
+    archive = scraper.PageArchive(pages_archive, scraper.BASE_URL)
+    try:
+        links = scraper.collect_monster_links(archive.fetch(scraper.BASE_URL))
+        return [(scraper.BASE_URL + link, system_name, archive.fetch(scraper.BASE_URL + link))
+                for link, system_name in links]
+    finally:
+        archive.close()
+
+
+@pytest.mark.parametrize("backend", sorted(set(PARSER_BACKENDS) - {"html.parser"}))
+def test_backend_matches_reference_on_every_page(pages, backend):
+    mismatches = []
+    for url, system_name, content in pages:
+        expected = PARSER_BACKENDS["html.parser"](content, system_name, url)
+        actual = PARSER_BACKENDS[backend](content, system_name, url)
+        if json.dumps(actual and actual.to_dict(), ensure_ascii=False) != \
+                json.dumps(expected and expected.to_dict(), ensure_ascii=False):
+            mismatches.append(url)
+    assert len(pages) == 421
+    assert mismatches == []
+
+
+def test_compare_parser_backends_reports_no_mismatch(pages_archive):
+    assert scraper.compare_parser_backends(replay=pages_archive) == 0
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+def test_replay_output_matches_golden_file(tmp_path, pages_archive, expected_output, backend):
+    data_file = str(tmp_path / "dqmj2_monsters.json")
+    result = scraper.scrape_monster_data(data_file=data_file, replay=pages_archive, cache_dir=None,
+                                         parse_workers=1, backend=backend)
+    assert result.get("monsters") == 421, result
+    with open(data_file, "rb") as f:
+        assert f.read() == expected_output
@@ -0,0 +1,237 @@
+"""ローカルの HTTP サーバーに置いた図鑑ページを取得し、出力順・同時接続数・リクエスト数の上限、
+チェックポイントからの再開、ページキャッシュによる差分取得を確認する"""
+
+import functools
+import json
+import os
+import tarfile
+import threading
+import time
+import zlib
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import scraper
+from monster_dataset import iter_monster_records, write_monster_data
+
+CONCURRENCY = 3
+RATE = 40.0
+
+
+class SiteHandler(SimpleHTTPRequestHandler):
+    """詳細ページの応答をページごとに 2〜17ms 遅らせ、応答の完了順をリンク順からずらす
+
+    ファイルの内容から作った ETag を返し、If-None-Match が一致すれば 304 Not Modified を返す。
+    """
+
+    def do_GET(self):
+        if self.path != "/":
+            time.sleep(0.002 + zlib.crc32(self.path.encode()) % 16 / 1000)
+        self.etag = None
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                self.etag = f'"{zlib.crc32(f.read()):08x}"'
+            if self.headers.get("If-None-Match") == self.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+        super().do_GET()
+
+    def end_headers(self):
+        if self.etag:
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site_root(tmp_path, pages_archive):
+    """アーカイブの全ページを展開した、ローカルサーバーの公開ディレクトリ"""
+    root = tmp_path / "site"
+    with tarfile.open(pages_archive) as archive:
+        archive.extractall(root)
+    return root
+
+
+@pytest.fixture
+def site(site_root, monkeypatch):
+    """site_root を配信するローカルサーバーの base_url と、詳細ページの取得の記録
+
+    記録は scraper.fetch_page の呼び出し側で取る（開始時刻・同時に取得中の数・完了したページの順）。
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(SiteHandler, directory=str(site_root)))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    stats = {"starts": [], "finished": [], "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+    fetch_page = scraper.fetch_page
+
+    def recording_fetch_page(url, *args, **kwargs):
+        if url == base_url:
+            return fetch_page(url, *args, **kwargs)
+        with lock:
+            stats["starts"].append(time.monotonic())
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            return fetch_page(url, *args, **kwargs)
+        finally:
+            with lock:
+                stats["in_flight"] -= 1
+                stats["finished"].append(url[len(base_url):])
+
+    monkeypatch.setattr(scraper, "fetch_page", recording_fetch_page)
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    try:
+        yield base_url, stats
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_scrape_over_http_keeps_link_order(tmp_path, site, expected_output):
+    base_url, stats = site
+    data_file = str(tmp_path / "dqmj2_monsters.json")
+
+    result = scraper.scrape_monster_data(base_url, data_file, concurrency=CONCURRENCY, rate=0,
+                                         retries=0, cache_dir=None, parse_workers=1)
+
+    assert result.get("monsters") == 421, result
+    # 応答の完了順によらず、図鑑トップページのリンク順で書き出す
+    with open(data_file, "rb") as f:
+        assert f.read() == expected_output
+    links = [link for link, _ in scraper.collect_monster_links(scraper.fetch_page(base_url))]
+    assert sorted(stats["finished"]) == sorted(links)
+    assert stats["finished"] != links
+
+    # 同時に処理中のリクエストは concurrency 件まで（並行して取得していること）
+    assert 1 < stats["max_in_flight"] <= CONCURRENCY
+
+
+def test_fetch_requests_start_at_most_rate_per_second(site):
+    base_url, stats = site
+    links = [link for link, _ in scraper.collect_monster_links(scraper.fetch_page(base_url))][:60]
+
+    pages = scraper.fetch_pages([base_url + link for link in links], fetch=scraper.fetch_page,
+                                concurrency=8, rate=RATE)
+
+    assert not [page for page in pages if isinstance(page, Exception)]
+    # リクエストの開始は rate 件/秒まで（スレッドの切り替えによる揺らぎは 0.1 秒まで許す）
+    starts = sorted(stats["starts"])
+    assert len(starts) == len(links)
+    for i, start in enumerate(starts):
+        assert start - starts[0] >= i / RATE - 0.1
+
+
+def scrape(base_url, data_file, **kwargs):
+    kwargs = {"concurrency": CONCURRENCY, "rate": 0, "retries": 0, "cache_dir": None, "parse_workers": 1,
+              **kwargs}
+    return scraper.scrape_monster_data(base_url, str(data_file), **kwargs)
+
+
+@pytest.fixture
+def interrupted(tmp_path, site, site_root):
+    """3ページを取得できずに終わった実行のあと（チェックポイントが残り、JSONファイルは書き出されない）
+
+    (base_url, 取得の記録, JSONファイル, チェックポイント, 取得できなかったページ) を返す。
+    ページは元に戻してあるので、次の実行ではすべて取得できる。
+    """
+    base_url, stats = site
+    links = [link for link, _ in scraper.collect_monster_links(scraper.fetch_page(base_url))]
+    missing = [links[10], links[200], links[400]]
+    for link in missing:
+        (site_root / link).rename(site_root / (link + ".bak"))
+    data_file = tmp_path / "dqmj2_monsters.json"
+
+    result = scrape(base_url, data_file)
+
+    assert "error" in result
+    assert not data_file.exists()
+    checkpoint_file = tmp_path / ("dqmj2_monsters.json" + scraper.CHECKPOINT_SUFFIX)
+    assert len(checkpoint_file.read_bytes().splitlines()) == 1 + len(links) - len(missing)
+    for link in missing:
+        (site_root / (link + ".bak")).rename(site_root / link)
+    stats["finished"].clear()
+    return base_url, stats, data_file, checkpoint_file, missing
+
+
+def test_resume_fetches_only_failed_pages(interrupted, expected_output):
+    base_url, stats, data_file, checkpoint_file, missing = interrupted
+
+    result = scrape(base_url, data_file)
+
+    assert result.get("monsters") == 421, result
+    assert sorted(stats["finished"]) == sorted(missing)
+    assert data_file.read_bytes() == expected_output
+    assert not checkpoint_file.exists()
+
+
+def test_resume_drops_torn_last_line(interrupted, expected_output):
+    base_url, stats, data_file, checkpoint_file, missing = interrupted
+    # 最後の行を書きかけの状態にする
+    content = checkpoint_file.read_bytes()
+    last_line = content.splitlines()[-1]
+    checkpoint_file.write_bytes(content[:-len(last_line) // 2])
+    torn_link = json.loads(last_line)["url"][len(base_url):]
+
+    result = scrape(base_url, data_file)
+
+    assert result.get("monsters") == 421, result
+    assert sorted(stats["finished"]) == sorted(missing + [torn_link])
+    assert data_file.read_bytes() == expected_output
+
+
+def test_checkpoint_with_other_header_starts_fresh(interrupted, expected_output):
+    base_url, stats, data_file, checkpoint_file, missing = interrupted
+    # 別の解析器で作ったチェックポイントは使わない
+    header, rest = checkpoint_file.read_bytes().split(b"\n", 1)
+    header = {**json.loads(header), "parser": "other"}
+    checkpoint_file.write_bytes(json.dumps(header).encode() + b"\n" + rest)
+
+    result = scrape(base_url, data_file)
+
+    assert result.get("monsters") == 421, result
+    assert len(stats["finished"]) == 421
+    assert data_file.read_bytes() == expected_output
+
+
+def test_unchanged_pages_reuse_existing_data(tmp_path, site, site_root, monkeypatch, expected_output):
+    base_url, stats = site
+    data_file = tmp_path / "dqmj2_monsters.json"
+    cache_dir = str(tmp_path / "cache")
+    assert scrape(base_url, data_file, cache_dir=cache_dir).get("monsters") == 421
+    assert data_file.read_bytes() == expected_output
+
+    # 前回のJSONファイルの1体に目印を付け、別の1体のページだけを変更する
+    monsters = list(iter_monster_records(str(data_file)))
+    marked, changed = monsters[0][0], monsters[1][0]
+    monsters[0][1]["特性"] = monsters[0][1]["特性"] + ["目印"]
+    write_monster_data(lambda: iter(monsters), str(data_file))
+    links = [link for link, _ in scraper.collect_monster_links(scraper.fetch_page(base_url))]
+    changed_page = site_root / links[1]
+    changed_page.write_bytes(changed_page.read_bytes().replace(changed.encode(), (changed + "改").encode()))
+    parse_monster_page = scraper.parse_monster_page
+    parsed = []
+
+    def recording_parse(content, system_name, url, backend):
+        parsed.append(url[len(base_url):])
+        return parse_monster_page(content, system_name, url, backend)
+
+    monkeypatch.setattr(scraper, "parse_monster_page", recording_parse)
+
+    result = scrape(base_url, data_file, cache_dir=cache_dir)
+
+    assert result.get("monsters") == 421, result
+    # 変更のあったページだけを解析し、ほかは前回のJSONファイルのデータをリンク順に書き出す
+    assert parsed == [links[1]]
+    merged = list(iter_monster_records(str(data_file)))
+    assert [name for name, _ in merged] == [marked, changed + "改"] + [name for name, _ in monsters[2:]]
+    assert merged[0][1]["特性"][-1] == "目印"
+    assert merged[2:] == monsters[2:]
@@ -3,331 +3,279 @@
 """
 DQMJ2 モンスター情報比較ツール - Streamlit Web版
 ブラウザで動作する最もモダンなバージョン
+
+データファイルは次のように指定できる（JSON / バイナリスナップショット / SQLite データベース）:
+    streamlit run web_gui.py -- --data dqmj2_monsters.db
 """
 
+import argparse
+import sys
 import streamlit as st
-import json
 import pandas as pd
-from typing import Dict, List, Any
-
-# データファイルのパス
-DATA_FILE = "dqmj2_monsters.json"
-
-@st.cache_data
-def load_monster_data():
-    """モンスターデータを読み込み（キャッシュ付き）"""
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError:
+from typing import Dict, List, Any, Optional
+import monster_dataset
+from monster_dataset import DATA_FILE, RESISTANCE_LEVELS, build_resistance_table, resistance_tags
+from monster_analysis import (analyze_common_weaknesses, analyze_single_monster, build_resistance_matrix,
+                              category_counts)
+from monster_query import QUERY_CATEGORIES, build_query_index
+from monster_records import load_monster_records
+from monster_reload import DataReloader, Signature
+from monster_roster import ROSTER_COLUMNS, build_roster_frame, filter_roster, page_count, roster_page
+from monster_search import build_search_index
+from monster_store import MonsterStore
+from monster_attack import ATTACK_ATTRIBUTES, build_attack_index, build_attack_matrix, rank_attacks
+from party_optimizer import DEFAULT_PARTY_SIZE, optimize_party
+
+# 一度に比較できるモンスターの最大数
+MAX_COMPARE_MONSTERS = 8
+
+# キャッシュしておく パーティー編成の探索結果・モンスター情報カード の最大数（古い版の分から捨てる）
+PARTY_SEARCH_CACHE_ENTRIES = 32
+MONSTER_CARD_CACHE_ENTRIES = 512
+
+def selected_data_file() -> str:
+    """コマンドラインの --data で指定されたデータファイル（未指定なら JSON か新しいスナップショット）"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--data")
+    args, _ = parser.parse_known_args(sys.argv[1:])
+    return args.data or monster_dataset.preferred_data_file(DATA_FILE)
+
+# データを読み込む関数はデータファイルの版（DataReloader の Signature）を引数に取り、版ごとにキャッシュする。
+# 新しい版は裏のスレッドでキャッシュを作り終えてから data_version() に反映するため、
+# 表示中のセッションは古い版のまま最後まで実行され、作り直しを待つこともない。
+# データから作る索引や一覧表は読み取り専用として扱い、実行のたびに複製せず st.cache_resource で共有する。
+
+@st.cache_resource(max_entries=2)
+def load_monster_data(version: Signature):
+    """モンスターデータを読み込み（キャッシュ付き）
+
+    JSONファイルは文字列やスキルを共有する省メモリなオブジェクトに変換する。
+    スナップショットはメモリマップし、SQLite データベースは全データを展開せずに読み出す。
+    複製せずに版ごとに1つを共有するため、ファイルが置き換えられても、その版を表示中の
+    セッションは開いたときの内容を読み続ける。
+    """
+    monsters_data = load_monster_records(version[0])
+    if getattr(monsters_data, "signature", version[1:]) != version[1:]:
+        # 版を調べてから開くまでの間に置き換えられた（その版のデータとしては使わない）
         return {}
+    return monsters_data
 
-def parse_resistance_info(resistance_text: str) -> Dict[str, List[str]]:
-    """耐性情報を解析"""
-    resistances = {
-        "弱点": [],
-        "半減": [],
-        "無効": []
-    }
-    
-    lines = resistance_text.split('\n')
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        if "弱い" in line:
-            weak_part = line.split("に弱い")[0] if "に弱い" in line else line.split("が弱い")[0]
-            weak_attrs = [attr.strip() for attr in weak_part.replace("・", "・").split("・") if attr.strip()]
-            resistances["弱点"].extend(weak_attrs)
-            
-        elif "半減" in line:
-            if "（強の場合）" in line:
-                half_part = line.split("を半減")[0] if "を半減" in line else line.split("が半減")[0]
-                half_part = half_part.replace("（強の場合）", "").strip()
-                half_attrs = [f"◆{attr.strip()}" for attr in half_part.replace("・", "・").split("・") if attr.strip()]
-                resistances["半減"].extend(half_attrs)
-            else:
-                half_part = line.split("を半減")[0] if "を半減" in line else line.split("が半減")[0]
-                half_attrs = [attr.strip() for attr in half_part.replace("・", "・").split("・") if attr.strip()]
-                resistances["半減"].extend(half_attrs)
-                
-        elif "無効" in line:
-            if "（最強の場合）" in line:
-                null_part = line.split("を無効")[0] if "を無効" in line else line.split("が無効")[0]
-                null_part = null_part.replace("（最強の場合）", "").strip()
-                null_attrs = [f"◆◆{attr.strip()}" for attr in null_part.replace("・", "・").split("・") if attr.strip()]
-                resistances["無効"].extend(null_attrs)
-            else:
-                null_part = line.split("を無効")[0] if "を無効" in line else line.split("が無効")[0]
-                null_attrs = [attr.strip() for attr in null_part.replace("・", "・").split("・") if attr.strip()]
-                resistances["無効"].extend(null_attrs)
-    
-    return resistances
+def build_resistance_entry(monster_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """1体分の耐性索引を作成（耐性表と表示用タグ）"""
+    resistance = monster_data.get("耐性")
+    if not resistance or not resistance.get("説明"):
+        return None
+    table = resistance.get("表") or build_resistance_table(resistance["説明"])
+    return {"表": table, "タグ": resistance_tags(table)}
 
-def display_monster_card(monster_name: str, monster_data: Dict[str, Any]):
-    """モンスター情報カードを表示"""
-    if not monster_data:
-        st.info("モンスターを選択してください")
-        return
-    
-    # モンスター名と系統
+def build_resistance_index(monsters_data: Dict[str, Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """モンスター名 → 耐性索引 の辞書を作成"""
+    return {name: build_resistance_entry(data) for name, data in monsters_data.items()}
+
+@st.cache_resource(max_entries=2)
+def load_resistance_index(version: Signature):
+    """耐性索引を読み込み（load_monster_data と同じくキャッシュ付き）"""
+    return build_resistance_index(load_monster_data(version))
+
+@st.cache_resource(max_entries=2)
+def load_resistance_matrix(version: Signature):
+    """耐性の配列（モンスター × 属性 × 耐性レベル）を読み込み（キャッシュ付き）"""
+    return build_resistance_matrix(load_monster_data(version))
+
+@st.cache_resource(max_entries=2)
+def load_query_index(version: Signature):
+    """逆引き用の転置索引を読み込み（キャッシュ付き。SQLite データベースならその索引で検索する）"""
+    monsters_data = load_monster_data(version)
+    if isinstance(monsters_data, MonsterStore):
+        return monsters_data
+    return build_query_index(monsters_data)
+
+@st.cache_resource(max_entries=2)
+def load_search_index(version: Signature):
+    """モンスター名の検索索引を読み込み（キャッシュ付き）"""
+    return build_search_index(load_monster_data(version))
+
+@st.cache_resource(max_entries=2 * len(RESISTANCE_LEVELS))
+def load_roster_frame(version: Signature, resistance_level: str):
+    """全モンスターの一覧表を読み込み（耐性レベルごとにキャッシュ）"""
+    return build_roster_frame(load_monster_data(version), resistance_level)
+
+@st.cache_resource(max_entries=2)
+def load_attack_index(version: Signature):
+    """特技 → 属性 の索引と、特技の属性についての耐性の配列を読み込み（キャッシュ付き）"""
+    monsters_data = load_monster_data(version)
+    return build_attack_index(monsters_data), build_attack_matrix(monsters_data)
+
+@st.cache_data(max_entries=PARTY_SEARCH_CACHE_ENTRIES)
+def search_parties(version: Signature, threat: tuple, resistance_level: str, party_size: int, top: int,
+                   required: tuple):
+    """パーティー編成の探索（同じ条件の結果はキャッシュ）"""
+    return optimize_party(load_monster_data(version), dict(threat), resistance_level, party_size, top, required)
+
+def warm_data_caches(version: Signature) -> Optional[Signature]:
+    """その版のデータと索引をすべて作ってキャッシュする（読み込めなければ None）"""
+    if not load_monster_data(version):
+        return None
+    load_resistance_index(version)
+    load_resistance_matrix(version)
+    load_query_index(version)
+    load_search_index(version)
+    load_attack_index(version)
+    for resistance_level in RESISTANCE_LEVELS:
+        load_roster_frame(version, resistance_level)
+    return version
+
+@st.cache_resource
+def get_data_reloader() -> DataReloader:
+    """データファイルの監視（プロセスに1つ。変更されたら裏でキャッシュを作ってから版を切り替える）"""
+    reloader = DataReloader(selected_data_file, warm_data_caches)
+    reloader.start()
+    return reloader
+
+def data_version() -> Optional[Signature]:
+    """表示に使うデータの版（データがなければ None）"""
+    return get_data_reloader().current
+
+def get_resistance_entry(monster_name: str, monsters_data: Dict[str, Any],
+                         resistance_index: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """耐性索引を引く（索引が渡されない場合はその場で作成）"""
+    if resistance_index is not None:
+        return resistance_index.get(monster_name)
+    return build_resistance_entry(monsters_data.get(monster_name, {}))
+
+def format_resistance_tag(attr: str, level: int) -> str:
+    """耐性の表示名（強の場合は★、最強の場合は★★を付ける）"""
+    return f"{attr} {'★' * level}" if level else attr
+
+# 系統ごとのカードの色
+SYSTEM_COLORS = {
+    "自然系": "#28a745",
+    "魔獣系": "#6f42c1",
+    "物質系": "#6c757d",
+    "悪魔系": "#dc3545",
+    "ドラゴン系": "#fd7e14",
+    "スライム系": "#007bff",
+    "ゾンビ系": "#343a40",
+    "？？？系": "#e83e8c",
+    "特殊系（魔王）": "#dc3545",
+    "特殊系（神獣）": "#ffc107"
+}
+
+# 耐性表の各列（区分, 見出し, 背景色, 通常の色, 強・最強の色）
+RESISTANCE_COLUMNS = [
+    ("弱点", "💥 弱点", "#fff5f5", "#dc3545", "#dc3545"),
+    ("半減", "🛡️ 半減", "#fff9f0", "#fd7e14", "#6f42c1"),
+    ("無効", "✨ 無効", "#f0fff4", "#28a745", "#dc3545"),
+]
+
+def render_resistance_table_html(resistance_info: Dict[str, List[Any]], resistance_level: str) -> str:
+    """耐性表と凡例のHTML（選択した耐性レベルではまだ有効にならない耐性は薄く表示）"""
+    current_level = RESISTANCE_LEVELS.index(resistance_level)
+    header = "".join(
+        f'<th style="padding: 8px 12px; text-align: center; font-weight: bold; color: #495057;'
+        f'{" border-right: 1px solid #dee2e6;" if i < len(RESISTANCE_COLUMNS) - 1 else ""}">{title}</th>'
+        for i, (_, title, _, _, _) in enumerate(RESISTANCE_COLUMNS)
+    )
+    cells = []
+    for i, (category, _, background, color, strong_color) in enumerate(RESISTANCE_COLUMNS):
+        border = " border-right: 1px solid #dee2e6;" if i < len(RESISTANCE_COLUMNS) - 1 else ""
+        tags = "".join(
+            f'<span style="background-color: {strong_color if level else color}; color: white; padding: 3px 8px; '
+            f'border-radius: 15px; margin: 2px; display: inline-block; font-size: 11px;'
+            f'{" opacity: 0.45;" if level > current_level else ""}">{format_resistance_tag(attr, level)}</span>'
+            for attr, level in resistance_info[category]
+        ) or '<span style="color: #6c757d; font-style: italic;">なし</span>'
+        cells.append(f'<td style="padding: 12px; vertical-align: top;{border} background-color: {background};">{tags}</td>')
+
+    return (
+        '<div style="background-color: #ffffff; border: 1px solid #dee2e6; border-radius: 8px; overflow: hidden; margin: 10px 0;">'
+        '<table style="width: 100%; border-collapse: collapse; font-size: 12px;">'
+        f'<thead><tr style="background-color: #f8f9fa; border-bottom: 2px solid #dee2e6;">{header}</tr></thead>'
+        f'<tbody><tr>{"".join(cells)}</tr></tbody>'
+        '</table></div>'
+        '<div style="margin: 10px 0; padding: 8px; background-color: #f8f9fa; border-radius: 5px; font-size: 11px;">'
+        '<strong>📋 凡例:</strong> '
+        '<span style="color: #6f42c1;">★ = 強の特性で耐性アップ</span> | '
+        '<span style="color: #dc3545;">★★ = 最強の特性で耐性アップ</span> | '
+        f'薄い表示 = {resistance_level}ではまだ無効'
+        '</div>'
+    )
+
+def render_skills_html(skills: List[Any]) -> str:
+    """スキル一覧のHTML（スキルごとに開閉できる）"""
+    return "".join(
+        f'<details open style="margin: 6px 0;"><summary style="font-weight: bold; cursor: pointer;">📚 {skill["スキル名"]}</summary>'
+        + "".join(
+            '<div style="background-color: #f8f9fa; border-left: 4px solid #007bff; padding: 10px; margin: 5px 0; '
+            'border-radius: 0 5px 5px 0;">'
+            f'<strong>🗡️ {technique["技名"]}</strong> '
+            '<span style="background-color: #007bff; color: white; padding: 2px 6px; border-radius: 10px; font-size: 0.8rem;">'
+            f'SP: {technique["SP"]}</span>'
+            f'<p style="margin-top: 5px; color: #666;">{technique["効果"]}</p>'
+            '</div>'
+            for technique in skill["特技"]
+        )
+        + '</details>'
+        for skill in skills
+    )
+
+def build_monster_card_html(monster_name: str, monster_data: Dict[str, Any],
+                            resistance_entry: Optional[Dict[str, Any]], resistance_level: str = "通常") -> str:
+    """モンスター情報カード全体のHTML（見出し・特性・耐性表・スキル一覧）"""
     system_name = monster_data.get("系統", "未知")
-    system_color = {
-        "自然系": "#28a745",
-        "魔獣系": "#6f42c1", 
-        "物質系": "#6c757d",
-        "悪魔系": "#dc3545",
-        "ドラゴン系": "#fd7e14",
-        "スライム系": "#007bff",
-        "ゾンビ系": "#343a40",
-        "？？？系": "#e83e8c",
-        "特殊系（魔王）": "#dc3545",
-        "特殊系（神獣）": "#ffc107"
-    }.get(system_name, "#6c757d")
-    
-    st.markdown(f"""
-    <div style="background: linear-gradient(135deg, #007bff, {system_color}); 
-                color: white; 
-                padding: 15px; 
-                border-radius: 10px; 
-                text-align: center; 
-                margin-bottom: 20px;">
-        <h2>🐉 {monster_name}</h2>
-        <div style="background-color: rgba(255,255,255,0.2); 
-                    display: inline-block; 
-                    padding: 5px 15px; 
-                    border-radius: 20px; 
-                    margin-top: 8px;">
-            <strong>【{system_name}】</strong>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 特性
+    system_color = SYSTEM_COLORS.get(system_name, "#6c757d")
+    parts = [
+        f'<div style="background: linear-gradient(135deg, #007bff, {system_color}); color: white; padding: 15px; '
+        'border-radius: 10px; text-align: center; margin-bottom: 20px;">'
+        f'<h2>🐉 {monster_name}</h2>'
+        '<div style="background-color: rgba(255,255,255,0.2); display: inline-block; padding: 5px 15px; '
+        f'border-radius: 20px; margin-top: 8px;"><strong>【{system_name}】</strong></div>'
+        '</div>'
+    ]
+
     if monster_data.get("特性"):
-        st.markdown("### 🔹 特性")
-        for trait in monster_data["特性"]:
-            st.markdown(f"- **{trait}**")
-        st.markdown("---")
-    
-    # 耐性
-    if monster_data.get("耐性") and monster_data["耐性"].get("説明"):
-        st.markdown("### 🛡️ 耐性情報")
-        
-        resistance_info = parse_resistance_info(monster_data["耐性"]["説明"])
-        
-        # テーブル形式で表示
-        table_html = """
-        <div style="background-color: #ffffff; border: 1px solid #dee2e6; border-radius: 8px; overflow: hidden; margin: 10px 0;">
-            <table style="width: 100%; border-collapse: collapse; font-size: 12px;">
-                <thead>
-                    <tr style="background-color: #f8f9fa; border-bottom: 2px solid #dee2e6;">
-                        <th style="padding: 8px 12px; text-align: center; font-weight: bold; color: #495057; border-right: 1px solid #dee2e6;">💥 弱点</th>
-                        <th style="padding: 8px 12px; text-align: center; font-weight: bold; color: #495057; border-right: 1px solid #dee2e6;">🛡️ 半減</th>
-                        <th style="padding: 8px 12px; text-align: center; font-weight: bold; color: #495057;">✨ 無効</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    <tr>
-        """
-        
-        # 弱点セル
-        table_html += '<td style="padding: 12px; vertical-align: top; border-right: 1px solid #dee2e6; background-color: #fff5f5;">'
-        if resistance_info["弱点"]:
-            for weak in resistance_info["弱点"]:
-                table_html += f'<span style="background-color: #dc3545; color: white; padding: 3px 8px; border-radius: 15px; margin: 2px; display: inline-block; font-size: 11px;">{weak}</span>'
-        else:
-            table_html += '<span style="color: #6c757d; font-style: italic;">なし</span>'
-        table_html += '</td>'
-        
-        # 半減セル
-        table_html += '<td style="padding: 12px; vertical-align: top; border-right: 1px solid #dee2e6; background-color: #fff9f0;">'
-        if resistance_info["半減"]:
-            for half in resistance_info["半減"]:
-                if half.startswith("◆"):
-                    color = "#6f42c1"  # 紫色（強）
-                    text = f"{half[1:]} ★"
-                else:
-                    color = "#fd7e14"  # オレンジ色
-                    text = half
-                table_html += f'<span style="background-color: {color}; color: white; padding: 3px 8px; border-radius: 15px; margin: 2px; display: inline-block; font-size: 11px;">{text}</span>'
-        else:
-            table_html += '<span style="color: #6c757d; font-style: italic;">なし</span>'
-        table_html += '</td>'
-        
-        # 無効セル
-        table_html += '<td style="padding: 12px; vertical-align: top; background-color: #f0fff4;">'
-        if resistance_info["無効"]:
-            for null in resistance_info["無効"]:
-                if null.startswith("◆◆"):
-                    color = "#dc3545"  # 赤色（最強）
-                    text = f"{null[2:]} ★★"
-                else:
-                    color = "#28a745"  # 緑色
-                    text = null
-                table_html += f'<span style="background-color: {color}; color: white; padding: 3px 8px; border-radius: 15px; margin: 2px; display: inline-block; font-size: 11px;">{text}</span>'
-        else:
-            table_html += '<span style="color: #6c757d; font-style: italic;">なし</span>'
-        table_html += '</td>'
-        
-        table_html += """
-                    </tr>
-                </tbody>
-            </table>
-        </div>
-        """
-        
-        # 凡例を追加
-        legend_html = """
-        <div style="margin: 10px 0; padding: 8px; background-color: #f8f9fa; border-radius: 5px; font-size: 11px;">
-            <strong>📋 凡例:</strong> 
-            <span style="color: #6f42c1;">★ = 強の特性で半減</span> | 
-            <span style="color: #dc3545;">★★ = 最強の特性で無効</span>
-        </div>
-        """
-        
-        st.markdown(table_html + legend_html, unsafe_allow_html=True)
-        st.markdown("---")
-    
-    # スキル
+        traits = "".join(f"<li><strong>{trait}</strong></li>" for trait in monster_data["特性"])
+        parts.append(f"<h3>🔹 特性</h3><ul>{traits}</ul><hr>")
+
+    if resistance_entry is not None:
+        parts.append(f'<h3>🛡️ 耐性情報（{resistance_level}）</h3>')
+        parts.append(render_resistance_table_html(resistance_entry["タグ"], resistance_level))
+        parts.append("<hr>")
+
     if monster_data.get("スキル"):
-        st.markdown("### ⚔️ スキル情報")
-        
-        for skill in monster_data["スキル"]:
-            with st.expander(f"📚 {skill['スキル名']}", expanded=True):
-                for technique in skill["特技"]:
-                    st.markdown(f"""
-                    <div style="background-color: #f8f9fa; 
-                                border-left: 4px solid #007bff; 
-                                padding: 10px; 
-                                margin: 5px 0; 
-                                border-radius: 0 5px 5px 0;">
-                        <strong>🗡️ {technique['技名']}</strong> 
-                        <span style="background-color: #007bff; 
-                                     color: white; 
-                                     padding: 2px 6px; 
-                                     border-radius: 10px; 
-                                     font-size: 0.8rem;">
-                            SP: {technique['SP']}
-                        </span>
-                        <p style="margin-top: 5px; color: #666;">{technique['効果']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+        parts.append("<h3>⚔️ スキル情報</h3>")
+        parts.append(render_skills_html(monster_data["スキル"]))
 
-def analyze_common_weaknesses(selected_monsters: List[str], monsters_data: Dict[str, Any], resistance_levels: List[str]) -> Dict[str, List[str]]:
-    """選択されたモンスター全員に共通する弱点・効きやすい攻撃を分析（モンスターごとの耐性レベル対応）"""
-    if len(selected_monsters) < 2:
-        return {"effective_attacks": [], "ineffective_attacks": [], "explanation": []}
-    
-    # 有効なモンスターのみフィルタ
-    valid_monsters = []
-    valid_levels = []
-    for i, monster in enumerate(selected_monsters):
-        if monster and monster in monsters_data:
-            valid_monsters.append(monster)
-            valid_levels.append(resistance_levels[i] if i < len(resistance_levels) else "通常")
-    
-    if len(valid_monsters) < 2:
-        return {"effective_attacks": [], "ineffective_attacks": [], "explanation": []}
-    
-    all_attributes = ["メラ", "ギラ", "ヒャド", "バギ", "イオ", "デイン", "ドルマ", "ザキ", "マヒ", "眠り", "混乱", "毒", "マホトーン"]
-    
-    effective_attacks = []
-    ineffective_attacks = []
-    resistance_summary = {}
-    
-    # 各属性に対する全モンスターの耐性を調査
-    for attr in all_attributes:
-        is_effective_for_all = True
-        is_ineffective_for_all = True
-        resistance_details = []
-        
-        for i, monster_name in enumerate(valid_monsters):
-            monster_data = monsters_data[monster_name]
-            resistance_level = valid_levels[i]
-            if monster_data.get("耐性") and monster_data["耐性"].get("説明"):
-                resistance_info = parse_resistance_info(monster_data["耐性"]["説明"])
-                
-                # この属性に対する耐性をチェック
-                is_weak = any(attr in weak for weak in resistance_info["弱点"])
-                
-                # 耐性レベルに応じた半減・無効判定
-                is_half = False
-                is_null = False
-                
-                for half in resistance_info["半減"]:
-                    clean_half = half.replace("◆", "")
-                    if attr in clean_half:
-                        if resistance_level == "通常":
-                            is_half = True
-                        elif resistance_level == "強" and "◆" in half:
-                            is_half = True
-                        elif resistance_level == "最強":
-                            is_half = True
-                
-                for null in resistance_info["無効"]:
-                    clean_null = null.replace("◆", "")
-                    if attr in clean_null:
-                        if resistance_level == "通常":
-                            is_null = True
-                        elif resistance_level == "強" and "◆" in null:
-                            is_null = True
-                        elif resistance_level == "最強" and "◆◆" in null:
-                            is_null = True
-                
-                if is_null:
-                    resistance_details.append(f"{monster_name}({resistance_level}):無効")
-                    is_effective_for_all = False
-                elif is_half:
-                    resistance_details.append(f"{monster_name}({resistance_level}):半減")
-                    is_effective_for_all = False
-                    is_ineffective_for_all = False
-                elif is_weak:
-                    resistance_details.append(f"{monster_name}({resistance_level}):弱点")
-                    is_ineffective_for_all = False
-                else:
-                    resistance_details.append(f"{monster_name}({resistance_level}):通常")
-                    is_ineffective_for_all = False
-            else:
-                resistance_details.append(f"{monster_name}({resistance_level}):情報なし")
-                is_ineffective_for_all = False
-        
-        # 効果的な攻撃の判定
-        if is_effective_for_all:
-            weak_count = sum(1 for detail in resistance_details if "弱点" in detail)
-            if weak_count > 0:
-                effective_attacks.append(f"🔥 {attr} (弱点×{weak_count})")
-            else:
-                effective_attacks.append(f"⚡ {attr}")
-        
-        # 非効果的な攻撃の判定
-        if any("無効" in detail for detail in resistance_details):
-            null_count = sum(1 for detail in resistance_details if "無効" in detail)
-            if null_count == len(valid_monsters):
-                ineffective_attacks.append(f"❌ {attr} (全員無効)")
-            else:
-                ineffective_attacks.append(f"� {attr} (無効×{null_count})")
-        elif any("半減" in detail for detail in resistance_details):
-            half_count = sum(1 for detail in resistance_details if "半減" in detail)
-            if half_count == len(valid_monsters):
-                ineffective_attacks.append(f"🔽 {attr} (全員半減)")
-            else:
-                ineffective_attacks.append(f"📉 {attr} (半減×{half_count})")
-        
-        resistance_summary[attr] = resistance_details
-    
-    return {
-        "effective_attacks": effective_attacks,
-        "ineffective_attacks": ineffective_attacks,
-        "resistance_summary": resistance_summary,
-        "valid_monsters": valid_monsters,
-        "resistance_levels": valid_levels
-    }
+    # 空行があるとMarkdownとして解釈されるため、1行のHTMLにする
+    return "".join(parts)
+
+@st.cache_data(max_entries=MONSTER_CARD_CACHE_ENTRIES)
+def render_monster_card(version: Signature, monster_name: str, resistance_level: str) -> str:
+    """モンスター情報カードのHTMLを (データの版, モンスター, 耐性レベル) ごとにキャッシュ"""
+    monsters_data = load_monster_data(version)
+    return build_monster_card_html(monster_name, monsters_data.get(monster_name, {}),
+                                   load_resistance_index(version).get(monster_name), resistance_level)
+
+def display_monster_card(monster_name: str, monster_data: Dict[str, Any],
+                         resistance_index: Optional[Dict[str, Any]] = None, resistance_level: str = "通常",
+                         version: Optional[Signature] = None):
+    """モンスター情報カードを表示（1回の st.markdown で描画）
+
+    version が渡された場合は（その版の読み込み済みのデータとして）キャッシュしたHTMLを使う。
+    """
+    if not monster_data:
+        st.info("モンスターを選択してください")
+        return
 
-def create_comparison_table(selected_monsters: List[str], monsters_data: Dict[str, Any]):
+    if version is not None:
+        card_html = render_monster_card(version, monster_name, resistance_level)
+    else:
+        resistance_entry = get_resistance_entry(monster_name, {monster_name: monster_data}, resistance_index)
+        card_html = build_monster_card_html(monster_name, monster_data, resistance_entry, resistance_level)
+    st.markdown(card_html, unsafe_allow_html=True)
+
+def create_comparison_table(selected_monsters: List[str], monsters_data: Dict[str, Any],
+                            resistance_index: Optional[Dict[str, Any]] = None):
     """比較テーブルを作成"""
     if not any(selected_monsters):
         st.info("比較するモンスターを選択してください")
@@ -353,11 +301,12 @@ def create_comparison_table(selected_monsters: List[str], monsters_data: Dict[st
         row["特性"] = "、".join(traits) if traits else "なし"
         
         # 耐性情報
-        if data.get("耐性") and data["耐性"].get("説明"):
-            resistance_info = parse_resistance_info(data["耐性"]["説明"])
-            row["弱点"] = "、".join(resistance_info["弱点"]) if resistance_info["弱点"] else "なし"
-            row["半減"] = "、".join(resistance_info["半減"]) if resistance_info["半減"] else "なし"
-            row["無効"] = "、".join(resistance_info["無効"]) if resistance_info["無効"] else "なし"
+        resistance_entry = get_resistance_entry(monster_name, monsters_data, resistance_index)
+        if resistance_entry is not None:
+            resistance_info = resistance_entry["タグ"]
+            for category in ("弱点", "半減", "無効"):
+                tags = [format_resistance_tag(attr, level) for attr, level in resistance_info[category]]
+                row[category] = "、".join(tags) if tags else "なし"
         else:
             row["弱点"] = "情報なし"
             row["半減"] = "情報なし"
@@ -374,6 +323,145 @@ def create_comparison_table(selected_monsters: List[str], monsters_data: Dict[st
         df = pd.DataFrame(comparison_data)
         st.dataframe(df, use_container_width=True)
 
+def display_attack_recommendations(party: List[str], resistance_levels: List[str], version: Signature):
+    """敵パーティーに有効な特技・スキル・モンスターのおすすめを表示"""
+    party_levels = [(monster, level) for monster, level in zip(party, resistance_levels) if monster]
+    if not party_levels:
+        return
+    attack_index, attack_matrix = load_attack_index(version)
+    monsters = [monster for monster, _ in party_levels]
+    levels = [level for _, level in party_levels]
+    ranking = rank_attacks(attack_index, attack_matrix, monsters, levels, top=15)
+    
+    def to_dataframe(entries, extra_columns):
+        rows = []
+        for entry in entries:
+            row = {"名前": entry["名前"]}
+            for column in extra_columns:
+                row[column] = "、".join(entry[column])
+            row["平均倍率"] = entry["平均"]
+            row["最低倍率"] = entry["最低"]
+            row["等倍以上"] = f"{entry['等倍以上']}/{len(monsters)}体"
+            for monster, score in zip(monsters, entry["敵ごと"]):
+                row[monster] = f"×{score}"
+            rows.append(row)
+        return pd.DataFrame(rows)
+    
+    with st.expander("🗡️ おすすめの攻撃手段", expanded=False):
+        st.markdown("属性を持つ特技を、選択したモンスター全員に対する効き目（ダメージ倍率の目安）で順位付けしています。")
+        tab_techniques, tab_skills, tab_monsters = st.tabs(["特技", "スキル", "モンスター"])
+        with tab_techniques:
+            st.dataframe(to_dataframe(ranking["特技"], ["属性", "スキル"]), use_container_width=True)
+        with tab_skills:
+            st.dataframe(to_dataframe(ranking["スキル"], []), use_container_width=True)
+        with tab_monsters:
+            st.dataframe(to_dataframe(ranking["モンスター"], []), use_container_width=True)
+
+def display_reverse_lookup(monsters_data: Dict[str, Any], resistance_index: Dict[str, Any], version: Signature):
+    """逆引き検索（属性への耐性・特性・スキル・系統からモンスターを探す）"""
+    st.markdown("## 🔎 逆引き検索")
+    query_index = load_query_index(version)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        attr = st.selectbox("属性", [""] + query_index.attributes, key="lookup_attr",
+                            help="選択した属性への耐性で絞り込み")
+        category = st.radio("耐性", QUERY_CATEGORIES, horizontal=True, key="lookup_category")
+    with col2:
+        resistance_level = st.radio("耐性レベル", RESISTANCE_LEVELS, horizontal=True, key="lookup_level")
+        systems = st.multiselect("系統", sorted(query_index.systems), key="lookup_systems")
+    with col3:
+        trait = st.selectbox("特性", [""] + sorted(query_index.traits), key="lookup_trait")
+        skill = st.selectbox("スキル", [""] + sorted(query_index.skills), key="lookup_skill")
+        sp_low, sp_high = query_index.sp_range
+        sp_filter = (None, None)
+        # SPが数値の特技がない（範囲が1点だけの）データでは絞り込みを出さない
+        if sp_low < sp_high:
+            sp_min, sp_max = st.slider("特技のSP", sp_low, sp_high, (sp_low, sp_high), key="lookup_sp",
+                                       help="この範囲のSPで覚える特技があるモンスターに絞り込み")
+            if (sp_min, sp_max) != (sp_low, sp_high):
+                sp_filter = (sp_min, sp_max)
+    
+    results = query_index.query(attr or None, category, resistance_level, trait or None, skill or None, systems,
+                                *sp_filter)
+    
+    st.markdown(f"### 📋 検索結果: {len(results)}体")
+    if results:
+        create_comparison_table(results, monsters_data, resistance_index)
+    else:
+        st.info("条件に合うモンスターが見つかりませんでした")
+
+def display_roster(version: Signature):
+    """全モンスターの一覧（絞り込み・並べ替えは全体に対して行い、1ページ分だけを表示する）"""
+    st.markdown("## 📚 モンスター一覧")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        name = st.text_input("名前", key="roster_name", placeholder="ひらがなでも検索できます")
+        trait = st.text_input("特性", key="roster_trait", help="特性の一部で絞り込み")
+    with col2:
+        selected_systems = st.multiselect("系統", sorted(load_search_index(version).systems), key="roster_systems")
+        resistance_level = st.radio("耐性レベル", RESISTANCE_LEVELS, horizontal=True, key="roster_level",
+                                    help="弱点・半減・無効の属性数を数える耐性レベル")
+    with col3:
+        sort_by = st.selectbox("並べ替え", ROSTER_COLUMNS, key="roster_sort")
+        ascending = st.radio("順序", ["昇順", "降順"], horizontal=True, key="roster_order") == "昇順"
+    
+    roster = filter_roster(load_roster_frame(version, resistance_level), name, selected_systems, trait, sort_by, ascending)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("1ページの表示数", [25, 50, 100, 200], key="roster_page_size")
+    pages = page_count(roster, page_size)
+    with col2:
+        page = st.number_input("ページ", min_value=1, max_value=pages, value=1, key="roster_page",
+                               help=f"全{pages}ページ")
+    
+    st.markdown(f"### 📋 {len(roster)}体")
+    st.dataframe(roster_page(roster, min(page, pages), page_size), use_container_width=True, hide_index=True)
+    st.markdown("弱点・半減・無効は、その耐性になる属性の数です（耐性情報のないモンスターは空欄）。")
+
+def display_party_optimizer(monster_names: List[str], version: Signature):
+    """想定する敵の攻撃に対して、弱点が重なりにくいパーティーを探す"""
+    st.markdown("## 🛡️ パーティー編成")
+    st.markdown("想定する敵の攻撃の属性と重みを選ぶと、全モンスターの組み合わせから弱点が重なりにくいパーティーを探します。")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        threat_attributes = st.multiselect("想定する敵の攻撃", ATTACK_ATTRIBUTES,
+                                           default=["メラ", "ギラ", "ヒャド", "バギ", "イオ"], key="party_threat")
+        required = st.multiselect("必ず入れるモンスター", monster_names, key="party_required")
+    with col2:
+        resistance_level = st.radio("パーティーの耐性レベル", RESISTANCE_LEVELS, horizontal=True, key="party_level")
+        party_size = st.slider("パーティーの人数", min_value=2, max_value=4, value=DEFAULT_PARTY_SIZE, key="party_size")
+        top = st.slider("表示する候補の数", min_value=5, max_value=50, value=10, key="party_top")
+    
+    if not threat_attributes:
+        st.info("想定する敵の攻撃を選択してください")
+        return
+    
+    with st.expander("属性ごとの重み", expanded=False):
+        cols = st.columns(4)
+        threat = []
+        for i, attr in enumerate(threat_attributes):
+            with cols[i % 4]:
+                threat.append((attr, st.number_input(attr, min_value=0.0, max_value=10.0, value=1.0, step=0.5,
+                                                     key=f"party_weight_{attr}")))
+    
+    results = search_parties(version, tuple(threat), resistance_level, party_size, top, tuple(required))
+    if not results:
+        st.warning("条件に合うパーティーが見つかりませんでした")
+        return
+    
+    rows = []
+    for rank, result in enumerate(results, 1):
+        row = {"順位": rank, "パーティー": " / ".join(result["パーティー"]), "評価値": result["評価値"]}
+        for attr, detail in result["属性"].items():
+            row[attr] = f"弱{detail['弱点']} 耐{detail['耐性']}"
+        rows.append(row)
+    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+    st.markdown("評価値は小さいほど良く、弱点が重なる属性ほど大きく加算されます。「弱」は弱点持ち、「耐」は半減以上の耐性持ちの数です。")
+
 def main():
     """メイン関数"""
     # ページ設定
@@ -441,12 +529,18 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # データ読み込み
-    monsters_data = load_monster_data()
+    # データ読み込み（この実行の間は同じ版のデータを使う）
+    version = data_version()
+    if version is None:
+        monsters_data = {}
+    else:
+        monsters_data = load_monster_data(version)
+        resistance_index = load_resistance_index(version)
+        resistance_matrix = load_resistance_matrix(version)
     
     if not monsters_data:
         st.error("⚠️ モンスターデータが見つかりません。`dqmj2_monsters.json`ファイルを確認してください。")
-        st.info("💡 データをスクレイピングするには、`main.py`を実行してください。")
+        st.info("💡 データをスクレイピングするには、`scraper.py`を実行してください。")
         return
     
     monster_names = sorted(list(monsters_data.keys()))
@@ -454,17 +548,49 @@ def main():
     # サイドバー
     with st.sidebar:
         st.markdown("## 🎮 操作パネル")
-        
+        mode = st.radio("表示モード", ["モンスター比較", "逆引き検索", "パーティー編成", "一覧表示"], key="mode")
+    
+    if mode == "逆引き検索":
+        display_reverse_lookup(monsters_data, resistance_index, version)
+        return
+    if mode == "パーティー編成":
+        display_party_optimizer(monster_names, version)
+        return
+    if mode == "一覧表示":
+        display_roster(version)
+        return
+    
+    with st.sidebar:
         st.markdown("### 📊 比較モンスター選択")
-        st.markdown("最大3体まで選択可能")
+        compare_count = st.number_input(
+            "比較するモンスターの数",
+            min_value=1,
+            max_value=MAX_COMPARE_MONSTERS,
+            value=3,
+            key="compare_count",
+            help=f"最大{MAX_COMPARE_MONSTERS}体まで選択可能"
+        )
+        
+        search_query = st.text_input(
+            "🔍 名前で絞り込み",
+            key="monster_search",
+            help="ひらがな・カタカナのどちらでも検索できます（系統名も可）"
+        )
+        # 検索索引で候補を絞り込む（完全一致 → 前方一致 → 部分一致 → 系統名の順）
+        candidates = load_search_index(version).search(search_query) if search_query.strip() else monster_names
         
         compare_monsters = []
         resistance_levels = []
         
-        for i in range(3):
+        for i in range(compare_count):
+            # 選択中のモンスターは絞り込みの結果になくても残す（データの再読み込みで消えたモンスターは外す）
+            current = st.session_state.get(f"compare_{i}", "")
+            if current and current not in monsters_data:
+                st.session_state[f"compare_{i}"] = current = ""
+            options = [""] + ([current] if current and current not in candidates else []) + candidates
             monster = st.selectbox(
                 f"モンスター {i+1}",
-                options=[""] + monster_names,
+                options=options,
                 key=f"compare_{i}",
                 help=f"{i+1}番目の比較モンスターを選択"
             )
@@ -474,7 +600,7 @@ def main():
             if monster:
                 resistance_level = st.radio(
                     f"モンスター{i+1}の耐性レベル",
-                    ["通常", "強", "最強"],
+                    RESISTANCE_LEVELS,
                     index=0,
                     key=f"resistance_{i}",
                     help=f"{monster}の特性による耐性変化を選択"
@@ -483,24 +609,26 @@ def main():
             else:
                 resistance_levels.append("通常")
             
-            if i < 2:  # 最後の要素以外に区切り線
+            if i < compare_count - 1:  # 最後の要素以外に区切り線
                 st.markdown("---")
         
         # 統計情報
         st.markdown("---")
         st.markdown("### 📈 データ統計")
         
-        # 系統別集計
-        system_count = {}
-        for name, data in monsters_data.items():
-            system = data.get("系統", "未知")
-            system_count[system] = system_count.get(system, 0) + 1
+        # 系統別集計（逆引き用の索引から数える。モンスターのデータは展開しない）
+        system_count = load_query_index(version).system_counts
         
         st.markdown(f"**総モンスター数:** {len(monsters_data)}体")
         
         with st.expander("系統別詳細", expanded=False):
             for system, count in sorted(system_count.items()):
                 st.markdown(f"- {system}: {count}体")
+        
+        with st.expander("属性別の耐性分布", expanded=False):
+            distribution_level = st.radio("耐性レベル", RESISTANCE_LEVELS, horizontal=True, key="distribution_level")
+            distribution = category_counts(resistance_matrix, distribution_level)
+            st.dataframe(pd.DataFrame.from_dict(distribution, orient="index"), use_container_width=True)
     
     # メインコンテンツ
     st.markdown("## 📊 モンスター比較")
@@ -515,18 +643,8 @@ def main():
         if selected_count >= 2:
             st.markdown("### 🎯 攻撃効果分析")
             
-            # サイドバーから各モンスターの耐性レベルを取得
-            monster_resistance_levels = []
-            for monster in compare_monsters:
-                if monster:
-                    # 該当するモンスターのサイドバーでの選択値を取得
-                    level_key = f"resistance_level_{monster}"
-                    level = st.session_state.get(level_key, "通常")
-                    monster_resistance_levels.append(level)
-                else:
-                    monster_resistance_levels.append("通常")
-            
-            weakness_analysis = analyze_common_weaknesses(compare_monsters, monsters_data, monster_resistance_levels)
+            # サイドバーで選択した各モンスターの耐性レベルで分析
+            weakness_analysis = analyze_common_weaknesses(compare_monsters, monsters_data, resistance_levels, resistance_matrix)
             
             # 効果的な攻撃を縦に表示
             st.markdown("#### ✅ 効果的な攻撃 (全員に効く)")
@@ -598,9 +716,9 @@ def main():
                     st.dataframe(analysis_df, use_container_width=True)
                     
                     # 凡例
-                    st.markdown(f"""
+                    st.markdown("""
                     <div style="background-color: #f8f9fa; padding: 10px; border-radius: 5px; margin-top: 10px; font-size: 11px;">
-                        <strong>📋 凡例 ({resistance_level}攻撃時):</strong> 
+                        <strong>📋 凡例 (各モンスターの耐性レベル):</strong> 
                         <span style="color: #dc3545;">🔥 = 弱点持ちに特に効果的</span> | 
                         <span style="color: #28a745;">⚡ = 全員に通常ダメージ</span> | 
                         <span style="color: #fd7e14;">📉 = 半減される</span> | 
@@ -609,10 +727,12 @@ def main():
                     </div>
                     """, unsafe_allow_html=True)
             
+            display_attack_recommendations(compare_monsters, resistance_levels, version)
+            
             st.markdown("---")
         
         # 比較テーブル
-        create_comparison_table(compare_monsters, monsters_data)
+        create_comparison_table(compare_monsters, monsters_data, resistance_index)
         
         # 個別カード表示（横並び3列）
         st.markdown("### 🃏 詳細比較")
@@ -623,9 +743,11 @@ def main():
         if valid_monsters:
             # 3列で表示
             cols = st.columns(3)
-            for i, monster_name in enumerate(valid_monsters):
+            selected = [(monster, level) for monster, level in zip(compare_monsters, resistance_levels) if monster]
+            for i, (monster_name, resistance_level) in enumerate(selected):
                 with cols[i % 3]:
-                    display_monster_card(monster_name, monsters_data.get(monster_name, {}))
+                    display_monster_card(monster_name, monsters_data.get(monster_name, {}), resistance_index,
+                                         resistance_level, version)
     
     elif selected_count == 1:
         st.info("📋 1体のモンスター情報を表示しています（2体以上選択すると比較分析も表示されます）")
@@ -642,52 +764,12 @@ def main():
             
             # 個別の耐性分析を表示
             st.markdown(f"### 🎯 耐性分析 (耐性レベル: {resistance_level})")
-            monster_data = monsters_data[monster_name]
-            
-            if monster_data.get("耐性") and monster_data["耐性"].get("説明"):
-                resistance_info = parse_resistance_info(monster_data["耐性"]["説明"])
-                
+            if resistance_matrix.has_info[resistance_matrix.rows[monster_name]]:
                 # 各属性に対する耐性を分析
-                all_attributes = ["メラ", "ギラ", "ヒャド", "バギ", "イオ", "デイン", "ドルマ", "ザキ", "マヒ", "眠り", "混乱", "毒", "マホトーン"]
-                
-                effective_attrs = []
-                weak_attrs = []
-                ineffective_attrs = []
-                
-                for attr in all_attributes:
-                    is_weak = any(attr in weak for weak in resistance_info["弱点"])
-                    is_half = False
-                    is_null = False
-                    
-                    # 耐性レベルに応じた判定
-                    for half in resistance_info["半減"]:
-                        clean_half = half.replace("◆", "")
-                        if attr in clean_half:
-                            if resistance_level == "通常":
-                                is_half = True
-                            elif resistance_level == "強" and "◆" in half:
-                                is_half = True
-                            elif resistance_level == "最強":
-                                is_half = True
-                    
-                    for null in resistance_info["無効"]:
-                        clean_null = null.replace("◆", "")
-                        if attr in clean_null:
-                            if resistance_level == "通常":
-                                is_null = True
-                            elif resistance_level == "強" and "◆" in null:
-                                is_null = True
-                            elif resistance_level == "最強" and "◆◆" in null:
-                                is_null = True
-                    
-                    if is_weak:
-                        weak_attrs.append(attr)
-                    elif is_null:
-                        ineffective_attrs.append(f"❌ {attr}")
-                    elif is_half:
-                        ineffective_attrs.append(f"🔽 {attr}")
-                    else:
-                        effective_attrs.append(attr)
+                analysis = analyze_single_monster(monster_name, resistance_level, resistance_matrix)
+                weak_attrs = analysis["弱点"]
+                effective_attrs = analysis["通常"]
+                ineffective_attrs = [f"❌ {attr}" for attr in analysis["無効"]] + [f"🔽 {attr}" for attr in analysis["半減"]]
                 
                 # カード形式で表示
                 st.markdown("#### ✅ 効果的な攻撃")
@@ -752,6 +834,8 @@ def main():
                             """, unsafe_allow_html=True)
                 else:
                     st.info("💡 すべての攻撃が有効です！")
+                
+                display_attack_recommendations([monster_name], [resistance_level], version)
             else:
                 st.warning("⚠️ この モンスターの耐性情報がありません。")
             
@@ -759,11 +843,12 @@ def main():
             
             # 比較テーブルも1体用に表示
             st.markdown("### 📊 基本情報")
-            create_comparison_table(compare_monsters, monsters_data)
+            create_comparison_table(compare_monsters, monsters_data, resistance_index)
             
             # 個別カード表示
             st.markdown("### 🃏 詳細情報")
-            display_monster_card(monster_name, monsters_data.get(monster_name, {}))
+            display_monster_card(monster_name, monsters_data.get(monster_name, {}), resistance_index, resistance_level,
+                                 version)
     else:
         st.info("👈 サイドバーから比較するモンスターを選択してください")
 